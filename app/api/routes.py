@@ -1,4 +1,9 @@
 import base64
+import functools
+import itertools
+import json
+import threading
+import time
 import uuid
 from datetime import datetime, timezone
 from flask import jsonify, abort, request, Response, redirect, current_app
@@ -7,52 +12,138 @@ from app.api import api_bp
 from app.extensions import db
 from app.models import DashboardSession, MinimalLogEntry
 from app.store import submission_store
-from app.renderer.text import TextRenderer
-from app.schemas.crime_types import CRIME_SCHEMAS
-from app.audit import log_access
+from app.audit import log_access, log_access_many
+from app.renderer.cache import rendered_for, rendered_for_many
+from app.renderer.thumbnails import THUMBNAIL_SIZES
 from app.utils.access_control import can_access_session
+from app.utils.media import SNIFF_BYTES, accel_response
 from app.utils.mime import detect_mimetype
+from app.storage.photo_spill import SpilledPhoto
+from app.storage.photo_storage import stream_bytes, variant_key
 
 def _get_owned_session(session_id):
     return DashboardSession.query.filter_by(
         id=session_id, user_id=current_user.id
     ).first_or_404()
 
+def _summary_json(sub):
+    return {
+        "id": sub.submission_id,
+        "guest_name": sub.guest_name,
+        "crime_type": sub.crime_type,
+        "received_at": sub.received_at.isoformat(),
+    }
+
 @api_bp.route("/sessions/<int:session_id>/submissions")
 @login_required
 def list_submissions(session_id):
+    """Pending list of a session, with conditional GET and delta sync.
+
+    The ETag is the dashboard's list version, so ``If-None-Match`` is
+    answered with 304 without reading the store.  ``?since=<version>``
+    returns ``{"version", "reset", "added", "removed", "count"}``:
+    summaries added and ids removed since that version, or the whole list
+    with ``reset: true`` when the version is too old for a delta.
+    """
     session = DashboardSession.query.get_or_404(session_id)
     can_access, role = can_access_session(current_user, session)
     if not can_access:
         abort(403)
-    subs = submission_store.list_for_dashboard(session_id)
-    return jsonify([{
-        "id": s.submission_id,
-        "guest_name": s.guest_name,
-        "crime_type": s.crime_type,
-        "received_at": s.received_at.isoformat(),
-    } for s in subs])
 
-@api_bp.route("/sessions/<int:session_id>/submissions/<submission_id>")
+    since = request.args.get("since", type=int)
+    if since is not None:
+        changes = submission_store.changes_since(session_id, since)
+        if changes is None:
+            version = submission_store.version_for_dashboard(session_id)
+            subs = submission_store.list_summaries_for_dashboard(session_id)
+            return jsonify({
+                "version": version,
+                "reset": True,
+                "added": [_summary_json(s) for s in subs],
+                "removed": [],
+                "count": len(subs),
+            })
+        version, added_ids, removed_ids = changes
+        added = submission_store.get_many(added_ids, with_photos=False, dashboard_id=session_id)
+        return jsonify({
+            "version": version,
+            "reset": False,
+            "added": [_summary_json(s) for s in added],
+            "removed": removed_ids,
+            "count": submission_store.count_for_dashboard(session_id),
+        })
+
+    version = submission_store.version_for_dashboard(session_id)
+    etag = f"{session_id}-{version}"
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        subs = submission_store.list_summaries_for_dashboard(session_id)
+        response = jsonify([_summary_json(s) for s in subs])
+    response.set_etag(etag)
+    response.headers["X-Submissions-Version"] = str(version)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+@api_bp.route("/sessions/<int:session_id>/events")
 @login_required
-def get_submission(session_id, submission_id):
+def submission_events(session_id):
+    """Server-Sent Events stream of changes to the session's pending list.
+
+    Each open stream holds a worker thread, so streams per process are
+    capped by ``SSE_MAX_STREAMS``; past the cap the browser gets a 503 and
+    keeps polling ``list_submissions`` instead.
+    """
     session = DashboardSession.query.get_or_404(session_id)
     can_access, role = can_access_session(current_user, session)
     if not can_access:
         abort(403)
-    sub = submission_store.get(submission_id)
-    if not sub or sub.dashboard_id != session_id:
-        abort(404)
 
-    log_access(current_user, submission_id, "view")
+    slots = current_app.extensions.setdefault(
+        "sse_slots", threading.BoundedSemaphore(current_app.config.get("SSE_MAX_STREAMS", 1))
+    )
+    if not slots.acquire(blocking=False):
+        return Response(status=503, headers={"Retry-After": "30"})
 
-    questions = CRIME_SCHEMAS.get(sub.crime_type, {}).get("questions", [])
-    structured = TextRenderer.render_structured(sub, questions)
-    text = TextRenderer.render(sub)
+    max_seconds = current_app.config.get("SSE_STREAM_MAX_SECONDS", 300)
+    heartbeat = current_app.config.get("SSE_HEARTBEAT_SECONDS", 20)
+    # Subscribe before responding so nothing published meanwhile is missed.
+    subscription = submission_store.subscribe(session_id)
+    released = []
 
-    photo_keys = list(getattr(sub, "photo_keys", []))
-    
-    return jsonify({
+    def _release():
+        if not released:
+            released.append(True)
+            subscription.close()
+            slots.release()
+
+    # Deliberately not wrapped in stream_with_context: the request context
+    # (and its database connection) is released before streaming starts.
+    def stream():
+        yield "retry: 5000\n\n"
+        deadline = time.monotonic() + max_seconds
+        while time.monotonic() < deadline:
+            events = subscription.get(timeout=min(heartbeat, max(deadline - time.monotonic(), 0)))
+            if not events:
+                yield ": keepalive\n\n"
+                continue
+            for event in events:
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+    response = Response(stream(), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-store",
+        # Tell nginx not to buffer the stream.
+        "X-Accel-Buffering": "no",
+    })
+    response.call_on_close(_release)
+    return response
+
+# Most submissions one batch request may ask for.
+_DETAIL_BATCH_LIMIT = 20
+
+
+def _detail_json(sub, rendered):
+    return {
         "id": sub.submission_id,
         "guest_name": sub.guest_name,
         "dob": sub.dob,
@@ -64,18 +155,80 @@ def get_submission(session_id, submission_id):
         "narrative": sub.narrative,
         "answers": sub.answers,
         "received_at": sub.received_at.isoformat(),
-        # Total photo count = S3 keys + in-memory bytes (may be mixed on
+        # Total photo count = S3 keys + store-held photos (may be mixed on
         # partial S3 failure; see intake route for details).
-        "photo_count": len(photo_keys) + len(sub.photos),
-        "structured": structured,
-        "text": text,
+        "photo_count": sub.photo_count,
+        "structured": rendered["structured"],
+        "text": rendered["text"],
+    }
+
+@api_bp.route("/sessions/<int:session_id>/submissions/batch")
+@login_required
+def get_submissions_batch(session_id):
+    """Details of several submissions at once (``?ids=a,b,c``), for prefetching.
+
+    One access check, one store read, one render-cache read and a single
+    audit insert cover the whole batch.  Ids not pending in the session are
+    listed under ``missing``.
+    """
+    session = DashboardSession.query.get_or_404(session_id)
+    can_access, role = can_access_session(current_user, session)
+    if not can_access:
+        abort(403)
+
+    ids = list(dict.fromkeys(i for i in request.args.get("ids", "").split(",") if i))
+    if not ids or len(ids) > _DETAIL_BATCH_LIMIT:
+        abort(400)
+
+    subs = submission_store.get_many(ids, with_photos=False, dashboard_id=session_id)
+    # Prefetched details may never be opened, so they are not logged as views.
+    log_access_many(current_user, [sub.submission_id for sub in subs], "prefetch")
+
+    found = {sub.submission_id for sub in subs}
+    return jsonify({
+        "submissions": [
+            _detail_json(sub, rendered)
+            for sub, rendered in zip(subs, rendered_for_many(subs))
+        ],
+        "missing": [sid for sid in ids if sid not in found],
     })
 
+@api_bp.route("/sessions/<int:session_id>/submissions/<submission_id>")
+@login_required
+def get_submission(session_id, submission_id):
+    session = DashboardSession.query.get_or_404(session_id)
+    can_access, role = can_access_session(current_user, session)
+    if not can_access:
+        abort(403)
+    sub = submission_store.get(submission_id, dashboard_id=session_id)
+    if not sub or sub.dashboard_id != session_id:
+        abort(404)
+
+    log_access(current_user, submission_id, "view")
+
+    # Rendered once per submission (usually at intake) and cached in the store.
+    return jsonify(_detail_json(sub, rendered_for(sub)))
+
+@api_bp.route("/sessions/<int:session_id>/submissions/<submission_id>/viewed", methods=["POST"])
+@login_required
+def mark_submission_viewed(session_id, submission_id):
+    """Audit the opening of a submission whose details were prefetched."""
+    session = DashboardSession.query.get_or_404(session_id)
+    can_access, role = can_access_session(current_user, session)
+    if not can_access:
+        abort(403)
+    if not submission_store.get_many([submission_id], with_photos=False, dashboard_id=session_id):
+        abort(404)
+
+    log_access(current_user, submission_id, "view")
+
+    return jsonify({"status": "ok"})
+
 @api_bp.route("/sessions/<int:session_id>/submissions/<submission_id>/close", methods=["POST"])
 @login_required
 def close_submission(session_id, submission_id):
     session = _get_owned_session(session_id)
-    sub = submission_store.get(submission_id)
+    sub = submission_store.get(submission_id, dashboard_id=session_id)
     if not sub or sub.dashboard_id != session_id:
         abort(404)
     
@@ -96,7 +249,7 @@ def close_submission(session_id, submission_id):
         for key in sub.photo_keys:
             storage.delete(key)
 
-    submission_store.delete(submission_id)
+    submission_store.delete(submission_id, dashboard_id=session_id)
     db.session.commit()
 
     log_access(current_user, submission_id, "close")
@@ -107,7 +260,7 @@ def close_submission(session_id, submission_id):
 @login_required
 def discard_submission(session_id, submission_id):
     session = _get_owned_session(session_id)
-    sub = submission_store.get(submission_id)
+    sub = submission_store.get(submission_id, dashboard_id=session_id)
     if not sub or sub.dashboard_id != session_id:
         abort(404)
     
@@ -128,7 +281,7 @@ def discard_submission(session_id, submission_id):
         for key in sub.photo_keys:
             storage.delete(key)
 
-    submission_store.delete(submission_id)
+    submission_store.delete(submission_id, dashboard_id=session_id)
     db.session.commit()
 
     log_access(current_user, submission_id, "discard")
@@ -146,47 +299,126 @@ def get_photo(session_id, submission_id, index):
     can_access, role = can_access_session(current_user, session)
     if not can_access:
         abort(403)
-    sub = submission_store.get(submission_id)
-    if not sub or sub.dashboard_id != session_id:
+    # ?size=thumb|preview asks for a downscaled copy (app.renderer.thumbnails);
+    # the original is sent while none exists.
+    size = request.args.get("size")
+    if size is not None and size not in THUMBNAIL_SIZES:
+        abort(400)
+    if index < 0:
         abort(404)
 
+    # Metadata only: the one photo asked for is fetched on its own below,
+    # after its downscaled copy when one was asked for.
+    subs = submission_store.get_many([submission_id], with_photos=False, dashboard_id=session_id)
+    if not subs or subs[0].dashboard_id != session_id:
+        abort(404)
+    sub = subs[0]
+
     log_access(current_user, submission_id, "download_photo")
 
     photo_keys = list(getattr(sub, "photo_keys", []))
 
-    # Photos are split between S3-backed keys (photo_keys) and in-memory bytes
-    # (sub.photos).  S3 keys come first (index 0 .. len(photo_keys)-1) and
-    # in-memory bytes follow (index len(photo_keys) .. total-1).
+    # Photos are split between S3-backed keys (photo_keys) and store-held
+    # bytes.  S3 keys come first (index 0 .. len(photo_keys)-1) and the
+    # store's photos follow (index len(photo_keys) onwards).
     total_keys = len(photo_keys)
-    total_bytes = len(sub.photos)
-    total = total_keys + total_bytes
-
-    if index < 0 or index >= total:
-        abort(404)
 
     if index < total_keys:
-        # Photo is in external storage — proxy bytes to the client so the
-        # browser always loads images from 'self' (required by the CSP).
+        # Photo is in external storage — proxy bytes to the client (or have
+        # nginx do it, see app.utils.media) so the browser always loads
+        # images from 'self' (required by the CSP).
         storage = getattr(current_app, "photo_storage", None)
-        if storage is not None:
-            data_bytes = storage.download(photo_keys[index])
-            if data_bytes:
-                mime = detect_mimetype(data_bytes)
-                ext = "pdf" if mime == "application/pdf" else "jpg"
-                headers = {"Cache-Control": "no-store"}
-                if request.args.get("download") == "1":
-                    headers["Content-Disposition"] = f"attachment; filename=photo_{index}.{ext}"
-                return Response(data_bytes, mimetype=mime, headers=headers)
+        if storage is None:
+            abort(404)
+        keys = [photo_keys[index]]
+        if size is not None:
+            keys.insert(0, variant_key(photo_keys[index], size))
+        for key in keys:
+            response = accel_response(storage, key, lambda mime: _photo_headers(index, mime))
+            if response is None:
+                response = _send_photo(
+                    lambda start, stop: storage.download_stream(key, start, stop), index
+                )
+            if response is not None:
+                return response
         abort(404)
 
-    # Photo is in memory (local / Redis path).
+    # Photo is held by the store (local / Redis path); spilled photos are
+    # read back from disk range by range.
     mem_index = index - total_keys
-    data_bytes = sub.photos[mem_index]
-    mime = detect_mimetype(data_bytes)
-    ext = "pdf" if mime == "application/pdf" else "jpg"
+    if size is not None:
+        thumb = submission_store.get_thumbnail(submission_id, mem_index, size, dashboard_id=session_id)
+        if thumb is not None:
+            return _send_photo(functools.partial(stream_bytes, thumb), index)
+    photo = submission_store.get_photo(submission_id, mem_index, dashboard_id=session_id)
+    if photo is None:
+        abort(404)
+    if isinstance(photo, SpilledPhoto):
+        response = _send_photo(photo.stream, index)
+    else:
+        response = _send_photo(functools.partial(stream_bytes, bytes(photo)), index)
+    if response is None:
+        abort(404)
+    return response
+
+
+def _requested_range():
+    """``(start, stop)`` of a single-range ``Range`` request, or None.
+
+    Multi-range requests get the whole photo, and so does any ``If-Range``:
+    photos are sent without validators, so it can never match.
+    """
+    byte_range = request.range
+    if (byte_range is None or byte_range.units != "bytes"
+            or len(byte_range.ranges) != 1 or "If-Range" in request.headers):
+        return None
+    return byte_range.ranges[0]
+
+
+def _photo_headers(index, mime):
     headers = {"Cache-Control": "no-store"}
     if request.args.get("download") == "1":
+        ext = "pdf" if mime == "application/pdf" else "jpg"
         headers["Content-Disposition"] = f"attachment; filename=photo_{index}.{ext}"
-    return Response(data_bytes, mimetype=mime, headers=headers)
+    return headers
+
+
+def _send_photo(open_range, index):
+    """Stream a photo, honouring ``Range``; None if it is missing.
+
+    *open_range(start, stop)* returns a PhotoStream, or None.
+    """
+    requested = _requested_range()
+    try:
+        stream = open_range(*(requested or (0, None)))
+    except OSError:
+        return None
+    if stream is None or stream.total == 0:
+        return None
+    if stream.start >= stream.total:
+        return Response(status=416, headers={"Content-Range": f"bytes */{stream.total}"})
+
+    # The MIME type is sniffed from the leading bytes, which a range that
+    # starts further in has to fetch separately.
+    chunks = iter(stream.chunks)
+    if stream.start == 0 and stream.stop >= SNIFF_BYTES:
+        first = next(chunks, b"")
+        chunks = itertools.chain((first,), chunks)
+    else:
+        try:
+            first = b"".join(open_range(0, SNIFF_BYTES).chunks)
+        except OSError:
+            first = b""
+    mime = detect_mimetype(first)
+
+    headers = _photo_headers(index, mime)
+    headers["Accept-Ranges"] = "bytes"
+    headers["Content-Length"] = str(stream.stop - stream.start)
+    status = 200
+    if requested is not None:
+        status = 206
+        headers["Content-Range"] = f"bytes {stream.start}-{stream.stop - 1}/{stream.total}"
+    return Response(chunks, status=status, mimetype=mime, headers=headers, direct_passthrough=True)
+
 
 
@@ -1,7 +1,9 @@
 """Audit logging helper — records every access to sensitive submission data."""
 import logging
+from datetime import datetime, timezone
 
 from flask import request
+from sqlalchemy import insert
 
 from app.extensions import db
 from app.models import AccessLog
@@ -24,3 +26,32 @@ def log_access(user, submission_id: str | None, action: str) -> None:
     except Exception as exc:
         logger.error("Falha ao registrar access log: %s", exc, exc_info=True)
         db.session.rollback()
+
+
+def log_access_many(user, submission_ids, action: str) -> None:
+    """Record one audit entry per submission in a single insert and commit.
+
+    Same guarantees as :func:`log_access`: failures are logged, never raised.
+    """
+    ids = list(submission_ids)
+    if not ids:
+        return
+    try:
+        ip_address = request.remote_addr
+        user_agent = (request.headers.get("User-Agent", "") or "")[:256]
+        now = datetime.now(timezone.utc)
+        db.session.execute(insert(AccessLog), [
+            {
+                "user_id": user.id,
+                "submission_id": sid,
+                "action": action,
+                "accessed_at": now,
+                "ip_address": ip_address,
+                "user_agent": user_agent,
+            }
+            for sid in ids
+        ])
+        db.session.commit()
+    except Exception as exc:
+        logger.error("Falha ao registrar access log: %s", exc, exc_info=True)
+        db.session.rollback()
@@ -19,3 +19,17 @@ def register_cli(app):
         db.session.add(u)
         db.session.commit()
         click.echo(f"User '{name}' <{email}> created (id={u.id}).")
+
+    @app.cli.command("migrate-redis-keys")
+    def migrate_redis_keys():
+        """Move Redis submission keys into the cluster-ready {dash:<id>} layout."""
+        from app.store import submission_store
+
+        if not hasattr(submission_store, "migrate_key_layout"):
+            click.echo("Redis submission store not in use — nothing to migrate.")
+            return
+        migrated = submission_store.migrate_key_layout()
+        click.echo(f"Migrated {migrated} dashboard(s).")
+
+    # Former name, from when the migration only converted list indexes.
+    app.cli.add_command(migrate_redis_keys, "migrate-redis-index")
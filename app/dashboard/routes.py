@@ -1,12 +1,9 @@
 # app/dashboard/routes.py
 
-import io
 import logging
 import re
 import secrets
 from datetime import datetime, timezone
-import qrcode
-import qrcode.image.svg
 from flask import render_template, redirect, url_for, flash, request, abort, Response, jsonify, current_app
 from flask_login import login_required, current_user
 from app.dashboard import dashboard_bp
@@ -18,6 +15,7 @@ from app.models import (
 from app.store import submission_store
 from app.schemas.crime_types import DEFAULT_FORM_SCHEMA
 from app.utils.access_control import can_access_session
+from app.utils.qr_cache import qr_cache
 from app.utils.plan_helpers import can_share_session, can_join_shared_session, can_create_custom_schema, can_use_infinite_sessions
 
 logger = logging.getLogger(__name__)
@@ -30,7 +28,7 @@ def _persist_pending_submissions(session: DashboardSession, *, status: str = "re
     guest_display_name e received_at.
     Não purge aqui — isso continua sendo responsabilidade do caller.
     """
-    pending = submission_store.list_for_dashboard(session.id)
+    pending = submission_store.list_summaries_for_dashboard(session.id)
     if not pending:
         return 0
 
@@ -72,16 +70,21 @@ def _persist_pending_submissions(session: DashboardSession, *, status: str = "re
 
 
 
-def _expire_stale_sessions_for_user(user_id: int) -> int:
+def _expire_stale_sessions_for_user(user_id: int, sessions=None) -> int:
     """
     Expira plantões ativos já vencidos para o usuário informado.
     Persiste pendências em log, apaga dados sensíveis em RAM e inativa links.
+    Se *sessions* (plantões do usuário já carregados) for informado, não
+    consulta o banco de novo.
     Retorna a quantidade de plantões expirados.
     """
-    active_sessions = DashboardSession.query.filter_by(
-        user_id=user_id,
-        is_active=True,
-    ).all()
+    if sessions is None:
+        active_sessions = DashboardSession.query.filter_by(
+            user_id=user_id,
+            is_active=True,
+        ).all()
+    else:
+        active_sessions = [s for s in sessions if s.is_active]
 
     expired_count = 0
 
@@ -127,17 +130,22 @@ def _expire_session_if_needed(session: DashboardSession) -> bool:
 @dashboard_bp.route("/")
 @login_required
 def index():
-    _expire_stale_sessions_for_user(current_user.id)
-
     sessions = DashboardSession.query.filter_by(
         user_id=current_user.id
     ).order_by(DashboardSession.created_at.desc()).all()
-
-    # total = pendentes (RAM) + logs (DB)
+    _expire_stale_sessions_for_user(current_user.id, sessions)
+
+    # total = pendentes (store) + logs (DB), com uma consulta agrupada e uma
+    # chamada ao store para todas as salas, em vez de duas por sala.
+    closed_counts = dict(
+        db.session.query(MinimalLogEntry.dashboard_id, db.func.count(MinimalLogEntry.id))
+        .filter(MinimalLogEntry.dashboard_id.in_([s.id for s in sessions]))
+        .group_by(MinimalLogEntry.dashboard_id)
+        .all()
+    ) if sessions else {}
+    pending_counts = submission_store.count_many([s.id for s in sessions if s.is_active])
     for s in sessions:
-        pending = submission_store.count_for_dashboard(s.id) if s.is_active else 0
-        closed = s.logs.count()
-        s.total_records = pending + closed  # atributo dinâmico pro template
+        s.total_records = pending_counts.get(s.id, 0) + closed_counts.get(s.id, 0)  # atributo dinâmico pro template
 
     recent_logs = MinimalLogEntry.query.filter_by(
         police_user_id=current_user.id
@@ -286,14 +294,24 @@ def session_detail(session_id):
     _expire_session_if_needed(session)
 
     link = session.links.filter_by(is_active=True).first()
-    qr_svg = None
     intake_url = None
     if session.is_active and link:
-        intake_url = url_for("intake.form", token=link.token, _external=True, _scheme=request.scheme)
-        qr_svg = _generate_qr_svg(intake_url)
-
-    submissions = submission_store.list_for_dashboard(session.id) if session.is_active else []
-    logs = session.logs.order_by(MinimalLogEntry.received_at.desc()).all()
+        # The QR code itself is served (and browser-cached) by qr_svg.
+        intake_url = _intake_url(link)
+
+    # Only the first page of each list is rendered here; the rest is fetched
+    # on demand through pending_fragment / logs_fragment.
+    submissions, pending_cursor, pending_count = [], None, 0
+    # Read before the list, so the client's first delta re-covers any change
+    # that lands while the page is rendered.
+    list_version = submission_store.version_for_dashboard(session.id)
+    if session.is_active:
+        submissions, pending_cursor = submission_store.iter_for_dashboard(
+            session.id, limit=_PAGE_SIZE
+        )
+        pending_count = submission_store.count_for_dashboard(session.id)
+    logs, logs_cursor = _logs_page(session)
+    logs_count = session.logs.count()
 
     # Build list of links for template compatibility
     links = session.links.all()
@@ -309,15 +327,73 @@ def session_detail(session_id):
         role=role,
         link=link,
         links=links,
-        qr_svg=qr_svg,
         intake_url=intake_url,
         submissions=submissions,
+        pending_cursor=pending_cursor,
+        pending_count=pending_count,
+        list_version=list_version,
         logs=logs,
+        logs_cursor=logs_cursor,
+        logs_count=logs_count,
         schema=schema,
         user_can_share=can_share_session(current_user),
         user_can_join=can_join_shared_session(current_user),
     )
 
+@dashboard_bp.route("/sessions/<int:session_id>/fragments/pending")
+@login_required
+def pending_fragment(session_id):
+    """Próxima página de cartões pendentes, já renderizada (cursor em ?cursor=)."""
+    session = DashboardSession.query.get_or_404(session_id)
+    can_access, role = can_access_session(current_user, session)
+    if not can_access:
+        abort(403)
+
+    _expire_session_if_needed(session)
+
+    submissions, next_cursor, pending_count = [], None, 0
+    if session.is_active:
+        try:
+            submissions, next_cursor = submission_store.iter_for_dashboard(
+                session.id, request.args.get("cursor") or None, _PAGE_SIZE
+            )
+        except ValueError:
+            abort(400)
+        pending_count = submission_store.count_for_dashboard(session.id)
+
+    schema = None
+    if session.intake_type == "custom" and session.custom_template:
+        schema = session.custom_template.schema
+
+    response = Response(render_template(
+        "dashboard/_pending_cards.html",
+        session=session,
+        role=role,
+        submissions=submissions,
+        schema=schema,
+    ))
+    response.headers["X-Next-Cursor"] = next_cursor or ""
+    response.headers["X-Pending-Count"] = str(pending_count)
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+
+@dashboard_bp.route("/sessions/<int:session_id>/fragments/logs")
+@login_required
+def logs_fragment(session_id):
+    """Próxima página do histórico finalizado, já renderizada (cursor em ?cursor=)."""
+    session = DashboardSession.query.get_or_404(session_id)
+    can_access, _ = can_access_session(current_user, session)
+    if not can_access:
+        abort(403)
+
+    logs, next_cursor = _logs_page(session, request.args.get("cursor") or None)
+
+    response = Response(render_template("dashboard/_log_rows.html", logs=logs))
+    response.headers["X-Next-Cursor"] = next_cursor or ""
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
 @dashboard_bp.route("/sessions/<int:session_id>/close", methods=["POST"])
 @login_required
 def close_session(session_id):
@@ -364,6 +440,9 @@ def new_link(session_id):
     db.session.add(link)
     db.session.commit()
 
+    # The room's QR code may now point elsewhere: drop the cached ones.
+    qr_cache.invalidate(_intake_url(l) for l in session.links if l.id != link.id)
+
     flash("Novo link criado.", "success")
     return redirect(url_for("dashboard.session_detail", session_id=session.id))
 
@@ -428,8 +507,8 @@ def print_qr(session_id):
     qr_svg = None
     intake_url = None
     if session.is_active and link:
-        intake_url = url_for("intake.form", token=link.token, _external=True, _scheme=request.scheme)
-        qr_svg = _generate_qr_svg(intake_url)
+        intake_url = _intake_url(link)
+        qr_svg = qr_cache.get(intake_url)
 
     return render_template(
         "dashboard/print_qr.html",
@@ -439,6 +518,36 @@ def print_qr(session_id):
     )
 
 
+@dashboard_bp.route("/sessions/<int:session_id>/qr.svg")
+@login_required
+def qr_svg(session_id):
+    """QR code of the room's active intake link, validated by ETag."""
+    session = DashboardSession.query.get_or_404(session_id)
+    can_access, role = can_access_session(current_user, session)
+    if not can_access:
+        abort(403)
+
+    _expire_session_if_needed(session)
+
+    link = session.links.filter_by(is_active=True).first()
+    if not session.is_active or not link:
+        abort(404)
+
+    intake_url = _intake_url(link)
+    etag = qr_cache.etag(intake_url)
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        svg = qr_cache.get(intake_url)
+        if not svg:
+            abort(404)
+        response = Response(svg, mimetype="image/svg+xml")
+    response.set_etag(etag)
+    # Revalidate on every view: the link can be replaced at any time.
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
 @dashboard_bp.route("/my-audit-log")
 @login_required
 def my_audit_log():
@@ -700,53 +809,109 @@ def export_session_csv(session_id):
     if not can_access:
         abort(403)
 
-    # Collect active submissions (in-memory) — only available when session is active
-    active_subs = submission_store.list_for_dashboard(session.id) if session.is_active else []
-
-    # Gather all answer keys across active submissions to build dynamic columns.
-    # Use a dict to maintain insertion order while allowing O(1) duplicate check.
-    seen_keys: dict = {}
-    for sub in active_subs:
-        for key in (sub.answers or {}):
-            if key not in seen_keys:
-                seen_keys[key] = None
-
-    # Header: base columns + dynamic answer columns
-    header = ['ID', 'Nome', 'Tipo', 'Status', 'Recebido em'] + list(seen_keys)
-    rows = [header]
-
-    # Active submissions — full data including answers
-    for sub in active_subs:
-        answers = sub.answers or {}
-        row = [
-            sub.submission_id,
-            sub.guest_name,
-            sub.crime_type,
-            'ativo',
-            sub.received_at.isoformat() if sub.received_at else '',
-        ]
-        for key in seen_keys:
-            val = answers.get(key, '')
-            if isinstance(val, list):
-                val = ';'.join(str(v) for v in val)
-            row.append(val)
-        rows.append(row)
-
-    # Log entries (closed/discarded/received) — only minimal data available
-    for log in session.logs.order_by(MinimalLogEntry.received_at.desc()).all():
-        row = [
-            log.id,
-            log.guest_display_name or '',
-            log.crime_type or '',
-            log.status or '',
-            log.received_at.isoformat() if log.received_at else '',
-        ]
-        row.extend(['' for _ in seen_keys])
-        rows.append(row)
+    # Dynamic columns come from the store's answer-key index, so the export
+    # never needs a pass over every submission before the first byte.
+    is_active = session.is_active
+    answer_keys = submission_store.answer_keys_for_dashboard(session.id) if is_active else []
+
+    def _rows():
+        # Header: base columns + dynamic answer columns
+        yield ['ID', 'Nome', 'Tipo', 'Status', 'Recebido em'] + answer_keys
+
+        # Active submissions — full data including answers, one page at a time
+        cursor = None
+        while is_active:
+            page, cursor = submission_store.iter_for_dashboard(session.id, cursor, _EXPORT_BATCH)
+            subs = submission_store.get_many(
+                [s.submission_id for s in page], with_photos=False, dashboard_id=session.id
+            )
+            for sub in subs:
+                answers = sub.answers or {}
+                row = [
+                    sub.submission_id,
+                    sub.guest_name,
+                    sub.crime_type,
+                    'ativo',
+                    sub.received_at.isoformat() if sub.received_at else '',
+                ]
+                for key in answer_keys:
+                    val = answers.get(key, '')
+                    if isinstance(val, list):
+                        val = ';'.join(str(v) for v in val)
+                    row.append(val)
+                yield row
+            if cursor is None:
+                break
+
+        # Log entries (closed/discarded/received) — only minimal data available.
+        # Plain column rows in keyset batches keep the ORM identity map empty.
+        padding = [''] * len(answer_keys)
+        logs = db.session.query(
+            MinimalLogEntry.id, MinimalLogEntry.guest_display_name,
+            MinimalLogEntry.crime_type, MinimalLogEntry.status, MinimalLogEntry.received_at,
+        ).filter(MinimalLogEntry.dashboard_id == session.id)
+        cursor = None
+        while True:
+            batch, cursor = _logs_page(session, cursor, _EXPORT_BATCH, query=logs)
+            for log in batch:
+                yield [
+                    log.id,
+                    log.guest_display_name or '',
+                    log.crime_type or '',
+                    log.status or '',
+                    log.received_at.isoformat() if log.received_at else '',
+                ] + padding
+            if cursor is None:
+                break
 
     safe_label = re.sub(r'[^\w\-]', '_', session.label)
     filename = f"sessao_{session.id}_{safe_label}.csv"
-    return generate_csv_response(rows, filename)
+    return generate_csv_response(_rows(), filename)
+
+
+@dashboard_bp.route("/sessions/<int:session_id>/export-bundle")
+@login_required
+def export_session_bundle(session_id):
+    """Pacote ZIP da triagem: relato, respostas e anexos de cada pendente, em streaming."""
+    from app.audit import log_access, log_access_many
+    from app.utils.session_bundle import stream_session_bundle
+
+    session = DashboardSession.query.get_or_404(session_id)
+
+    can_access, _role = can_access_session(current_user, session)
+    if not can_access:
+        abort(403)
+
+    _expire_session_if_needed(session)
+    if not session.is_active:
+        flash("Triagem encerrada: não há registros pendentes para exportar.", "info")
+        return redirect(url_for("dashboard.session_detail", session_id=session.id))
+
+    # The ids are fixed before streaming so the bundle holds exactly the
+    # audited submissions (any removed meanwhile are skipped).
+    ids = [s.submission_id for s in submission_store.list_summaries_for_dashboard(session.id)]
+    if ids:
+        log_access_many(current_user, ids, "export_bundle")
+    else:
+        log_access(current_user, None, "export_bundle")
+
+    # Same plan rule as api.get_photo: without photo access, texts only.
+    with_attachments = bool(current_user.get_current_plan_limits().get("can_view_photos"))
+    body = stream_session_bundle(
+        submission_store, session.id,
+        storage=getattr(current_app, "photo_storage", None),
+        with_attachments=with_attachments,
+        submission_ids=ids,
+    )
+
+    safe_label = re.sub(r'[^\w\-]', '_', session.label)
+    # Not wrapped in stream_with_context: the bundle needs only the store and
+    # photo_storage, so the database connection is released before streaming.
+    return Response(body, mimetype="application/zip", headers={
+        "Content-Disposition": f"attachment; filename=sessao_{session.id}_{safe_label}.zip",
+        "Cache-Control": "no-store",
+        "X-Accel-Buffering": "no",
+    })
 
 
 @dashboard_bp.route("/upload-image", methods=["POST"])
@@ -800,9 +965,13 @@ def serve_form_image(key):
     URL) so that the strict ``img-src 'self'`` CSP is satisfied in all deployments,
     including production environments that use S3 for storage.
     """
+    from app.utils.media import accel_response
     from app.utils.mime import detect_mimetype
 
     storage = getattr(current_app, "photo_storage", None)
+    response = accel_response(storage, key, lambda mime: {"Cache-Control": "public, max-age=3600"})
+    if response is not None:
+        return response
     if storage is not None:
         data = storage.download(key)
         if data:
@@ -815,19 +984,47 @@ def serve_form_image(key):
     abort(404)
 
 
-def _generate_qr_svg(url: str) -> str:
-    """Generate a clean inline SVG QR code string."""
-    try:
-        factory = qrcode.image.svg.SvgPathImage
-        qr = qrcode.QRCode(version=1, box_size=8, border=2)
-        qr.add_data(url)
-        qr.make(fit=True)
-        img = qr.make_image(image_factory=factory)
-        buf = io.BytesIO()
-        img.save(buf)
-        svg_str = buf.getvalue().decode("utf-8")
-        svg_str = re.sub(r'<\?xml[^?]*\?>\s*', '', svg_str)
-        svg_str = re.sub(r'<!DOCTYPE[^>]*>\s*', '', svg_str)
-        return svg_str.strip()
-    except Exception:
-        return ""
\ No newline at end of file
+def _intake_url(link: IntakeLink) -> str:
+    return url_for("intake.form", token=link.token, _external=True, _scheme=request.scheme)
+
+
+# Items per page on the session detail view and its fragments.
+_PAGE_SIZE = 50
+# Rows fetched per round trip by the streaming CSV export.
+_EXPORT_BATCH = 500
+
+
+def _logs_page(session: DashboardSession, cursor=None, limit: int = _PAGE_SIZE, query=None):
+    """
+    Uma página do histórico, do mais recente para o mais antigo (sem data por último).
+
+    Paginação por chave (keyset) sobre (received_at, id): o custo de cada página
+    não depende de quantas já foram lidas.  O cursor é "<iso>|<id>" ("|<id>"
+    quando a última linha não tem data); cursor inválido → 400.  *query* permite
+    paginar uma consulta de colunas já filtrada pela sessão (exportação).
+    """
+    received_at, log_id = MinimalLogEntry.received_at, MinimalLogEntry.id
+    query = (session.logs if query is None else query).order_by(received_at.is_(None), received_at.desc(), log_id.desc())
+    if cursor:
+        try:
+            stamp, _, last_id = cursor.partition("|")
+            last_id = int(last_id)
+            stamp = datetime.fromisoformat(stamp) if stamp else None
+        except ValueError:
+            abort(400)
+        if stamp is None:
+            query = query.filter(received_at.is_(None), log_id < last_id)
+        else:
+            query = query.filter(db.or_(
+                received_at < stamp,
+                db.and_(received_at == stamp, log_id < last_id),
+                received_at.is_(None),
+            ))
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        stamp = last.received_at.isoformat() if last.received_at else ""
+        next_cursor = f"{stamp}|{last.id}"
+    return rows, next_cursor
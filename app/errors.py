@@ -40,6 +40,12 @@ def register_error_handlers(app):
             return jsonify({"error": "Erro interno do servidor"}), 500
         return render_template("errors/500.html"), 500
 
+    @app.errorhandler(503)
+    def service_unavailable(error):
+        if request.path.startswith("/api/"):
+            return jsonify({"error": "Serviço temporariamente indisponível"}), 503
+        return render_template("errors/503.html"), 503
+
     @app.errorhandler(Exception)
     def handle_exception(exc):
         logger.error("Exceção não tratada: %s", exc, exc_info=True)
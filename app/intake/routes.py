@@ -8,11 +8,13 @@ import io
 import logging
 import uuid
 from datetime import datetime, timezone
-from flask import render_template, redirect, url_for, flash, request, current_app
+from flask import abort, render_template, redirect, url_for, flash, request, current_app
 from app.intake import intake_bp
 from app.extensions import limiter
 from app.models import IntakeLink, DashboardSession
-from app.store import submission_store, Submission
+from app.renderer.cache import render_in_background
+from app.renderer.thumbnails import thumbnails_in_background
+from app.store import StoreUnavailableError, submission_store, Submission, dashboard_expire_at
 from app.schemas.crime_types import CRIME_SCHEMAS
 
 logger = logging.getLogger(__name__)
@@ -39,6 +41,15 @@ def _strip_exif(image_bytes: bytes) -> bytes:
         return image_bytes
 
 
+def _add_submission(sub: Submission, session: DashboardSession) -> bool:
+    """add_if_unique, answering 503 when the store cannot take the write."""
+    try:
+        return submission_store.add_if_unique(sub, expire_at=dashboard_expire_at(session))
+    except StoreUnavailableError as exc:
+        logger.error("Submission store unavailable, intake rejected: %s", exc)
+        abort(503)
+
+
 @intake_bp.route("/t/<token>")
 @limiter.limit("20 per minute")
 def form(token):
@@ -172,6 +183,7 @@ def submit(token):
         # Handle file attachments for custom forms
         custom_photos = []
         custom_photo_keys = []
+        originals = {}
         allow_attachments = bool(schema.get('allow_attachments', False))
         files = request.files.getlist("photos")
         non_empty_files = _non_empty_files(files)
@@ -205,6 +217,7 @@ def submit(token):
                     try:
                         key = storage.save(cleaned, f.filename or "photo.jpg")
                         custom_photo_keys.append(key)
+                        originals[key] = cleaned
                     except Exception as exc:
                         logger.warning("S3 photo upload failed, keeping in memory: %s", exc)
                         custom_photos.append(cleaned)
@@ -228,15 +241,16 @@ def submit(token):
             received_at=datetime.now(timezone.utc),
         )
 
-        if submission_store.is_duplicate(sub):
+        if not _add_submission(sub, session):
             flash(
                 "Já existe um registro com esse nome nesta triagem. "
                 "Se necessário, informe o responsável.",
                 "warning",
             )
             return redirect(url_for("intake.form", token=token))
-
-        submission_store.add(sub)
+        render_in_background(sub)
+        if sub.photos or sub.photo_keys:
+            thumbnails_in_background(sub, originals, getattr(current_app, "photo_storage", None))
 
         if owner:
             from app.decorators import increment_submissions
@@ -370,6 +384,7 @@ def submit(token):
     # process photos and PDFs
     photos = []
     photo_keys = []
+    originals = {}
     files = request.files.getlist("photos")
     non_empty_files = _non_empty_files(files)
     if len(non_empty_files) > max_photos:
@@ -403,6 +418,7 @@ def submit(token):
             try:
                 key = storage.save(cleaned, f.filename or "photo.jpg")
                 photo_keys.append(key)
+                originals[key] = cleaned
             except Exception as exc:
                 logger.warning("S3 photo upload failed, keeping in memory: %s", exc)
                 photos.append(cleaned)
@@ -441,16 +457,19 @@ def submit(token):
         received_at=datetime.now(timezone.utc),
     )
 
-    # Duplicate check — same name or same RG within this dashboard
-    if submission_store.is_duplicate(sub):
+    # Duplicate check and insert in one step — same name or same RG within
+    # this dashboard is rejected even when two workers race.
+    if not _add_submission(sub, session):
         flash(
             "Já existe um registro com esse nome ou RG nesta triagem. "
             "Se necessário, informe o policial.",
             "warning",
         )
         return redirect(url_for("intake.form", token=token))
-
-    submission_store.add(sub)
+    # Have the officer's first view of it ready before they open it.
+    render_in_background(sub)
+    if sub.photos or sub.photo_keys:
+        thumbnails_in_background(sub, originals, getattr(current_app, "photo_storage", None))
 
     # Track usage for plan enforcement
     if owner:
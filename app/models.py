@@ -137,7 +137,7 @@ class IntakeLink(db.Model):
 class MinimalLogEntry(db.Model):
     __tablename__ = "minimal_log_entries"
     id = db.Column(db.Integer, primary_key=True)
-    dashboard_id = db.Column(db.Integer, db.ForeignKey("dashboard_sessions.id"), nullable=False)
+    dashboard_id = db.Column(db.Integer, db.ForeignKey("dashboard_sessions.id"), nullable=False, index=True)
     police_user_id = db.Column(db.Integer, db.ForeignKey("police_users.id"), nullable=False)
     guest_display_name = db.Column(db.String(200))
     crime_type = db.Column(db.String(100))
@@ -154,7 +154,7 @@ class AccessLog(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey("police_users.id"), nullable=False)
     # submission_id may be None for session-level actions
     submission_id = db.Column(db.String(64), nullable=True)
-    # action: view | close | discard | download_photo | copy_text
+    # action: view | prefetch | close | discard | download_photo | copy_text | export_bundle
     action = db.Column(db.String(50), nullable=False)
     accessed_at = db.Column(
         db.DateTime,
@@ -2,6 +2,8 @@
 
 If Redis is unavailable (REDIS_URL not configured or server unreachable),
 all callers receive ``None`` and should fall back to in-memory behaviour.
+Set ``REDIS_CLUSTER=true`` to connect to a Redis Cluster instead of a
+single node.
 """
 
 import logging
@@ -13,6 +15,10 @@ _redis_client = None
 _initialized = False
 
 
+def _cluster_enabled() -> bool:
+    return os.environ.get("REDIS_CLUSTER", "").lower() in ("1", "true", "yes")
+
+
 def get_redis_client():
     """Return a connected Redis client, or *None* if unavailable."""
     global _redis_client, _initialized
@@ -29,17 +35,28 @@ def get_redis_client():
     try:
         import redis
 
-        client = redis.from_url(
-            url,
+        options = dict(
             socket_connect_timeout=2,
             socket_timeout=2,
             retry_on_timeout=True,
             health_check_interval=30,
             decode_responses=False,
         )
+        if _cluster_enabled():
+            # REDIS_URL points at any node; the client discovers the rest and
+            # routes each command to the node owning its hash slot.
+            from redis.cluster import RedisCluster
+
+            client = RedisCluster.from_url(url, **options)
+        else:
+            client = redis.from_url(url, **options)
         client.ping()
         _redis_client = client
-        logger.info("Redis connected: %s", url.split("@")[-1])
+        logger.info(
+            "Redis %sconnected: %s",
+            "Cluster " if _cluster_enabled() else "",
+            url.split("@")[-1],
+        )
     except Exception as exc:  # pragma: no cover
         logger.warning("Redis unavailable (%s) — using in-memory fallback", exc)
         _redis_client = None
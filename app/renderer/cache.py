@@ -0,0 +1,111 @@
+"""Cached renderings of submissions.
+
+``TextRenderer`` output is a pure function of the submission's content and
+of the renderer code, so it is computed once and stored next to the
+submission (``set_rendered`` / ``get_rendered`` on the submission store),
+which evicts it together with the submission.  Each entry carries the
+content hash it was rendered from, prefixed with ``RENDERER_VERSION``; a
+mismatch just means rendering again.
+
+Intake calls :func:`render_in_background` right after storing a
+submission, so the first dashboard view normally finds it ready.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from app.renderer.text import TextRenderer
+from app.schemas.crime_types import CRIME_SCHEMAS
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever a renderer's output changes, so cached texts roll over.
+RENDERER_VERSION = "1"
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def content_key(submission) -> str:
+    """Hash of everything the renderers read, plus the renderer version."""
+    content = json.dumps([
+        submission.guest_name, submission.dob, submission.rg, submission.cpf,
+        submission.phone, submission.address, submission.crime_type,
+        submission.narrative, submission.answers, submission.received_at.isoformat(),
+    ], sort_keys=True, default=str, ensure_ascii=False)
+    digest = hashlib.sha256(content.encode("utf-8")).hexdigest()[:32]
+    return f"{RENDERER_VERSION}:{digest}"
+
+
+def render_submission(submission) -> dict:
+    """Render the text and structured views of *submission*, uncached."""
+    questions = CRIME_SCHEMAS.get(submission.crime_type, {}).get("questions", [])
+    return {
+        "key": content_key(submission),
+        "text": TextRenderer.render(submission),
+        "structured": [list(item) for item in TextRenderer.render_structured(submission, questions)],
+    }
+
+
+def _store(store):
+    if store is not None:
+        return store
+    from app.store import submission_store
+    return submission_store
+
+
+def rendered_for(submission, store=None) -> dict:
+    """Return ``{"key", "text", "structured"}``, from the cache when current."""
+    store = _store(store)
+    key = content_key(submission)
+    cached = store.get_rendered(submission.submission_id, submission.dashboard_id)
+    if cached is not None and cached.get("key") == key:
+        return cached
+    rendered = render_submission(submission)
+    try:
+        store.set_rendered(submission.submission_id, submission.dashboard_id, rendered)
+    except Exception as exc:
+        logger.warning("Render cache write failed for %s: %s", submission.submission_id, exc)
+    return rendered
+
+
+def rendered_for_many(submissions, store=None) -> list:
+    """:func:`rendered_for` over submissions of one dashboard, with one cache read."""
+    store = _store(store)
+    submissions = list(submissions)
+    if not submissions:
+        return []
+    cached = store.get_rendered_many(
+        [sub.submission_id for sub in submissions], submissions[0].dashboard_id
+    )
+    result = []
+    for sub in submissions:
+        rendered = cached.get(sub.submission_id)
+        if rendered is None or rendered.get("key") != content_key(sub):
+            rendered = render_submission(sub)
+            try:
+                store.set_rendered(sub.submission_id, sub.dashboard_id, rendered)
+            except Exception as exc:
+                logger.warning("Render cache write failed for %s: %s", sub.submission_id, exc)
+        result.append(rendered)
+    return result
+
+
+def _warm(submission, store) -> None:
+    try:
+        rendered_for(submission, store)
+    except Exception as exc:
+        logger.warning("Background render failed for %s: %s", submission.submission_id, exc)
+
+
+def render_in_background(submission, store=None) -> None:
+    """Render and cache *submission* off the request thread."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="render")
+    _executor.submit(_warm, submission, _store(store))
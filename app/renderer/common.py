@@ -299,7 +299,11 @@ def render_generic_text(submission, crime_label: str) -> str:
     if submission.narrative:
         lines.append(f"Relato livre apresentado pela parte: {submission.narrative}")
 
-    photo_count = len(submission.photos or [])
+    # Read without its photos (get_many(..., with_photos=False)), a
+    # submission still knows how many the store holds.
+    photo_count = getattr(submission, "stored_photo_count", None)
+    if photo_count is None:
+        photo_count = len(submission.photos or [])
     if photo_count:
         lines.append(f"Foram apresentados {photo_count} arquivo(s) de imagem.")
 
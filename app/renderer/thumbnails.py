@@ -0,0 +1,107 @@
+"""Downscaled copies of submission photos.
+
+Officers browsing a room mostly need small previews, so every image
+attachment is also encoded as a JPEG in each of ``THUMBNAIL_SIZES``
+(longest side, in pixels) right after intake, off the request thread.
+Copies of photos in ``photo_storage`` are saved next to the original
+(:func:`app.storage.photo_storage.variant_key`) and deleted with it;
+copies of photos held by the submission store go into the store
+(``set_thumbnail``), which evicts them with the submission.
+
+``api.get_photo`` serves them for ``?size=<name>`` and falls back to the
+original while a copy does not exist.  PDFs never get one, and neither do
+images already smaller than their copy would be.
+"""
+
+import io
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+from app.utils.mime import detect_mimetype
+
+logger = logging.getLogger(__name__)
+
+# Longest side per size name; the names are PHOTO_VARIANTS.
+THUMBNAIL_SIZES = {"thumb": 240, "preview": 1280}
+_QUALITY = 70
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def make_thumbnail(data: bytes, max_side: int) -> Optional[bytes]:
+    """JPEG of *data* fitting in *max_side* pixels, or None when not worth keeping."""
+    if detect_mimetype(data) == "application/pdf":
+        return None
+    try:
+        from PIL import Image
+        with Image.open(io.BytesIO(data)) as img:
+            # JPEGs are decoded straight at a reduced scale.
+            img.draft("RGB", (max_side, max_side))
+            rgb = img.convert("RGB")
+        rgb.thumbnail((max_side, max_side))
+        output = io.BytesIO()
+        rgb.save(output, format="JPEG", quality=_QUALITY, optimize=True)
+    except Exception as exc:
+        logger.debug("Thumbnail failed: %s", exc)
+        return None
+    thumb = output.getvalue()
+    return thumb if len(thumb) < len(data) else None
+
+
+def _thumbnails(data: bytes) -> Dict[str, bytes]:
+    result = {}
+    for size, max_side in THUMBNAIL_SIZES.items():
+        thumb = make_thumbnail(data, max_side)
+        if thumb is not None:
+            result[size] = thumb
+    return result
+
+
+def _store(store):
+    if store is not None:
+        return store
+    from app.store import submission_store
+    return submission_store
+
+
+def generate_thumbnails(submission, originals=None, storage=None, store=None) -> int:
+    """Create and save every thumbnail of *submission*; return how many were saved.
+
+    *originals* maps ``photo_keys`` to their bytes when the caller still
+    has them; other keys are downloaded from *storage*.
+    """
+    store = _store(store)
+    originals = originals or {}
+    saved = 0
+    if storage is not None:
+        for key in getattr(submission, "photo_keys", []):
+            data = originals.get(key)
+            if data is None:
+                data = storage.download(key)
+            for size, thumb in _thumbnails(data or b"").items():
+                if storage.save_variant(key, size, thumb):
+                    saved += 1
+    for index, photo in enumerate(submission.photos):
+        for size, thumb in _thumbnails(bytes(photo)).items():
+            if store.set_thumbnail(submission.submission_id, submission.dashboard_id, index, size, thumb):
+                saved += 1
+    return saved
+
+
+def _generate(submission, originals, storage, store) -> None:
+    try:
+        generate_thumbnails(submission, originals, storage, store)
+    except Exception as exc:
+        logger.warning("Thumbnails failed for %s: %s", submission.submission_id, exc)
+
+
+def thumbnails_in_background(submission, originals=None, storage=None, store=None) -> None:
+    """Run :func:`generate_thumbnails` off the request thread."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="thumbnails")
+    _executor.submit(_generate, submission, originals, storage, _store(store))
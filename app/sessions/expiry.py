@@ -56,7 +56,7 @@ def _expire_sessions(app):
 
             if now >= expires:
                 # Persistir pendentes antes de limpar RAM
-                pending = submission_store.list_for_dashboard(session.id)
+                pending = submission_store.list_summaries_for_dashboard(session.id)
                 if pending:
                     now2 = datetime.now(timezone.utc)
                     for sub in pending:
@@ -0,0 +1,166 @@
+"""Per-dashboard change feed behind the live dashboard stream.
+
+Submission stores publish an event whenever a dashboard's pending list
+changes, and the Server-Sent Events endpoint relays them to the browser:
+
+* ``{"type": "added", "submission": {...}}`` — compact summary, no PII
+  beyond what the pending list already shows;
+* ``{"type": "removed", "id": "<sid>"}`` — closed, discarded or deleted;
+* ``{"type": "purged"}`` — the room was emptied (expiry or deletion);
+* ``{"type": "resync"}`` — the subscriber fell behind and must reload.
+
+``subscribe(dashboard_id)`` returns a subscription whose ``get(timeout)``
+blocks until events arrive (returning ``[]`` on timeout); always
+``close()`` it.  Publishing never raises: a broken feed must not block
+intake.
+"""
+
+import json
+import logging
+import threading
+from collections import deque
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def added_event(submission) -> dict:
+    return {
+        "type": "added",
+        "submission": {
+            "id": submission.submission_id,
+            "guest_name": submission.guest_name,
+            "crime_type": submission.crime_type,
+            "received_at": submission.received_at.isoformat(),
+        },
+    }
+
+
+def removed_event(submission_id: str) -> dict:
+    return {"type": "removed", "id": submission_id}
+
+
+PURGED_EVENT = {"type": "purged"}
+RESYNC_EVENT = {"type": "resync"}
+
+
+class _Channel:
+    __slots__ = ("cond", "events", "seq", "subscribers")
+
+    def __init__(self, backlog: int):
+        self.cond = threading.Condition()
+        self.events: deque = deque(maxlen=backlog)  # (seq, event)
+        self.seq = 0
+        self.subscribers = 0
+
+
+class _LocalSubscription:
+    def __init__(self, feed: "LocalChangeFeed", dashboard_id: int, channel: _Channel):
+        self._feed = feed
+        self._dashboard_id = dashboard_id
+        self._channel = channel
+        self._seen = channel.seq
+
+    def get(self, timeout: Optional[float] = None) -> List[dict]:
+        channel = self._channel
+        with channel.cond:
+            channel.cond.wait_for(lambda: channel.seq > self._seen, timeout)
+            if channel.seq == self._seen:
+                return []
+            oldest = channel.events[0][0]
+            if oldest > self._seen + 1:
+                # Events were dropped from the backlog before we read them.
+                events = [RESYNC_EVENT]
+            else:
+                events = [event for seq, event in channel.events if seq > self._seen]
+            self._seen = channel.seq
+            return events
+
+    def close(self) -> None:
+        self._feed._unsubscribe(self._dashboard_id, self._channel)
+
+
+class LocalChangeFeed:
+    """In-process feed: one condition and a bounded backlog per dashboard.
+
+    Only dashboards with an open subscription keep a channel, so rooms that
+    nobody is watching cost nothing.  Events reach subscribers in this
+    process only.
+    """
+
+    def __init__(self, backlog: int = 256):
+        self._backlog = backlog
+        self._channels: Dict[int, _Channel] = {}
+        self._lock = threading.Lock()
+
+    def publish(self, dashboard_id: int, event: dict) -> None:
+        channel = self._channels.get(dashboard_id)
+        if channel is None:
+            return
+        with channel.cond:
+            channel.seq += 1
+            channel.events.append((channel.seq, event))
+            channel.cond.notify_all()
+
+    def subscribe(self, dashboard_id: int) -> _LocalSubscription:
+        with self._lock:
+            channel = self._channels.get(dashboard_id)
+            if channel is None:
+                channel = self._channels[dashboard_id] = _Channel(self._backlog)
+            channel.subscribers += 1
+        return _LocalSubscription(self, dashboard_id, channel)
+
+    def _unsubscribe(self, dashboard_id: int, channel: _Channel) -> None:
+        with self._lock:
+            channel.subscribers -= 1
+            if channel.subscribers <= 0 and self._channels.get(dashboard_id) is channel:
+                del self._channels[dashboard_id]
+
+
+class _RedisSubscription:
+    def __init__(self, pubsub):
+        self._pubsub = pubsub
+
+    def get(self, timeout: Optional[float] = None) -> List[dict]:
+        events = []
+        message = self._pubsub.get_message(timeout=timeout or 0)
+        while message is not None:
+            if message.get("type") == "message":
+                try:
+                    events.append(json.loads(message["data"]))
+                except (TypeError, ValueError):
+                    pass
+            message = self._pubsub.get_message(timeout=0)
+        return events
+
+    def close(self) -> None:
+        try:
+            self._pubsub.close()
+        except Exception:
+            pass
+
+
+class RedisChangeFeed:
+    """Redis Pub/Sub feed shared by every worker and host.
+
+    Each dashboard has one channel, ``triagem:{dash:<id>}:events``, so the
+    name hashes to the same cluster slot as the room's keys.
+    """
+
+    def __init__(self, redis_client, key_prefix: str = "triagem:"):
+        self._r = redis_client
+        self._prefix = key_prefix
+
+    def _channel(self, dashboard_id: int) -> str:
+        return f"{self._prefix}{{dash:{dashboard_id}}}:events"
+
+    def publish(self, dashboard_id: int, event: dict) -> None:
+        try:
+            self._r.publish(self._channel(dashboard_id), json.dumps(event))
+        except Exception as exc:
+            logger.warning("Change feed publish failed: %s", exc)
+
+    def subscribe(self, dashboard_id: int) -> _RedisSubscription:
+        pubsub = self._r.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self._channel(dashboard_id))
+        return _RedisSubscription(pubsub)
@@ -3,9 +3,10 @@
 import logging
 import os
 import uuid
-from typing import Optional
+from typing import Dict, Optional, Tuple
+from urllib.parse import quote
 
-from app.storage.photo_storage import PhotoStorage
+from app.storage.photo_storage import PHOTO_VARIANTS, PhotoStorage, PhotoStream, stream_file, variant_key
 
 logger = logging.getLogger(__name__)
 
@@ -39,11 +40,37 @@ class LocalPhotoStorage(PhotoStorage):
             logger.warning("Error reading photo %s: %s", key, exc)
             return None
 
-    def delete(self, key: str) -> None:
-        path = os.path.join(self._folder, key)
+    def download_stream(self, key: str, start: int = 0, stop: Optional[int] = None) -> Optional[PhotoStream]:
         try:
-            os.remove(path)
+            return stream_file(os.path.join(self._folder, key), start, stop)
         except FileNotFoundError:
-            logger.debug("Photo not found for deletion: %s", key)
+            return None
         except OSError as exc:
-            logger.warning("Error deleting photo %s: %s", key, exc)
+            logger.warning("Error reading photo %s: %s", key, exc)
+            return None
+
+    def accel_redirect(self, key: str, prefix: str, mimetype: str) -> Optional[Tuple[str, Dict[str, str]]]:
+        # Plain file names only: anything else could step outside the
+        # folder the nginx location aliases.
+        if not key or os.path.basename(key) != key:
+            return None
+        if not os.path.isfile(os.path.join(self._folder, key)):
+            return None
+        return f"{prefix}local/{quote(key)}", {}
+
+    def save_variant(self, key: str, variant: str, photo_bytes: bytes) -> Optional[str]:
+        target = variant_key(key, variant)
+        with open(os.path.join(self._folder, target), "wb") as fh:
+            fh.write(photo_bytes)
+        return target
+
+    def delete(self, key: str) -> None:
+        for target in [key] + [variant_key(key, variant) for variant in PHOTO_VARIANTS]:
+            path = os.path.join(self._folder, target)
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                if target == key:
+                    logger.debug("Photo not found for deletion: %s", key)
+            except OSError as exc:
+                logger.warning("Error deleting photo %s: %s", target, exc)
@@ -0,0 +1,145 @@
+"""Disk spill for photo bytes held by the in-memory submission store.
+
+When the store's memory budget is configured, large photos (and any photo
+that would push the process over budget) are written to a temp file and
+replaced in ``Submission.photos`` by a :class:`SpilledPhoto`.  Consumers
+call ``bytes(photo)``, which is a no-op for in-memory photos and reads the
+file back through ``mmap`` for spilled ones.
+
+Spill files live in a directory owned by the current process
+(``triagem-photos-<pid>`` under the spill directory), removed when the
+process exits.  A recycled or crashed worker cannot clean up after
+itself, so the first spill of a process also sweeps the directories of
+processes that are gone; journal replay spills its photos anew.
+"""
+
+import atexit
+import logging
+import mmap
+import os
+import shutil
+import tempfile
+import threading
+from typing import Dict, Optional, Tuple
+
+from app.storage.photo_storage import PhotoStream, stream_file
+
+logger = logging.getLogger(__name__)
+
+_PREFIX = "triagem-photo-"
+_DIR_PREFIX = "triagem-photos-"
+
+# (base directory, pid) -> this process's spill directory
+_process_dirs: Dict[Tuple[str, int], str] = {}
+_dirs_lock = threading.Lock()
+
+
+class SpilledPhoto:
+    """Photo payload stored in a temp file instead of RAM."""
+
+    __slots__ = ("path", "size")
+
+    def __init__(self, path: str, size: int):
+        self.path = path
+        self.size = size
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __bytes__(self) -> bytes:
+        if self.size == 0:
+            return b""
+        with open(self.path, "rb") as fh:
+            with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return mm[:]
+
+    def stream(self, start: int = 0, stop: Optional[int] = None) -> PhotoStream:
+        """Read bytes ``start:stop`` back from disk as a :class:`PhotoStream`."""
+        return stream_file(self.path, start, stop)
+
+    def discard(self) -> None:
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+        except OSError as exc:
+            logger.warning("Could not remove spilled photo %s: %s", self.path, exc)
+
+    def __repr__(self) -> str:
+        return f"SpilledPhoto({self.path!r}, {self.size})"
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+
+def sweep_stale_spills(directory: Optional[str] = None) -> int:
+    """Remove spill files left in *directory* by processes that are gone.
+
+    Returns how many directories (and loose files from older releases)
+    were removed.
+    """
+    base = directory or tempfile.gettempdir()
+    removed = 0
+    try:
+        names = os.listdir(base)
+    except OSError:
+        return 0
+    for name in names:
+        path = os.path.join(base, name)
+        if name.startswith(_DIR_PREFIX):
+            pid = name[len(_DIR_PREFIX):]
+            if not pid.isdigit() or int(pid) == os.getpid() or _pid_alive(int(pid)):
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+        elif name.startswith(_PREFIX):
+            try:
+                os.unlink(path)
+                removed += 1
+            except OSError as exc:
+                logger.warning("Could not remove stale spilled photo %s: %s", path, exc)
+    if removed:
+        logger.info("Removed %s stale photo spill(s) from %s", removed, base)
+    return removed
+
+
+def process_spill_dir(directory: Optional[str] = None) -> str:
+    """This process's spill directory under *directory*, created on first use."""
+    base = directory or tempfile.gettempdir()
+    key = (base, os.getpid())
+    with _dirs_lock:
+        path = _process_dirs.get(key)
+        if path is None:
+            sweep_stale_spills(base)
+            path = os.path.join(base, f"{_DIR_PREFIX}{os.getpid()}")
+            os.makedirs(path, mode=0o700, exist_ok=True)
+            _process_dirs[key] = path
+            atexit.register(_remove_process_dir, path, os.getpid())
+        return path
+
+
+def _remove_process_dir(path: str, pid: int) -> None:
+    # atexit handlers survive fork(); only the owner removes its directory.
+    if os.getpid() == pid:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def spill_photo(data: bytes, directory: Optional[str] = None) -> SpilledPhoto:
+    """Write *data* to a new file in this process's spill directory and return its handle."""
+    fd, path = tempfile.mkstemp(prefix=_PREFIX, dir=process_spill_dir(directory))
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+    except Exception:
+        os.unlink(path)
+        raise
+    return SpilledPhoto(path, len(data))
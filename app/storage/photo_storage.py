@@ -1,7 +1,82 @@
 """Abstract photo storage interface."""
 
 import abc
-from typing import Optional
+import os
+from typing import Dict, Iterator, NamedTuple, Optional, Tuple
+
+# Photos are handed to the response in slices of this size.
+CHUNK_SIZE = 64 * 1024
+# Downscaled copies saved next to a photo (see app.renderer.thumbnails);
+# deleting a photo deletes them too.
+PHOTO_VARIANTS = ("thumb", "preview")
+
+
+def variant_key(key: str, variant: str) -> str:
+    """Storage key of the *variant* copy of the photo stored under *key*."""
+    return f"{key}.{variant}.jpg"
+
+
+class PhotoStream(NamedTuple):
+    """A byte range of a stored photo whose bytes are read lazily.
+
+    ``start`` and ``stop`` are absolute offsets (``stop`` exclusive) and
+    ``total`` is the size of the whole object; ``start == stop == total``
+    means the requested range lies past the end of the photo.
+    """
+
+    chunks: Iterator[bytes]
+    start: int
+    stop: int
+    total: int
+
+
+def resolve_range(total: int, start: int = 0, stop: Optional[int] = None) -> Tuple[int, int]:
+    """Clamp a requested range to an object of *total* bytes.
+
+    A negative *start* is a suffix range (the last ``-start`` bytes), as in
+    HTTP ``Range: bytes=-N``.  Unsatisfiable ranges come back as
+    ``(total, total)``.
+    """
+    if start < 0:
+        start = max(total + start, 0)
+    stop = total if stop is None else min(stop, total)
+    if start >= stop:
+        return total, total
+    return start, stop
+
+
+def stream_bytes(data: bytes, start: int = 0, stop: Optional[int] = None) -> PhotoStream:
+    """:class:`PhotoStream` over photo bytes already held in memory."""
+    view = memoryview(data)
+    start, stop = resolve_range(len(view), start, stop)
+    chunks = (bytes(view[pos:min(pos + CHUNK_SIZE, stop)]) for pos in range(start, stop, CHUNK_SIZE))
+    return PhotoStream(chunks, start, stop, len(view))
+
+
+def stream_file(path: str, start: int = 0, stop: Optional[int] = None) -> PhotoStream:
+    """:class:`PhotoStream` over a file on disk; raises ``OSError`` if unreadable."""
+    fh = open(path, "rb")
+    try:
+        total = os.fstat(fh.fileno()).st_size
+        start, stop = resolve_range(total, start, stop)
+        fh.seek(start)
+    except Exception:
+        fh.close()
+        raise
+    if start == stop:
+        fh.close()
+        return PhotoStream(iter(()), start, stop, total)
+    return PhotoStream(_read_file(fh, stop - start), start, stop, total)
+
+
+def _read_file(fh, remaining: int) -> Iterator[bytes]:
+    with fh:
+        while remaining > 0:
+            chunk = fh.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
 
 
 class PhotoStorage(abc.ABC):
@@ -19,6 +94,30 @@ class PhotoStorage(abc.ABC):
     def download(self, key: str) -> Optional[bytes]:
         """Return the raw bytes for the photo identified by *key*, or None if not found."""
 
+    def download_stream(self, key: str, start: int = 0, stop: Optional[int] = None) -> Optional[PhotoStream]:
+        """Return bytes ``start:stop`` of the photo as a :class:`PhotoStream`, or None if not found.
+
+        Backends override this to read only the requested range, chunk by
+        chunk; the default slices the result of :meth:`download`.
+        """
+        data = self.download(key)
+        if data is None:
+            return None
+        return stream_bytes(data, start, stop)
+
+    def save_variant(self, key: str, variant: str, photo_bytes: bytes) -> Optional[str]:
+        """Store a downscaled copy of the photo at *key*; return its key, or None if unsupported."""
+        return None
+
+    def accel_redirect(self, key: str, prefix: str, mimetype: str) -> Optional[Tuple[str, Dict[str, str]]]:
+        """Return the internal nginx location under *prefix* that serves the photo.
+
+        The result is ``(path, extra_response_headers)``, or None when this
+        backend cannot hand the transfer to nginx and the app has to send
+        the bytes itself.  *mimetype* is the type the response must carry.
+        """
+        return None
+
     @abc.abstractmethod
     def delete(self, key: str) -> None:
-        """Delete the photo identified by *key*."""
+        """Delete the photo identified by *key*, with its variants."""
@@ -0,0 +1,112 @@
+"""Versioned codec for submission entries stored in Redis.
+
+Every entry starts with one header byte that identifies its format:
+
+    0x01  compact JSON (null values dropped, no whitespace)
+    0x02  compact JSON compressed with zlib
+    0x03  compact JSON compressed with zstd (requires ``zstandard``)
+
+Entries written before the codec existed are plain JSON and start with
+``{``; they are still decoded, and their photos are known to be
+base64-encoded.  Photos of codec entries are stored as raw bytes.
+"""
+
+import base64
+import json
+import logging
+import zlib
+
+logger = logging.getLogger(__name__)
+
+FORMAT_JSON = 0x01
+FORMAT_ZLIB = 0x02
+FORMAT_ZSTD = 0x03
+
+COMPRESSIONS = ("none", "zlib", "zstd")
+
+# Payloads below this size are never compressed — the header + deflate
+# framing would cost more than it saves on short submissions.
+COMPRESS_THRESHOLD = 1024
+
+PHOTO_RAW = "raw"
+PHOTO_BASE64 = "base64"
+
+_LEGACY_PREFIX = b"{"
+
+_zstd_fallback_logged = False
+
+
+def _zstd():
+    try:
+        import zstandard
+        return zstandard
+    except ImportError:
+        return None
+
+
+def _drop_nulls(value):
+    """Return *value* with None-valued dict entries removed, recursively."""
+    if isinstance(value, dict):
+        return {k: _drop_nulls(v) for k, v in value.items() if v is not None}
+    if isinstance(value, list):
+        return [_drop_nulls(v) for v in value]
+    return value
+
+
+def encode_entry(data: dict, compression: str = "zlib",
+                 threshold: int = COMPRESS_THRESHOLD) -> bytes:
+    """Serialise *data* into a header-prefixed compact payload."""
+    global _zstd_fallback_logged
+    payload = json.dumps(
+        _drop_nulls(data), separators=(",", ":"), ensure_ascii=False
+    ).encode()
+
+    if len(payload) >= threshold:
+        if compression == "zstd":
+            zstandard = _zstd()
+            if zstandard is not None:
+                return bytes([FORMAT_ZSTD]) + zstandard.ZstdCompressor().compress(payload)
+            if not _zstd_fallback_logged:
+                logger.warning("zstandard not installed — falling back to zlib compression")
+                _zstd_fallback_logged = True
+            compression = "zlib"
+        if compression == "zlib":
+            return bytes([FORMAT_ZLIB]) + zlib.compress(payload)
+
+    return bytes([FORMAT_JSON]) + payload
+
+
+def decode_entry(raw: bytes) -> dict:
+    """Decode an entry written by :func:`encode_entry` or the legacy JSON format.
+
+    The returned dict carries a ``photo_encoding`` key telling how the
+    entry's in-Redis photos are stored.
+    """
+    if raw[:1] == _LEGACY_PREFIX:
+        data = json.loads(raw.decode())
+        data["photo_encoding"] = PHOTO_BASE64
+        return data
+
+    header, body = raw[0], raw[1:]
+    if header == FORMAT_JSON:
+        payload = body
+    elif header == FORMAT_ZLIB:
+        payload = zlib.decompress(body)
+    elif header == FORMAT_ZSTD:
+        zstandard = _zstd()
+        if zstandard is None:
+            raise ValueError("entry is zstd-compressed but zstandard is not installed")
+        payload = zstandard.ZstdDecompressor().decompress(body)
+    else:
+        raise ValueError(f"unknown submission codec header 0x{header:02x}")
+
+    data = json.loads(payload.decode())
+    data["photo_encoding"] = PHOTO_RAW
+    return data
+
+
+def decode_photo(raw: bytes, photo_encoding: str = PHOTO_RAW) -> bytes:
+    """Return the photo bytes for a stored photo value."""
+    if photo_encoding == PHOTO_BASE64:
+        return base64.b64decode(raw)
+    return raw
@@ -1,23 +1,200 @@
 """Redis-backed submission store.
 
-Submissions are serialised as JSON and stored with a 12-hour TTL.
-Photos are stored as separate keys (binary, base64-encoded) to keep
-the main submission entry small.
+Submissions are serialised with :mod:`app.storage.redis_codec`.  Photos
+are stored as separate raw binary keys to keep the main submission entry
+small.
+
+Every key of a dashboard lives under the ``{dash:<id>}`` hash tag
+(``triagem:{dash:<id>}:sub:<sid>``, ``...:zidx``, ``...:dedup``,
+``...:photo:<sid>:<n>``, ``...:thumb:<sid>:<n>:<size>``, ``...:rendered:<sid>``,
+``...:photos``, ``...:ext``, ``...:akeys``, ``...:ver``, ``...:changes``), so a room occupies
+one Redis Cluster slot and its pipelines and Lua scripts run on a single
+node.  ``triagem:loc:<sid>`` maps a submission id to its dashboard for
+lookups that do not know it.  Keys expire with their room: callers pass the session's expiry
+(see :func:`app.store.dashboard_expire_at`) and every key of the dashboard
+gets an EXPIREAT shortly after it, or no TTL for infinite rooms.  Without
+an expiry the former 12-hour TTL applies.
+
+Changes are published on ``triagem:{dash:<id>}:events`` (Pub/Sub) for the
+live dashboard stream; see :mod:`app.storage.change_feed`.
 """
 
-import base64
 import hashlib
-import json
 import logging
 import re
+import time
 import unicodedata
 from datetime import datetime, timezone
-from typing import Dict, List, Optional, Set
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.storage.change_feed import PURGED_EVENT, RedisChangeFeed, added_event, removed_event
+from app.storage.photo_storage import PHOTO_VARIANTS
+from app.storage.redis_codec import decode_entry, decode_photo, encode_entry
 
 logger = logging.getLogger(__name__)
 
 _TTL = 12 * 60 * 60  # 12 hours in seconds
 _KEY_PREFIX = "triagem:"
+# Keys outlive their room's expiry by this much so the expiry sweep (every
+# 5 minutes) can still log pending submissions before they disappear.
+_EXPIRY_GRACE = 15 * 60
+
+# Shared by the scripts below: ARGV[1] is an absolute expiry (epoch
+# seconds), or 0 for keys that must never expire.
+_EXPIRE_LUA = """
+local expire_at = tonumber(ARGV[1])
+local function expire(key)
+    if expire_at > 0 then
+        redis.call('EXPIREAT', key, expire_at)
+    else
+        redis.call('PERSIST', key)
+    end
+end
+"""
+
+# KEYS: submission, index, dedup set, photo-key set, external-key set, photo keys...
+# ARGV: expire_at, submission id, payload, index score, dedup count, external count,
+#       dedup members..., external keys..., photos...
+_ADD_IF_UNIQUE_LUA = _EXPIRE_LUA + """
+local n_dedup = tonumber(ARGV[5])
+local n_ext = tonumber(ARGV[6])
+for i = 1, n_dedup do
+    if redis.call('SISMEMBER', KEYS[3], ARGV[6 + i]) == 1 then
+        return 0
+    end
+end
+redis.call('SET', KEYS[1], ARGV[3])
+expire(KEYS[1])
+redis.call('ZADD', KEYS[2], ARGV[4], ARGV[2])
+expire(KEYS[2])
+for i = 6, #KEYS do
+    redis.call('SET', KEYS[i], ARGV[6 + n_dedup + n_ext + i - 5])
+    expire(KEYS[i])
+    redis.call('SADD', KEYS[4], KEYS[i])
+end
+for i = 1, n_ext do
+    redis.call('SADD', KEYS[5], ARGV[6 + n_dedup + i])
+end
+for i = 1, n_dedup do
+    redis.call('SADD', KEYS[3], ARGV[6 + i])
+end
+expire(KEYS[3])
+expire(KEYS[4])
+expire(KEYS[5])
+return 1
+"""
+
+# KEYS: submission, rendered
+# ARGV: rendered payload
+# Stores a submission's cached rendering with the submission's own TTL;
+# nothing is written once the submission is gone.
+_SET_RENDERED_LUA = """
+local ttl = redis.call('PTTL', KEYS[1])
+if ttl == -2 then
+    return 0
+end
+redis.call('SET', KEYS[2], ARGV[1])
+if ttl > 0 then
+    redis.call('PEXPIRE', KEYS[2], ttl)
+end
+return 1
+"""
+
+# KEYS: submission, thumbnail, photo-key set
+# ARGV: thumbnail bytes
+# Stores a downscaled photo with the submission's own TTL and files it with
+# the dashboard's photo keys, so purges and expiry updates cover it.
+_SET_THUMBNAIL_LUA = """
+local ttl = redis.call('PTTL', KEYS[1])
+if ttl == -2 then
+    return 0
+end
+redis.call('SET', KEYS[2], ARGV[1])
+if ttl > 0 then
+    redis.call('PEXPIRE', KEYS[2], ttl)
+end
+redis.call('SADD', KEYS[3], KEYS[2])
+return 1
+"""
+
+# KEYS: version, change log
+# ARGV: expire_at ('' keeps the current TTL), seed version, op, submission id,
+#       change log length
+# Bumps the dashboard's list version and logs the change as
+# "<version>:<op>:<id>".  Returns the new version.
+_BUMP_VERSION_LUA = _EXPIRE_LUA + """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    redis.call('SET', KEYS[1], ARGV[2])
+end
+local version = redis.call('INCR', KEYS[1])
+redis.call('RPUSH', KEYS[2], version .. ':' .. ARGV[3] .. ':' .. ARGV[4])
+redis.call('LTRIM', KEYS[2], -tonumber(ARGV[5]), -1)
+if ARGV[1] ~= '' then
+    expire(KEYS[1])
+    expire(KEYS[2])
+end
+return version
+"""
+
+# Shared by the scripts below, whose callers read a dashboard's index and
+# photo-key set first so that every key they touch is declared in KEYS.
+# ARGV[n] is the photo-key set's size and ARGV[n + 1 ..] the index's ids
+# as the caller read them; when either changed meanwhile the script
+# returns false and the caller reads them again.
+_CHECK_SNAPSHOT_LUA = """
+local function snapshot_matches(n)
+    local ids = redis.call('ZRANGE', KEYS[1], 0, -1)
+    if #ids ~= #ARGV - n or redis.call('SCARD', KEYS[3]) ~= tonumber(ARGV[n]) then
+        return false
+    end
+    for i, sid in ipairs(ids) do
+        if sid ~= ARGV[n + i] then
+            return false
+        end
+    end
+    return true
+end
+"""
+
+# KEYS: index, dedup set, photo-key set, external-key set, answer keys,
+#       version, change log, submission / rendered / photo keys...
+# ARGV: expire_at, photo-key set size, submission ids...
+# Re-stamps every key of a dashboard after its session was extended or
+# made infinite.  Returns the number of submissions touched.
+_SET_EXPIRY_LUA = _EXPIRE_LUA + _CHECK_SNAPSHOT_LUA + """
+if not snapshot_matches(2) then
+    return false
+end
+for i = 1, #KEYS do
+    expire(KEYS[i])
+end
+return #ARGV - 2
+"""
+
+# KEYS: index, dedup set, photo-key set, external-key set, answer keys,
+#       version, change log, submission / rendered / photo keys...
+# ARGV: photo-key set size, submission ids...
+# Returns the external-key set's members.  The list version and change
+# log are dropped only when something was purged; clients still holding
+# the old version then get a full reload.
+_PURGE_DASHBOARD_LUA = _CHECK_SNAPSHOT_LUA + """
+if not snapshot_matches(1) then
+    return false
+end
+local ext = redis.call('SMEMBERS', KEYS[4])
+for i = 8, #KEYS do
+    redis.call('DEL', KEYS[i])
+end
+redis.call('DEL', KEYS[1], KEYS[2], KEYS[3], KEYS[4], KEYS[5])
+if #ARGV > 1 then
+    redis.call('DEL', KEYS[6], KEYS[7])
+end
+return ext
+"""
+
+# Attempts at the snapshot scripts above before giving up until the next
+# expiry sweep.
+_SNAPSHOT_ATTEMPTS = 5
 
 
 def _normalize_name(name: str) -> str:
@@ -31,27 +208,129 @@ def _normalize_rg(rg: str) -> str:
     return re.sub(r"\D", "", rg)
 
 
+def _index_score(received_at: datetime) -> float:
+    if received_at.tzinfo is None:
+        received_at = received_at.replace(tzinfo=timezone.utc)
+    return received_at.timestamp()
+
+
+def _answer_key_scores(submission) -> Dict[str, float]:
+    """ZADD mapping for the answer-key index: received_at, then form order.
+
+    With ZADD NX a key keeps the score of the first submission that used
+    it; the microsecond steps keep one form's fields in their own order.
+    """
+    score = _index_score(submission.received_at)
+    return {key: score + i * 1e-6 for i, key in enumerate(submission.answers)}
+
+
+def _str(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _key_expire_at(expire_at: Optional[float]) -> int:
+    """Absolute EXPIREAT for a room's keys; 0 means no expiry."""
+    if expire_at is None:
+        return int(time.time()) + _TTL
+    if expire_at == 0:
+        return 0
+    return int(expire_at) + _EXPIRY_GRACE
+
+
 class RedisSubmissionStore:
-    """Redis-backed store with the same interface as the in-memory store."""
+    """Redis-backed store with the same interface as the in-memory store.
+
+    Works with a single node or a ``redis.cluster.RedisCluster`` client.
+    """
 
-    def __init__(self, redis_client):
+    def __init__(self, redis_client, compression: str = "zlib"):
         self._r = redis_client
+        self._compression = compression
+        self._add_if_unique_script = redis_client.register_script(_ADD_IF_UNIQUE_LUA)
+        self._purge_dashboard_script = redis_client.register_script(_PURGE_DASHBOARD_LUA)
+        self._set_expiry_script = redis_client.register_script(_SET_EXPIRY_LUA)
+        self._bump_version_script = redis_client.register_script(_BUMP_VERSION_LUA)
+        self._set_rendered_script = redis_client.register_script(_SET_RENDERED_LUA)
+        self._set_thumbnail_script = redis_client.register_script(_SET_THUMBNAIL_LUA)
+        self._feed = RedisChangeFeed(redis_client, _KEY_PREFIX)
 
     # ------------------------------------------------------------------
     # Internal helpers
     # ------------------------------------------------------------------
 
-    def _sub_key(self, submission_id: str) -> str:
-        return f"{_KEY_PREFIX}sub:{submission_id}"
+    def _tag(self, dashboard_id: int) -> str:
+        """Key prefix that pins a dashboard's keys to one cluster slot."""
+        return f"{_KEY_PREFIX}{{dash:{dashboard_id}}}:"
+
+    def _sub_key(self, dashboard_id: int, submission_id: str) -> str:
+        return f"{self._tag(dashboard_id)}sub:{submission_id}"
+
+    def _rendered_key(self, dashboard_id: int, submission_id: str) -> str:
+        """Cached rendering of a submission (see app.renderer.cache)."""
+        return f"{self._tag(dashboard_id)}rendered:{submission_id}"
 
     def _idx_key(self, dashboard_id: int) -> str:
-        return f"{_KEY_PREFIX}idx:{dashboard_id}"
+        """Sorted set of submission ids scored by received_at."""
+        return f"{self._tag(dashboard_id)}zidx"
 
     def _dedup_key(self, dashboard_id: int) -> str:
-        return f"{_KEY_PREFIX}dedup:{dashboard_id}"
+        return f"{self._tag(dashboard_id)}dedup"
+
+    def _photo_key(self, dashboard_id: int, submission_id: str, idx: int) -> str:
+        return f"{self._tag(dashboard_id)}photo:{submission_id}:{idx}"
+
+    def _thumbnail_key(self, dashboard_id: int, submission_id: str, idx: int, size: str) -> str:
+        """Downscaled copy of a photo (see app.renderer.thumbnails)."""
+        return f"{self._tag(dashboard_id)}thumb:{submission_id}:{idx}:{size}"
+
+    def _photo_set_key(self, dashboard_id: int) -> str:
+        """Set of the in-Redis photo keys of a dashboard."""
+        return f"{self._tag(dashboard_id)}photos"
+
+    def _external_set_key(self, dashboard_id: int) -> str:
+        """Set of the photo_storage keys (S3 / disk) of a dashboard."""
+        return f"{self._tag(dashboard_id)}ext"
+
+    def _answer_keys_key(self, dashboard_id: int) -> str:
+        """Sorted set of the answer keys seen in the dashboard, by first use."""
+        return f"{self._tag(dashboard_id)}akeys"
+
+    def _version_key(self, dashboard_id: int) -> str:
+        """Counter bumped by every change to the dashboard's pending list."""
+        return f"{self._tag(dashboard_id)}ver"
+
+    def _changes_key(self, dashboard_id: int) -> str:
+        """List of recent "<version>:<op>:<id>" changes, for delta sync."""
+        return f"{self._tag(dashboard_id)}changes"
+
+    def _loc_key(self, submission_id: str) -> str:
+        """Dashboard id of a submission, for lookups by id alone."""
+        return f"{_KEY_PREFIX}loc:{submission_id}"
+
+    def _mget(self, keys: list) -> list:
+        """MGET that also works when *keys* span cluster slots."""
+        mget_nonatomic = getattr(self._r, "mget_nonatomic", None)
+        if mget_nonatomic is not None:
+            return mget_nonatomic(keys)
+        return self._r.mget(keys)
+
+    def _locate(self, submission_ids: List[str]) -> Dict[str, int]:
+        """Map submission ids to their dashboard via the ``loc:`` pointers."""
+        if not submission_ids:
+            return {}
+        found = self._mget([self._loc_key(sid) for sid in submission_ids])
+        return {
+            sid: int(raw) for sid, raw in zip(submission_ids, found) if raw is not None
+        }
 
-    def _photo_key(self, submission_id: str, idx: int) -> str:
-        return f"{_KEY_PREFIX}photo:{submission_id}:{idx}"
+    def _bump_version(self, dashboard_id: int, op: str, submission_id: str = "",
+                      key_expire_at="") -> None:
+        from app.store import _CHANGE_LOG_LIMIT, _seed_version
+
+        self._bump_version_script(
+            keys=[self._version_key(dashboard_id), self._changes_key(dashboard_id)],
+            args=[key_expire_at, _seed_version(), op, submission_id, _CHANGE_LOG_LIMIT],
+        )
 
     def _dedup_keys_for(self, guest_name: str, rg: Optional[str]) -> list:
         keys = []
@@ -81,22 +360,56 @@ class RedisSubmissionStore:
             "photo_count": len(submission.photos),
             "photo_keys": list(getattr(submission, "photo_keys", [])),
         }
-        return json.dumps(data).encode()
+        return encode_entry(data, compression=self._compression)
 
     def _deserialize(self, raw: bytes, submission_id: str):
-        from app.store import Submission
+        data = decode_entry(raw)
+        photos = self._fetch_photos([data]).get(data["submission_id"], [])
+        return self._build_submission(data, photos)
+
+    def _fetch_photos(self, entries: list) -> Dict[str, List[bytes]]:
+        """Load the in-Redis photos of every decoded entry with a single MGET."""
+        keys = []
+        owners = []
+        for data in entries:
+            for i in range(data.get("photo_count", 0)):
+                keys.append(self._photo_key(data["dashboard_id"], data["submission_id"], i))
+                owners.append(data)
+        if not keys:
+            return {}
+
+        photos: Dict[str, List[bytes]] = {}
+        for data, photo_raw in zip(owners, self._mget(keys)):
+            if photo_raw:
+                photos.setdefault(data["submission_id"], []).append(
+                    decode_photo(photo_raw, data.get("photo_encoding"))
+                )
+        return photos
+
+    def _build_summary(self, data: dict):
+        from app.store import SubmissionSummary
 
-        data = json.loads(raw.decode())
         received_at = datetime.fromisoformat(data["received_at"])
         if received_at.tzinfo is None:
             received_at = received_at.replace(tzinfo=timezone.utc)
 
-        photo_count = data.get("photo_count", 0)
-        photos = []
-        for i in range(photo_count):
-            photo_raw = self._r.get(self._photo_key(submission_id, i))
-            if photo_raw:
-                photos.append(base64.b64decode(photo_raw))
+        photo_keys = data.get("photo_keys", [])
+        return SubmissionSummary(
+            submission_id=data["submission_id"],
+            dashboard_id=data["dashboard_id"],
+            guest_name=data["guest_name"],
+            crime_type=data["crime_type"],
+            received_at=received_at,
+            photo_keys=photo_keys,
+            photo_count=len(photo_keys) + data.get("photo_count", 0),
+        )
+
+    def _build_submission(self, data: dict, photos: List[bytes], with_photos: bool = True):
+        from app.store import Submission
+
+        received_at = datetime.fromisoformat(data["received_at"])
+        if received_at.tzinfo is None:
+            received_at = received_at.replace(tzinfo=timezone.utc)
 
         return Submission(
             submission_id=data["submission_id"],
@@ -113,6 +426,7 @@ class RedisSubmissionStore:
             photos=photos,
             received_at=received_at,
             photo_keys=data.get("photo_keys", []),
+            stored_photo_count=None if with_photos else data.get("photo_count", 0),
         )
 
     # ------------------------------------------------------------------
@@ -126,31 +440,110 @@ class RedisSubmissionStore:
                 return True
         return False
 
-    def add(self, submission) -> str:
+    def add(self, submission, expire_at: Optional[float] = None) -> str:
         sid = submission.submission_id
+        dashboard_id = submission.dashboard_id
+        key_expire_at = _key_expire_at(expire_at)
         pipe = self._r.pipeline()
 
-        pipe.set(self._sub_key(sid), self._serialize(submission), ex=_TTL)
-        pipe.rpush(self._idx_key(submission.dashboard_id), sid)
-        pipe.expire(self._idx_key(submission.dashboard_id), _TTL)
+        def _expire(key):
+            if key_expire_at:
+                pipe.expireat(key, key_expire_at)
+            else:
+                pipe.persist(key)
 
+        pipe.set(self._sub_key(dashboard_id, sid), self._serialize(submission))
+        _expire(self._sub_key(dashboard_id, sid))
+        pipe.zadd(self._idx_key(dashboard_id), {sid: _index_score(submission.received_at)})
+        _expire(self._idx_key(dashboard_id))
+
+        photo_set_key = self._photo_set_key(dashboard_id)
         for i, photo_bytes in enumerate(submission.photos):
-            pipe.set(
-                self._photo_key(sid, i),
-                base64.b64encode(photo_bytes),
-                ex=_TTL,
-            )
+            pipe.set(self._photo_key(dashboard_id, sid, i), photo_bytes)
+            _expire(self._photo_key(dashboard_id, sid, i))
+            pipe.sadd(photo_set_key, self._photo_key(dashboard_id, sid, i))
+        _expire(photo_set_key)
 
-        dedup_key = self._dedup_key(submission.dashboard_id)
+        external_set_key = self._external_set_key(dashboard_id)
+        for key in getattr(submission, "photo_keys", []):
+            pipe.sadd(external_set_key, key)
+        _expire(external_set_key)
+
+        dedup_key = self._dedup_key(dashboard_id)
         for dk in self._dedup_keys_for(submission.guest_name, submission.rg):
             pipe.sadd(dedup_key, dk)
-        pipe.expire(dedup_key, _TTL)
+        _expire(dedup_key)
+
+        if submission.answers:
+            pipe.zadd(self._answer_keys_key(dashboard_id), _answer_key_scores(submission), nx=True)
+            _expire(self._answer_keys_key(dashboard_id))
 
         pipe.execute()
+        # The pointer lives in another slot, so it stays out of the MULTI.
+        if key_expire_at:
+            self._r.set(self._loc_key(sid), dashboard_id, exat=key_expire_at)
+        else:
+            self._r.set(self._loc_key(sid), dashboard_id)
+        self._bump_version(dashboard_id, "added", sid, key_expire_at)
+        self._feed.publish(dashboard_id, added_event(submission))
         return sid
 
-    def get(self, submission_id: str):
-        raw = self._r.get(self._sub_key(submission_id))
+    def add_if_unique(self, submission, expire_at: Optional[float] = None) -> bool:
+        """Atomically insert *submission* unless its name/RG is already known.
+
+        The dedup check and every write run in one Lua script over keys of a
+        single hash slot, so concurrent workers cannot both insert the same
+        guest.  *expire_at* is the room's expiry as returned by
+        :func:`app.store.dashboard_expire_at`.  Returns True when the
+        submission was stored.
+        """
+        sid = submission.submission_id
+        dashboard_id = submission.dashboard_id
+        key_expire_at = _key_expire_at(expire_at)
+        dedup_members = self._dedup_keys_for(submission.guest_name, submission.rg)
+        external_keys = list(getattr(submission, "photo_keys", []))
+        keys = [
+            self._sub_key(dashboard_id, sid),
+            self._idx_key(dashboard_id),
+            self._dedup_key(dashboard_id),
+            self._photo_set_key(dashboard_id),
+            self._external_set_key(dashboard_id),
+        ] + [self._photo_key(dashboard_id, sid, i) for i in range(len(submission.photos))]
+        args = [
+            key_expire_at, sid, self._serialize(submission),
+            _index_score(submission.received_at),
+            len(dedup_members), len(external_keys),
+        ]
+        args += dedup_members + external_keys + list(submission.photos)
+        if not self._add_if_unique_script(keys=keys, args=args):
+            return False
+
+        # The pointer lives in another slot, so it is written after the
+        # script, along with the answer-key index (CSV columns only).
+        pipe = self._r.pipeline(transaction=False)
+        if key_expire_at:
+            pipe.set(self._loc_key(sid), dashboard_id, exat=key_expire_at)
+        else:
+            pipe.set(self._loc_key(sid), dashboard_id)
+        if submission.answers:
+            answer_keys_key = self._answer_keys_key(dashboard_id)
+            pipe.zadd(answer_keys_key, _answer_key_scores(submission), nx=True)
+            if key_expire_at:
+                pipe.expireat(answer_keys_key, key_expire_at)
+            else:
+                pipe.persist(answer_keys_key)
+        pipe.execute()
+        self._bump_version(dashboard_id, "added", sid, key_expire_at)
+        self._feed.publish(dashboard_id, added_event(submission))
+        return True
+
+    def get(self, submission_id: str, dashboard_id: Optional[int] = None):
+        """Return one submission; pass *dashboard_id* to skip the id lookup."""
+        if dashboard_id is None:
+            dashboard_id = self._locate([submission_id]).get(submission_id)
+            if dashboard_id is None:
+                return None
+        raw = self._r.get(self._sub_key(dashboard_id, submission_id))
         if raw is None:
             return None
         try:
@@ -159,75 +552,458 @@ class RedisSubmissionStore:
             logger.warning("Failed to deserialize submission %s: %s", submission_id, exc)
             return None
 
+    def _load_entries(self, submission_ids, dashboard_id: Optional[int] = None) -> list:
+        """MGET and decode the submission blobs for *submission_ids*, in order."""
+        ids = [_str(sid) for sid in submission_ids]
+        if not ids:
+            return []
+
+        if dashboard_id is None:
+            located = self._locate(ids)
+            ids = [sid for sid in ids if sid in located]
+            keys = [self._sub_key(located[sid], sid) for sid in ids]
+        else:
+            keys = [self._sub_key(dashboard_id, sid) for sid in ids]
+        if not keys:
+            return []
+
+        entries = []
+        for sid, raw in zip(ids, self._mget(keys)):
+            if raw is None:
+                continue
+            try:
+                entries.append(decode_entry(raw))
+            except Exception as exc:
+                logger.warning("Failed to deserialize submission %s: %s", sid, exc)
+        return entries
+
+    def get_many(self, submission_ids: List[str], with_photos: bool = True,
+                 dashboard_id: Optional[int] = None) -> list:
+        """Return the submissions for *submission_ids* in the given order.
+
+        All submission blobs are fetched with one MGET and, when
+        *with_photos* is set, their photos with a second one.  Without
+        *dashboard_id* the ids are first resolved through their ``loc:``
+        pointers.  Missing or undecodable entries are skipped.
+        """
+        entries = self._load_entries(submission_ids, dashboard_id)
+        photos = self._fetch_photos(entries) if with_photos else {}
+        result = []
+        for data in entries:
+            try:
+                result.append(self._build_submission(
+                    data, photos.get(data["submission_id"], []), with_photos
+                ))
+            except Exception as exc:
+                logger.warning(
+                    "Failed to deserialize submission %s: %s", data.get("submission_id"), exc
+                )
+        return result
+
+    def get_photo(self, submission_id: str, index: int,
+                  dashboard_id: Optional[int] = None) -> Optional[bytes]:
+        """Store-held photo *index* of a submission, fetched alone.
+
+        The submission blob (for its photo encoding) and the one photo key
+        share a slot, so both come back from a single MGET.
+        """
+        if index < 0:
+            return None
+        if dashboard_id is None:
+            dashboard_id = self._locate([submission_id]).get(submission_id)
+            if dashboard_id is None:
+                return None
+        raw, photo_raw = self._mget([
+            self._sub_key(dashboard_id, submission_id),
+            self._photo_key(dashboard_id, submission_id, index),
+        ])
+        if raw is None or photo_raw is None:
+            return None
+        try:
+            return decode_photo(photo_raw, decode_entry(raw).get("photo_encoding"))
+        except Exception as exc:
+            logger.warning("Failed to decode photo %s/%s: %s", submission_id, index, exc)
+            return None
+
     def list_for_dashboard(self, dashboard_id: int) -> list:
-        ids = self._r.lrange(self._idx_key(dashboard_id), 0, -1)
+        return self.get_many(
+            self._r.zrange(self._idx_key(dashboard_id), 0, -1), dashboard_id=dashboard_id
+        )
+
+    def list_summaries_for_dashboard(self, dashboard_id: int) -> list:
+        """Return SubmissionSummary projections without touching photo keys."""
+        return self._summaries(self._r.zrange(self._idx_key(dashboard_id), 0, -1), dashboard_id)
+
+    def _summaries(self, submission_ids, dashboard_id: int) -> list:
         result = []
-        for sid in ids:
-            sid_str = sid.decode() if isinstance(sid, bytes) else sid
-            sub = self.get(sid_str)
-            if sub is not None:
-                result.append(sub)
+        for data in self._load_entries(submission_ids, dashboard_id):
+            try:
+                result.append(self._build_summary(data))
+            except Exception as exc:
+                logger.warning(
+                    "Failed to deserialize submission %s: %s", data.get("submission_id"), exc
+                )
         return result
 
-    def delete(self, submission_id: str):
-        raw = self._r.get(self._sub_key(submission_id))
+    def iter_for_dashboard(
+        self, dashboard_id: int, cursor: Optional[str] = None, limit: int = 50
+    ) -> Tuple[list, Optional[str]]:
+        """Return one page of summaries in received_at order and the next cursor.
+
+        Pages are read with ZRANGEBYSCORE from the cursor position, so each
+        page costs O(log n + limit) regardless of the room size.
+        """
+        from app.store import _decode_cursor, _encode_cursor
+
+        if limit <= 0:
+            raise ValueError("limit must be positive")
+
+        key = self._idx_key(dashboard_id)
+        after = _decode_cursor(cursor) if cursor else None
+        min_score = after[0] if after else "-inf"
+
+        window = []
+        offset = 0
+        while len(window) <= limit:
+            batch = self._r.zrangebyscore(
+                key, min_score, "+inf", start=offset, num=limit + 1, withscores=True
+            )
+            if not batch:
+                break
+            offset += len(batch)
+            for member, score in batch:
+                sid = member.decode() if isinstance(member, bytes) else member
+                # Skip ties with the cursor's own score up to and including it.
+                if after is not None and (score, sid) <= after:
+                    continue
+                window.append((sid, score))
+
+        page = window[:limit]
+        next_cursor = None
+        if len(window) > limit:
+            next_cursor = _encode_cursor(page[-1][1], page[-1][0])
+        return self._summaries([sid for sid, _ in page], dashboard_id), next_cursor
+
+    def delete(self, submission_id: str, dashboard_id: Optional[int] = None):
+        if dashboard_id is None:
+            dashboard_id = self._locate([submission_id]).get(submission_id)
+            if dashboard_id is None:
+                return
+        sub_key = self._sub_key(dashboard_id, submission_id)
+        raw = self._r.get(sub_key)
         if raw is None:
             return
         try:
-            data = json.loads(raw.decode())
-            dashboard_id = data["dashboard_id"]
+            data = decode_entry(raw)
             photo_count = data.get("photo_count", 0)
+            external_keys = data.get("photo_keys", [])
         except Exception:
-            self._r.delete(self._sub_key(submission_id))
+            self._r.delete(sub_key)
+            self._bump_version(dashboard_id, "removed", submission_id)
+            self._feed.publish(dashboard_id, removed_event(submission_id))
             return
 
         pipe = self._r.pipeline()
-        pipe.delete(self._sub_key(submission_id))
-        pipe.lrem(self._idx_key(dashboard_id), 1, submission_id)
+        pipe.delete(sub_key)
+        pipe.delete(self._rendered_key(dashboard_id, submission_id))
+        pipe.zrem(self._idx_key(dashboard_id), submission_id)
         for i in range(photo_count):
-            pipe.delete(self._photo_key(submission_id, i))
+            photo_key = self._photo_key(dashboard_id, submission_id, i)
+            thumb_keys = [self._thumbnail_key(dashboard_id, submission_id, i, size)
+                          for size in PHOTO_VARIANTS]
+            pipe.delete(photo_key, *thumb_keys)
+            pipe.srem(self._photo_set_key(dashboard_id), photo_key, *thumb_keys)
+        if external_keys:
+            pipe.srem(self._external_set_key(dashboard_id), *external_keys)
         pipe.execute()
-
-    def purge_dashboard(self, dashboard_id: int):
-        ids = self._r.lrange(self._idx_key(dashboard_id), 0, -1)
-
-        # Delete photos from external storage before purging Redis keys
+        # The pointer lives in another slot, so it stays out of the MULTI.
+        self._r.delete(self._loc_key(submission_id))
+        self._bump_version(dashboard_id, "removed", submission_id)
+        self._feed.publish(dashboard_id, removed_event(submission_id))
+
+    def _room_snapshot(self, dashboard_id: int) -> Tuple[list, list, list]:
+        """``(keys, args, entries)`` for the snapshot scripts of *dashboard_id*.
+
+        *keys* declares every key of the room, including the photos of
+        entries written before the photo-key sets existed; *args* carries
+        what the script re-checks (see ``_CHECK_SNAPSHOT_LUA``).
+        """
+        pipe = self._r.pipeline(transaction=False)
+        pipe.zrange(self._idx_key(dashboard_id), 0, -1)
+        pipe.smembers(self._photo_set_key(dashboard_id))
+        raw_ids, photo_set = pipe.execute()
+        ids = [_str(sid) for sid in raw_ids]
+        entries = self._load_entries(ids, dashboard_id)
+
+        keys = [
+            self._idx_key(dashboard_id),
+            self._dedup_key(dashboard_id),
+            self._photo_set_key(dashboard_id),
+            self._external_set_key(dashboard_id),
+            self._answer_keys_key(dashboard_id),
+            self._version_key(dashboard_id),
+            self._changes_key(dashboard_id),
+        ]
+        room_keys = {_str(key): None for key in photo_set}
+        for sid in ids:
+            room_keys[self._sub_key(dashboard_id, sid)] = None
+            room_keys[self._rendered_key(dashboard_id, sid)] = None
+        for data in entries:
+            for i in range(data.get("photo_count", 0)):
+                room_keys[self._photo_key(dashboard_id, data["submission_id"], i)] = None
+        return keys + list(room_keys), [len(photo_set), *ids], entries
+
+    def _run_snapshot_script(self, script, dashboard_id: int, extra_args=()):
+        """Run *script* on a fresh snapshot of the room until it still matches."""
+        for _ in range(_SNAPSHOT_ATTEMPTS):
+            keys, args, entries = self._room_snapshot(dashboard_id)
+            result = script(keys=keys, args=[*extra_args, *args])
+            if result is not None:
+                return result, args[1:], entries
+        logger.warning("Dashboard %s kept changing; its keys were left for the next sweep",
+                       dashboard_id)
+        return None, [], []
+
+    def purge_dashboard(self, dashboard_id: int) -> List[str]:
+        """Delete every Redis key of *dashboard_id* in one server-side call.
+
+        The external photo keys returned by the script are then deleted from
+        photo_storage (when an app context is available) and returned.
+        """
+        ext_keys, purged_ids, entries = self._run_snapshot_script(
+            self._purge_dashboard_script, dashboard_id
+        )
+        photo_keys = [_str(key) for key in ext_keys or []]
+        for data in entries:
+            photo_keys.extend(data.get("photo_keys", []))
+        photo_keys = list(dict.fromkeys(photo_keys))
+
+        # loc: pointers live in other slots, so they are dropped one by one.
+        # An empty or unknown room changed nothing, so nothing is published.
+        if purged_ids:
+            pipe = self._r.pipeline(transaction=False)
+            for sid in purged_ids:
+                pipe.delete(self._loc_key(sid))
+            pipe.execute()
+            self._feed.publish(dashboard_id, PURGED_EVENT)
+
+        # Delete photos from external storage now that Redis is purged
         try:
             from flask import current_app
             storage = getattr(current_app, "photo_storage", None)
             if storage:
-                for sid in ids:
-                    sid_str = sid.decode() if isinstance(sid, bytes) else sid
-                    raw = self._r.get(self._sub_key(sid_str))
-                    if raw:
-                        try:
-                            data = json.loads(raw.decode())
-                            for key in data.get("photo_keys", []):
-                                try:
-                                    storage.delete(key)
-                                except Exception:
-                                    pass
-                        except Exception:
-                            pass
+                for key in photo_keys:
+                    try:
+                        storage.delete(key)
+                    except Exception:
+                        pass
         except RuntimeError:
             pass  # No application context (e.g. tests)
 
+        return photo_keys
+
+    def subscribe(self, dashboard_id: int):
+        """Follow changes to *dashboard_id*'s pending list, from any worker or host."""
+        return self._feed.subscribe(dashboard_id)
+
+    def version_for_dashboard(self, dashboard_id: int) -> int:
+        """Version of the pending list, bumped by every add and delete; a purge resets it."""
+        return int(self._r.get(self._version_key(dashboard_id)) or 0)
+
+    def changes_since(
+        self, dashboard_id: int, since: int
+    ) -> Optional[Tuple[int, List[str], List[str]]]:
+        """Return ``(version, added_ids, removed_ids)`` after version *since*, or None."""
+        from app.store import _net_changes
+
         pipe = self._r.pipeline()
-        for sid in ids:
-            sid_str = sid.decode() if isinstance(sid, bytes) else sid
-            raw = self._r.get(self._sub_key(sid_str))
-            pipe.delete(self._sub_key(sid_str))
-            if raw:
-                try:
-                    data = json.loads(raw.decode())
-                    photo_count = data.get("photo_count", 0)
-                    for i in range(photo_count):
-                        pipe.delete(self._photo_key(sid_str, i))
-                except Exception:
-                    pass
-        pipe.delete(self._idx_key(dashboard_id))
-        pipe.delete(self._dedup_key(dashboard_id))
-        pipe.execute()
+        pipe.get(self._version_key(dashboard_id))
+        pipe.lrange(self._changes_key(dashboard_id), 0, -1)
+        raw_version, raw_entries = pipe.execute()
+        version = int(raw_version or 0)
+        entries = []
+        for raw in raw_entries:
+            entry_version, op, sid = _str(raw).split(":", 2)
+            entries.append((int(entry_version), op, sid))
+        delta = _net_changes(entries, since, version)
+        return None if delta is None else (version, *delta)
 
     def count_for_dashboard(self, dashboard_id: int) -> int:
-        return self._r.llen(self._idx_key(dashboard_id))
+        return self._r.zcard(self._idx_key(dashboard_id))
+
+    def get_rendered(self, submission_id: str, dashboard_id: Optional[int] = None) -> Optional[dict]:
+        """Cached rendering of a submission, or None (see app.renderer.cache)."""
+        return self.get_rendered_many([submission_id], dashboard_id).get(submission_id)
+
+    def get_rendered_many(self, submission_ids: List[str],
+                          dashboard_id: Optional[int] = None) -> Dict[str, dict]:
+        """Cached renderings of *submission_ids* that exist, keyed by id, in one MGET."""
+        ids = list(submission_ids)
+        if dashboard_id is None:
+            locations = self._locate(ids)
+            ids = [sid for sid in ids if sid in locations]
+            keys = [self._rendered_key(locations[sid], sid) for sid in ids]
+        else:
+            keys = [self._rendered_key(dashboard_id, sid) for sid in ids]
+        if not keys:
+            return {}
+        result = {}
+        for sid, raw in zip(ids, self._mget(keys)):
+            if raw is None:
+                continue
+            try:
+                rendered = decode_entry(raw)
+            except Exception:
+                continue
+            rendered.pop("photo_encoding", None)
+            result[sid] = rendered
+        return result
+
+    def set_rendered(self, submission_id: str, dashboard_id: int, rendered: dict) -> bool:
+        """Cache *rendered* next to the submission; False if it is already gone."""
+        return bool(self._set_rendered_script(
+            keys=[
+                self._sub_key(dashboard_id, submission_id),
+                self._rendered_key(dashboard_id, submission_id),
+            ],
+            args=[encode_entry(rendered, compression=self._compression)],
+        ))
+
+    def get_thumbnail(self, submission_id: str, index: int, size: str,
+                      dashboard_id: Optional[int] = None) -> Optional[bytes]:
+        """Downscaled copy of the store-held photo *index*, or None (see app.renderer.thumbnails)."""
+        if dashboard_id is None:
+            dashboard_id = self._locate([submission_id]).get(submission_id)
+            if dashboard_id is None:
+                return None
+        return self._r.get(self._thumbnail_key(dashboard_id, submission_id, index, size))
+
+    def set_thumbnail(self, submission_id: str, dashboard_id: int, index: int,
+                      size: str, data: bytes) -> bool:
+        """Keep a downscaled copy of photo *index*; False if the submission is already gone."""
+        return bool(self._set_thumbnail_script(
+            keys=[
+                self._sub_key(dashboard_id, submission_id),
+                self._thumbnail_key(dashboard_id, submission_id, index, size),
+                self._photo_set_key(dashboard_id),
+            ],
+            args=[data],
+        ))
+
+    def answer_keys_for_dashboard(self, dashboard_id: int) -> List[str]:
+        """Answer keys seen in *dashboard_id* since its last purge, first-seen first."""
+        return [_str(key) for key in self._r.zrange(self._answer_keys_key(dashboard_id), 0, -1)]
+
+    def count_many(self, dashboard_ids) -> Dict[int, int]:
+        """Pending submissions per dashboard, in one pipelined round trip."""
+        ids = list(dashboard_ids)
+        if not ids:
+            return {}
+        pipe = self._r.pipeline(transaction=False)
+        for dashboard_id in ids:
+            pipe.zcard(self._idx_key(dashboard_id))
+        return dict(zip(ids, pipe.execute()))
+
+    def set_dashboard_expiry(self, dashboard_id: int, expire_at: Optional[float]) -> int:
+        """Align the TTL of every key of *dashboard_id* with its new expiry.
+
+        Call after a session is extended or made infinite (``expire_at=0``).
+        Returns the number of submissions whose keys were updated.
+        """
+        key_expire_at = _key_expire_at(expire_at)
+        touched, ids, _entries = self._run_snapshot_script(
+            self._set_expiry_script, dashboard_id, [key_expire_at]
+        )
+        if ids:
+            pipe = self._r.pipeline(transaction=False)
+            for sid in ids:
+                if key_expire_at:
+                    pipe.expireat(self._loc_key(sid), key_expire_at)
+                else:
+                    pipe.persist(self._loc_key(sid))
+            pipe.execute()
+        return touched or 0
+
+    def _move_key(self, old_key: str, new_key: str) -> bool:
+        """Copy *old_key* to *new_key* with its remaining TTL, then drop it.
+
+        DUMP/RESTORE works across cluster slots, unlike RENAME.
+        """
+        dumped = self._r.dump(old_key)
+        if dumped is None:
+            return False
+        ttl_ms = self._r.pttl(old_key)
+        self._r.restore(new_key, ttl_ms if ttl_ms > 0 else 0, dumped, replace=True)
+        self._r.delete(old_key)
+        return True
+
+    def _migrate_dashboard(self, dashboard_id: int, sids: List[str],
+                           scores: Dict[str, float], index_ttl_ms: int) -> None:
+        new_scores = {}
+        photo_keys = []
+        for sid in sids:
+            old_sub_key = f"{_KEY_PREFIX}sub:{sid}"
+            raw = self._r.get(old_sub_key)
+            if raw is None:
+                continue
+            try:
+                data = decode_entry(raw)
+            except Exception as exc:
+                logger.warning("Skipping undecodable submission %s: %s", sid, exc)
+                continue
+            ttl_ms = self._r.pttl(old_sub_key)
+            self._move_key(old_sub_key, self._sub_key(dashboard_id, sid))
+            for i in range(data.get("photo_count", 0)):
+                photo_key = self._photo_key(dashboard_id, sid, i)
+                if self._move_key(f"{_KEY_PREFIX}photo:{sid}:{i}", photo_key):
+                    photo_keys.append(photo_key)
+            if ttl_ms > 0:
+                self._r.set(self._loc_key(sid), dashboard_id, px=ttl_ms)
+            else:
+                self._r.set(self._loc_key(sid), dashboard_id)
+            new_scores[sid] = scores.get(sid) or _index_score(
+                datetime.fromisoformat(data["received_at"])
+            )
+
+        pipe = self._r.pipeline()
+        if new_scores:
+            pipe.zadd(self._idx_key(dashboard_id), new_scores)
+        if photo_keys:
+            pipe.sadd(self._photo_set_key(dashboard_id), *photo_keys)
+        if index_ttl_ms > 0:
+            pipe.pexpire(self._idx_key(dashboard_id), index_ttl_ms)
+            pipe.pexpire(self._photo_set_key(dashboard_id), index_ttl_ms)
+        pipe.execute()
+        # Members of the old photo set are old key names; it is rebuilt above.
+        # It lives in another slot, so it is dropped outside the MULTI.
+        self._r.delete(f"{_KEY_PREFIX}photos:{dashboard_id}")
+        self._move_key(f"{_KEY_PREFIX}dedup:{dashboard_id}", self._dedup_key(dashboard_id))
+        self._move_key(f"{_KEY_PREFIX}ext:{dashboard_id}", self._external_set_key(dashboard_id))
+
+    def migrate_key_layout(self) -> int:
+        """Move keys written before the ``{dash:<id>}`` layout into it.
+
+        Handles both list ``idx:<id>`` and sorted-set ``zidx:<id>`` indexes,
+        keeps each key's remaining TTL and writes the ``loc:`` pointers.
+        Safe to re-run.  Returns the number of dashboards migrated.
+        """
+        migrated = 0
+        for pattern, is_list in ((f"{_KEY_PREFIX}idx:*", True), (f"{_KEY_PREFIX}zidx:*", False)):
+            for old_index in list(self._r.scan_iter(match=pattern)):
+                old_index = _str(old_index)
+                dashboard_id = int(old_index.rsplit(":", 1)[1])
+                if is_list:
+                    sids = [_str(sid) for sid in self._r.lrange(old_index, 0, -1)]
+                    scores = {}
+                else:
+                    pairs = self._r.zrange(old_index, 0, -1, withscores=True)
+                    sids = [_str(sid) for sid, _ in pairs]
+                    scores = {_str(sid): score for sid, score in pairs}
+                self._migrate_dashboard(dashboard_id, sids, scores, self._r.pttl(old_index))
+                self._r.delete(old_index)
+                migrated += 1
+        return migrated
+
+    def migrate_legacy_indexes(self) -> int:
+        """Deprecated alias of :meth:`migrate_key_layout`."""
+        return self.migrate_key_layout()
@@ -1,13 +1,27 @@
 """S3-compatible photo storage backend (AWS S3, MinIO, DigitalOcean Spaces)."""
 
 import logging
+import re
 import uuid
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
-from app.storage.photo_storage import PhotoStorage
+from app.storage.photo_storage import (
+    CHUNK_SIZE, PHOTO_VARIANTS, PhotoStorage, PhotoStream, variant_key,
+)
 
 logger = logging.getLogger(__name__)
 
+# Lifetime of the URLs handed to nginx, which fetches them immediately.
+_ACCEL_URL_TTL = 60
+_CONTENT_RANGE = re.compile(r"bytes (\d+)-(\d+)/(\d+)")
+
+
+def _iter_body(body):
+    try:
+        yield from body.iter_chunks(CHUNK_SIZE)
+    finally:
+        body.close()
+
 
 class S3PhotoStorage(PhotoStorage):
     """Upload photos to an S3-compatible bucket and return pre-signed URLs."""
@@ -68,15 +82,92 @@ class S3PhotoStorage(PhotoStorage):
             logger.warning("Failed to download S3 object %s: %s", key, exc)
             return None
 
+    def download_stream(self, key: str, start: int = 0, stop: Optional[int] = None) -> Optional[PhotoStream]:
+        """Stream the object (or a byte range of it) straight from the GET response body."""
+        kwargs = {}
+        if start < 0:
+            kwargs["Range"] = f"bytes={start}"
+        elif start or stop is not None:
+            kwargs["Range"] = f"bytes={start}-{'' if stop is None else stop - 1}"
+        try:
+            response = self._client.get_object(Bucket=self._bucket, Key=key, **kwargs)
+        except Exception as exc:
+            code = getattr(exc, "response", {}).get("Error", {}).get("Code")
+            if code == "InvalidRange":
+                return self._unsatisfiable(key)
+            if code == "NoSuchKey":
+                # Expected for variants that were never generated (PDFs).
+                logger.debug("S3 object not found: %s", key)
+                return None
+            logger.warning("Failed to download S3 object %s: %s", key, exc)
+            return None
+
+        content_range = _CONTENT_RANGE.match(response.get("ContentRange") or "")
+        if content_range:
+            first, last, total = (int(group) for group in content_range.groups())
+            start, stop = first, last + 1
+        else:
+            total = int(response["ContentLength"])
+            start, stop = 0, total
+        return PhotoStream(_iter_body(response["Body"]), start, stop, total)
+
+    def _unsatisfiable(self, key: str) -> Optional[PhotoStream]:
+        try:
+            total = int(self._client.head_object(Bucket=self._bucket, Key=key)["ContentLength"])
+        except Exception as exc:
+            logger.warning("Failed to stat S3 object %s: %s", key, exc)
+            return None
+        return PhotoStream(iter(()), total, total, total)
+
+    def accel_redirect(self, key: str, prefix: str, mimetype: str) -> Optional[Tuple[str, Dict[str, str]]]:
+        """Let nginx proxy the object from a short-lived pre-signed URL.
+
+        Objects are uploaded as image/jpeg whatever they hold, so the URL
+        asks S3 to answer with the sniffed *mimetype* instead.
+        """
+        try:
+            url = self._client.generate_presigned_url(
+                "get_object",
+                Params={"Bucket": self._bucket, "Key": key, "ResponseContentType": mimetype},
+                ExpiresIn=_ACCEL_URL_TTL,
+            )
+        except Exception as exc:
+            logger.warning("Failed to generate S3 signed URL for %s: %s", key, exc)
+            return None
+        return f"{prefix}s3", {"X-Media-Url": url}
+
+    def save_variant(self, key: str, variant: str, photo_bytes: bytes) -> Optional[str]:
+        target = variant_key(key, variant)
+        self._client.put_object(
+            Bucket=self._bucket,
+            Key=target,
+            Body=photo_bytes,
+            ContentType="image/jpeg",
+        )
+        return target
+
     def delete(self, key: str) -> bool:
-        """Delete a photo from S3 by key."""
+        """Delete a photo (and its variants) from S3 by key, in one request."""
+        targets = [key] + [variant_key(key, variant) for variant in PHOTO_VARIANTS]
         try:
-            self._client.delete_object(Bucket=self._bucket, Key=key)
-            logger.debug("Deleted S3 object: %s", key)
-            return True
+            response = self._client.delete_objects(
+                Bucket=self._bucket,
+                Delete={"Objects": [{"Key": target} for target in targets], "Quiet": True},
+            )
         except Exception as exc:
             logger.error("Failed to delete S3 object %s: %s", key, exc)
             return False
+        # Per-key failures come back in a 200 response, not as an exception.
+        errors = response.get("Errors") or []
+        for error in errors:
+            logger.error(
+                "Failed to delete S3 object %s: %s %s",
+                error.get("Key"), error.get("Code"), error.get("Message"),
+            )
+        if errors:
+            return False
+        logger.debug("Deleted S3 object: %s", key)
+        return True
 
     def list_all(self) -> List[str]:
         """List all stored photo object keys under the photos/ prefix."""
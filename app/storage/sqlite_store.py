@@ -0,0 +1,696 @@
+"""SQLite-backed submission store shared by every process on one host.
+
+Used when Redis is not available but gunicorn runs several workers: each
+worker opens the same database file (on disk by default, see
+:func:`default_store_path`) in WAL mode, so a guest's submission is
+visible to every worker and to the Celery expiry task.  Entries use the same codec as the Redis store and
+expire with their room like Redis keys do.
+
+Changes are also appended to an ``events`` table in the same transaction;
+subscribers in any worker poll it for the live dashboard stream (see
+:mod:`app.storage.change_feed`).
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+from app.storage.change_feed import PURGED_EVENT, added_event, removed_event
+from app.storage.redis_codec import decode_entry, encode_entry
+from app.storage.redis_store import _normalize_name, _normalize_rg
+
+logger = logging.getLogger(__name__)
+
+_TTL = 12 * 60 * 60  # 12 hours in seconds
+# Rows outlive their room's expiry by this much so the expiry sweep can
+# still log pending submissions, matching the Redis store.
+_EXPIRY_GRACE = 15 * 60
+_NEVER = 253402300799.0  # 9999-12-31, expiry of infinite rooms
+# Change events are kept this long; subscribers poll far more often.
+_EVENT_RETENTION = 60
+_EVENT_POLL_INTERVAL = 0.5
+# Below this much free space at startup the store logs a warning.
+_LOW_SPACE_BYTES = 256 * 1024 * 1024
+
+
+def _row_expires_at(expire_at: Optional[float], now: float) -> float:
+    if expire_at is None:
+        return now + _TTL
+    if expire_at == 0:
+        return _NEVER
+    return expire_at + _EXPIRY_GRACE
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS submissions (
+    submission_id TEXT PRIMARY KEY,
+    dashboard_id  INTEGER NOT NULL,
+    score         REAL NOT NULL,
+    guest_name    TEXT NOT NULL,
+    crime_type    TEXT NOT NULL,
+    received_at   TEXT NOT NULL,
+    photo_keys    TEXT NOT NULL,
+    photo_count   INTEGER NOT NULL,
+    payload       BLOB NOT NULL,
+    expires_at    REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_submissions_dashboard
+    ON submissions (dashboard_id, score, submission_id);
+CREATE INDEX IF NOT EXISTS ix_submissions_expires ON submissions (expires_at);
+CREATE TABLE IF NOT EXISTS photos (
+    submission_id TEXT NOT NULL,
+    idx           INTEGER NOT NULL,
+    data          BLOB NOT NULL,
+    PRIMARY KEY (submission_id, idx)
+);
+CREATE TABLE IF NOT EXISTS rendered (
+    submission_id TEXT PRIMARY KEY,
+    payload       TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS thumbnails (
+    submission_id TEXT NOT NULL,
+    idx           INTEGER NOT NULL,
+    size          TEXT NOT NULL,
+    data          BLOB NOT NULL,
+    PRIMARY KEY (submission_id, idx, size)
+);
+CREATE TABLE IF NOT EXISTS dedup (
+    dashboard_id INTEGER NOT NULL,
+    dedup_key    TEXT NOT NULL,
+    expires_at   REAL NOT NULL,
+    PRIMARY KEY (dashboard_id, dedup_key)
+);
+CREATE TABLE IF NOT EXISTS answer_keys (
+    dashboard_id INTEGER NOT NULL,
+    answer_key   TEXT NOT NULL,
+    expires_at   REAL NOT NULL,
+    PRIMARY KEY (dashboard_id, answer_key)
+);
+CREATE TABLE IF NOT EXISTS events (
+    seq          INTEGER PRIMARY KEY AUTOINCREMENT,
+    dashboard_id INTEGER NOT NULL,
+    payload      TEXT NOT NULL,
+    created_at   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_events_dashboard ON events (dashboard_id, seq);
+CREATE TABLE IF NOT EXISTS versions (
+    dashboard_id INTEGER PRIMARY KEY,
+    version      INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS changes (
+    dashboard_id  INTEGER NOT NULL,
+    version       INTEGER NOT NULL,
+    op            TEXT NOT NULL,
+    submission_id TEXT,
+    PRIMARY KEY (dashboard_id, version)
+);
+"""
+
+
+def default_store_path() -> str:
+    """Database path in the system temp dir.
+
+    Not ``/dev/shm``: the database holds photo BLOBs, and Docker caps that
+    tmpfs at 64 MB unless ``shm_size`` is raised.
+    """
+    import tempfile
+
+    return os.path.join(tempfile.gettempdir(), "saladetriagem-submissions.db")
+
+
+def _warn_if_low_space(path: str) -> None:
+    """Log when the database's filesystem has little room left for photos."""
+    try:
+        stat = os.statvfs(os.path.dirname(os.path.abspath(path)))
+    except OSError:
+        return
+    free = stat.f_bavail * stat.f_frsize
+    if free < _LOW_SPACE_BYTES:
+        logger.warning(
+            "SQLite submission store %s has only %s MB free; writes fail with 503 "
+            "once it fills up (raise shm_size if it is on /dev/shm)",
+            path, free // (1024 * 1024),
+        )
+
+
+def _dedup_keys_for(guest_name: str, rg: Optional[str]) -> list:
+    import hashlib
+
+    keys = []
+    norm_name = _normalize_name(guest_name)
+    if norm_name:
+        keys.append(f"name:{hashlib.sha256(norm_name.encode()).hexdigest()[:16]}")
+    if rg:
+        norm_rg = _normalize_rg(rg)
+        if norm_rg:
+            keys.append(f"rg:{hashlib.sha256(norm_rg.encode()).hexdigest()[:16]}")
+    return keys
+
+
+def _index_score(received_at: datetime) -> float:
+    if received_at.tzinfo is None:
+        received_at = received_at.replace(tzinfo=timezone.utc)
+    return received_at.timestamp()
+
+
+def _parse_received_at(value: str) -> datetime:
+    received_at = datetime.fromisoformat(value)
+    if received_at.tzinfo is None:
+        received_at = received_at.replace(tzinfo=timezone.utc)
+    return received_at
+
+
+class _SQLiteSubscription:
+    """Polls the events table for one dashboard from the caller's thread."""
+
+    def __init__(self, store: "SQLiteSubmissionStore", dashboard_id: int):
+        self._store = store
+        self._dashboard_id = dashboard_id
+        (self._seen,) = store._conn().execute(
+            "SELECT COALESCE(MAX(seq), 0) FROM events"
+        ).fetchone()
+
+    def get(self, timeout: Optional[float] = None) -> List[dict]:
+        deadline = time.monotonic() + (timeout or 0)
+        while True:
+            rows = self._store._conn().execute(
+                "SELECT seq, payload FROM events WHERE dashboard_id = ? AND seq > ? ORDER BY seq",
+                (self._dashboard_id, self._seen),
+            ).fetchall()
+            if rows:
+                self._seen = rows[-1][0]
+                return [json.loads(payload) for _seq, payload in rows]
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return []
+            time.sleep(min(_EVENT_POLL_INTERVAL, remaining))
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteSubmissionStore:
+    """SQLite (WAL) store with the same interface as the in-memory store."""
+
+    def __init__(self, path: str):
+        self._path = path
+        self._local = threading.local()
+        self._conn().executescript(_SCHEMA)
+        _warn_if_low_space(path)
+
+    # ------------------------------------------------------------------
+    # Connection handling
+    # ------------------------------------------------------------------
+
+    def _conn(self) -> sqlite3.Connection:
+        """Return this thread's connection, reopening it after a fork."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self._path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """Write transaction that takes the database lock up front."""
+        from app.store import StoreUnavailableError
+
+        conn = self._conn()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                # SQLite rolls back by itself on some errors (SQLITE_FULL).
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        except sqlite3.OperationalError as exc:
+            # Disk full or database locked past the timeout: the caller
+            # answers 503 instead of failing the request with a 500.
+            raise StoreUnavailableError(f"SQLite store {self._path}: {exc}") from exc
+
+    # ------------------------------------------------------------------
+    # Internal helpers
+    # ------------------------------------------------------------------
+
+    def _serialize(self, submission) -> bytes:
+        return encode_entry({
+            "submission_id": submission.submission_id,
+            "dashboard_id": submission.dashboard_id,
+            "guest_name": submission.guest_name,
+            "dob": submission.dob,
+            "rg": submission.rg,
+            "cpf": submission.cpf,
+            "phone": submission.phone,
+            "address": submission.address,
+            "answers": submission.answers,
+            "narrative": submission.narrative,
+            "crime_type": submission.crime_type,
+            "received_at": submission.received_at.isoformat(),
+            "photo_count": len(submission.photos),
+            "photo_keys": list(getattr(submission, "photo_keys", [])),
+        }, compression="none")
+
+    def _is_duplicate(self, conn, submission, now: float) -> bool:
+        members = _dedup_keys_for(submission.guest_name, submission.rg)
+        if not members:
+            return False
+        placeholders = ",".join("?" * len(members))
+        row = conn.execute(
+            f"SELECT 1 FROM dedup WHERE dashboard_id = ? AND expires_at > ? "
+            f"AND dedup_key IN ({placeholders}) LIMIT 1",
+            [submission.dashboard_id, now, *members],
+        ).fetchone()
+        return row is not None
+
+    def _insert(self, conn, submission, now: float, expire_at: Optional[float]) -> None:
+        sid = submission.submission_id
+        expires_at = _row_expires_at(expire_at, now)
+        photo_keys = list(getattr(submission, "photo_keys", []))
+        conn.execute(
+            "INSERT OR REPLACE INTO submissions (submission_id, dashboard_id, score, "
+            "guest_name, crime_type, received_at, photo_keys, photo_count, payload, expires_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                sid, submission.dashboard_id, _index_score(submission.received_at),
+                submission.guest_name, submission.crime_type,
+                submission.received_at.isoformat(), json.dumps(photo_keys),
+                len(photo_keys) + len(submission.photos),
+                self._serialize(submission), expires_at,
+            ),
+        )
+        conn.executemany(
+            "INSERT OR REPLACE INTO photos (submission_id, idx, data) VALUES (?, ?, ?)",
+            [(sid, i, photo) for i, photo in enumerate(submission.photos)],
+        )
+        conn.executemany(
+            "INSERT OR REPLACE INTO dedup (dashboard_id, dedup_key, expires_at) VALUES (?, ?, ?)",
+            [(submission.dashboard_id, dk, expires_at)
+             for dk in _dedup_keys_for(submission.guest_name, submission.rg)],
+        )
+        # The upsert keeps the first-seen rowid, which orders the columns.
+        conn.executemany(
+            "INSERT INTO answer_keys (dashboard_id, answer_key, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT (dashboard_id, answer_key) "
+            "DO UPDATE SET expires_at = MAX(expires_at, excluded.expires_at)",
+            [(submission.dashboard_id, key, expires_at) for key in (submission.answers or {})],
+        )
+
+    def _publish(self, conn, dashboard_id: int, event: dict, now: float) -> None:
+        """Bump the dashboard's list version and append *event* to the feed."""
+        from app.store import _CHANGE_LOG_LIMIT, _seed_version
+
+        if event["type"] == "added":
+            op, submission_id = "added", event["submission"]["id"]
+        else:
+            op, submission_id = "removed", event["id"]
+        conn.execute(
+            "INSERT INTO versions (dashboard_id, version) VALUES (?, ?) "
+            "ON CONFLICT (dashboard_id) DO UPDATE SET version = version + 1",
+            (dashboard_id, _seed_version() + 1),
+        )
+        (version,) = conn.execute(
+            "SELECT version FROM versions WHERE dashboard_id = ?", (dashboard_id,)
+        ).fetchone()
+        conn.execute(
+            "DELETE FROM changes WHERE dashboard_id = ? AND version <= ?",
+            (dashboard_id, version - _CHANGE_LOG_LIMIT),
+        )
+        conn.execute(
+            "INSERT INTO changes (dashboard_id, version, op, submission_id) VALUES (?, ?, ?, ?)",
+            (dashboard_id, version, op, submission_id),
+        )
+        self._append_event(conn, dashboard_id, event, now)
+
+    def _append_event(self, conn, dashboard_id: int, event: dict, now: float) -> None:
+        conn.execute("DELETE FROM events WHERE created_at <= ?", (now - _EVENT_RETENTION,))
+        conn.execute(
+            "INSERT INTO events (dashboard_id, payload, created_at) VALUES (?, ?, ?)",
+            (dashboard_id, json.dumps(event), now),
+        )
+
+    def _prune_expired(self, conn, now: float) -> None:
+        for table in ("photos", "rendered", "thumbnails"):
+            conn.execute(
+                f"DELETE FROM {table} WHERE submission_id IN "
+                "(SELECT submission_id FROM submissions WHERE expires_at <= ?)",
+                (now,),
+            )
+        conn.execute("DELETE FROM submissions WHERE expires_at <= ?", (now,))
+        conn.execute("DELETE FROM dedup WHERE expires_at <= ?", (now,))
+        conn.execute("DELETE FROM answer_keys WHERE expires_at <= ?", (now,))
+
+    def _build_submission(self, payload: bytes, photos: List[bytes], with_photos: bool = True):
+        from app.store import Submission
+
+        data = decode_entry(payload)
+        return Submission(
+            submission_id=data["submission_id"],
+            dashboard_id=data["dashboard_id"],
+            guest_name=data["guest_name"],
+            dob=data.get("dob"),
+            rg=data.get("rg"),
+            cpf=data.get("cpf"),
+            phone=data.get("phone"),
+            address=data.get("address"),
+            answers=data.get("answers", {}),
+            narrative=data.get("narrative"),
+            crime_type=data["crime_type"],
+            photos=photos,
+            received_at=_parse_received_at(data["received_at"]),
+            photo_keys=data.get("photo_keys", []),
+            stored_photo_count=None if with_photos else data.get("photo_count", 0),
+        )
+
+    def _build_summary(self, row):
+        from app.store import SubmissionSummary
+
+        sid, dashboard_id, guest_name, crime_type, received_at, photo_keys, photo_count = row
+        return SubmissionSummary(
+            submission_id=sid,
+            dashboard_id=dashboard_id,
+            guest_name=guest_name,
+            crime_type=crime_type,
+            received_at=_parse_received_at(received_at),
+            photo_keys=json.loads(photo_keys),
+            photo_count=photo_count,
+        )
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def is_duplicate(self, submission) -> bool:
+        return self._is_duplicate(self._conn(), submission, time.time())
+
+    def add(self, submission, expire_at: Optional[float] = None) -> str:
+        now = time.time()
+        with self._transaction() as conn:
+            self._insert(conn, submission, now, expire_at)
+            self._publish(conn, submission.dashboard_id, added_event(submission), now)
+        return submission.submission_id
+
+    def add_if_unique(self, submission, expire_at: Optional[float] = None) -> bool:
+        """Insert *submission* unless its name/RG is already in the dashboard.
+
+        Runs in one ``BEGIN IMMEDIATE`` transaction, which serialises
+        writers across every process sharing the database file.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            self._prune_expired(conn, now)
+            if self._is_duplicate(conn, submission, now):
+                return False
+            self._insert(conn, submission, now, expire_at)
+            self._publish(conn, submission.dashboard_id, added_event(submission), now)
+        return True
+
+    def get(self, submission_id: str, dashboard_id: Optional[int] = None):
+        result = self.get_many([submission_id], dashboard_id=dashboard_id)
+        return result[0] if result else None
+
+    def get_many(self, submission_ids: List[str], with_photos: bool = True,
+                 dashboard_id: Optional[int] = None) -> list:
+        """Return the submissions for *submission_ids* in the given order.
+
+        Ids outside *dashboard_id*, when given, are skipped.
+        """
+        ids = list(submission_ids)
+        if not ids:
+            return []
+
+        conn = self._conn()
+        placeholders = ",".join("?" * len(ids))
+        dashboard_filter = "" if dashboard_id is None else " AND dashboard_id = ?"
+        rows = conn.execute(
+            f"SELECT submission_id, payload FROM submissions "
+            f"WHERE submission_id IN ({placeholders}) AND expires_at > ?{dashboard_filter}",
+            [*ids, time.time()] + ([] if dashboard_id is None else [dashboard_id]),
+        ).fetchall()
+        payloads = dict(rows)
+
+        photos = {}
+        if with_photos and payloads:
+            for sid, _idx, data in conn.execute(
+                f"SELECT submission_id, idx, data FROM photos "
+                f"WHERE submission_id IN ({placeholders}) ORDER BY submission_id, idx",
+                ids,
+            ):
+                photos.setdefault(sid, []).append(bytes(data))
+
+        result = []
+        for sid in ids:
+            if sid not in payloads:
+                continue
+            try:
+                result.append(self._build_submission(payloads[sid], photos.get(sid, []), with_photos))
+            except Exception as exc:
+                logger.warning("Failed to deserialize submission %s: %s", sid, exc)
+        return result
+
+    def get_photo(self, submission_id: str, index: int,
+                  dashboard_id: Optional[int] = None) -> Optional[bytes]:
+        """Store-held photo *index* of a submission, without loading its other photos."""
+        dashboard_filter = "" if dashboard_id is None else " AND s.dashboard_id = ?"
+        row = self._conn().execute(
+            "SELECT p.data FROM photos p JOIN submissions s USING (submission_id) "
+            f"WHERE p.submission_id = ? AND p.idx = ? AND s.expires_at > ?{dashboard_filter}",
+            [submission_id, index, time.time()] + ([] if dashboard_id is None else [dashboard_id]),
+        ).fetchone()
+        return bytes(row[0]) if row else None
+
+    def list_for_dashboard(self, dashboard_id: int) -> list:
+        rows = self._conn().execute(
+            "SELECT submission_id FROM submissions WHERE dashboard_id = ? AND expires_at > ? "
+            "ORDER BY score, submission_id",
+            (dashboard_id, time.time()),
+        ).fetchall()
+        return self.get_many([sid for (sid,) in rows])
+
+    def list_summaries_for_dashboard(self, dashboard_id: int) -> list:
+        rows = self._conn().execute(
+            "SELECT submission_id, dashboard_id, guest_name, crime_type, received_at, "
+            "photo_keys, photo_count FROM submissions WHERE dashboard_id = ? AND expires_at > ? "
+            "ORDER BY score, submission_id",
+            (dashboard_id, time.time()),
+        ).fetchall()
+        return [self._build_summary(row) for row in rows]
+
+    def iter_for_dashboard(
+        self, dashboard_id: int, cursor: Optional[str] = None, limit: int = 50
+    ) -> Tuple[list, Optional[str]]:
+        """Return one page of summaries in received_at order and the next cursor."""
+        from app.store import _decode_cursor, _encode_cursor
+
+        if limit <= 0:
+            raise ValueError("limit must be positive")
+
+        score, after_id = _decode_cursor(cursor) if cursor else (float("-inf"), "")
+        rows = self._conn().execute(
+            "SELECT submission_id, dashboard_id, guest_name, crime_type, received_at, "
+            "photo_keys, photo_count, score FROM submissions "
+            "WHERE dashboard_id = ? AND expires_at > ? "
+            "AND (score > ? OR (score = ? AND submission_id > ?)) "
+            "ORDER BY score, submission_id LIMIT ?",
+            (dashboard_id, time.time(), score, score, after_id, limit + 1),
+        ).fetchall()
+
+        page = rows[:limit]
+        next_cursor = None
+        if len(rows) > limit:
+            next_cursor = _encode_cursor(page[-1][7], page[-1][0])
+        return [self._build_summary(row[:7]) for row in page], next_cursor
+
+    def delete(self, submission_id: str, dashboard_id: Optional[int] = None):
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT dashboard_id FROM submissions WHERE submission_id = ?",
+                (submission_id,),
+            ).fetchone()
+            if row is None or (dashboard_id is not None and row[0] != dashboard_id):
+                return
+            for table in ("photos", "rendered", "thumbnails", "submissions"):
+                conn.execute(f"DELETE FROM {table} WHERE submission_id = ?", (submission_id,))
+            self._publish(conn, row[0], removed_event(submission_id), time.time())
+
+    def purge_dashboard(self, dashboard_id: int) -> List[str]:
+        """Drop every submission of *dashboard_id*; return their external photo keys."""
+        with self._transaction() as conn:
+            photo_keys = []
+            rows = conn.execute(
+                "SELECT photo_keys FROM submissions WHERE dashboard_id = ?", (dashboard_id,)
+            ).fetchall()
+            for (keys,) in rows:
+                photo_keys.extend(json.loads(keys))
+            for table in ("photos", "rendered", "thumbnails"):
+                conn.execute(
+                    f"DELETE FROM {table} WHERE submission_id IN "
+                    "(SELECT submission_id FROM submissions WHERE dashboard_id = ?)",
+                    (dashboard_id,),
+                )
+            conn.execute("DELETE FROM submissions WHERE dashboard_id = ?", (dashboard_id,))
+            conn.execute("DELETE FROM dedup WHERE dashboard_id = ?", (dashboard_id,))
+            conn.execute("DELETE FROM answer_keys WHERE dashboard_id = ?", (dashboard_id,))
+            if not rows:
+                # An empty or unknown room: nothing to version or announce.
+                return photo_keys
+            # Dropping the version makes clients holding the old one reload.
+            conn.execute("DELETE FROM versions WHERE dashboard_id = ?", (dashboard_id,))
+            conn.execute("DELETE FROM changes WHERE dashboard_id = ?", (dashboard_id,))
+            self._append_event(conn, dashboard_id, PURGED_EVENT, time.time())
+
+        # Delete photos from external storage outside the write transaction
+        try:
+            from flask import current_app
+            storage = getattr(current_app, "photo_storage", None)
+            if storage:
+                for key in photo_keys:
+                    try:
+                        storage.delete(key)
+                    except Exception:
+                        pass
+        except RuntimeError:
+            pass  # No application context (e.g. tests)
+
+        return photo_keys
+
+    def set_dashboard_expiry(self, dashboard_id: int, expire_at: Optional[float]) -> int:
+        """Move the expiry of every row of *dashboard_id*; returns rows updated."""
+        expires_at = _row_expires_at(expire_at, time.time())
+        with self._transaction() as conn:
+            updated = conn.execute(
+                "UPDATE submissions SET expires_at = ? WHERE dashboard_id = ?",
+                (expires_at, dashboard_id),
+            ).rowcount
+            for table in ("dedup", "answer_keys"):
+                conn.execute(
+                    f"UPDATE {table} SET expires_at = ? WHERE dashboard_id = ?",
+                    (expires_at, dashboard_id),
+                )
+        return updated
+
+    def subscribe(self, dashboard_id: int) -> _SQLiteSubscription:
+        """Follow changes to *dashboard_id*'s pending list, from any worker."""
+        return _SQLiteSubscription(self, dashboard_id)
+
+    def version_for_dashboard(self, dashboard_id: int) -> int:
+        """Version of the pending list, bumped by every add and delete; a purge resets it."""
+        row = self._conn().execute(
+            "SELECT version FROM versions WHERE dashboard_id = ?", (dashboard_id,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def changes_since(
+        self, dashboard_id: int, since: int
+    ) -> Optional[Tuple[int, List[str], List[str]]]:
+        """Return ``(version, added_ids, removed_ids)`` after version *since*, or None."""
+        from app.store import _net_changes
+
+        conn = self._conn()
+        # One read transaction so the version and the log agree.
+        conn.execute("BEGIN")
+        try:
+            version = self.version_for_dashboard(dashboard_id)
+            entries = conn.execute(
+                "SELECT version, op, submission_id FROM changes "
+                "WHERE dashboard_id = ? AND version > ? ORDER BY version",
+                (dashboard_id, since),
+            ).fetchall()
+        finally:
+            conn.execute("COMMIT")
+        delta = _net_changes(entries, since, version)
+        return None if delta is None else (version, *delta)
+
+    def count_for_dashboard(self, dashboard_id: int) -> int:
+        (count,) = self._conn().execute(
+            "SELECT COUNT(*) FROM submissions WHERE dashboard_id = ? AND expires_at > ?",
+            (dashboard_id, time.time()),
+        ).fetchone()
+        return count
+
+    def get_rendered(self, submission_id: str, dashboard_id: Optional[int] = None) -> Optional[dict]:
+        """Cached rendering of a submission, or None (see app.renderer.cache).
+
+        *dashboard_id* exists for interface parity with the Redis store.
+        """
+        row = self._conn().execute(
+            "SELECT payload FROM rendered WHERE submission_id = ?", (submission_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_rendered_many(self, submission_ids: List[str],
+                          dashboard_id: Optional[int] = None) -> dict:
+        """Cached renderings of *submission_ids* that exist, keyed by id, in one query."""
+        ids = list(submission_ids)
+        if not ids:
+            return {}
+        placeholders = ",".join("?" * len(ids))
+        rows = self._conn().execute(
+            f"SELECT submission_id, payload FROM rendered WHERE submission_id IN ({placeholders})",
+            ids,
+        ).fetchall()
+        return {sid: json.loads(payload) for sid, payload in rows}
+
+    def set_rendered(self, submission_id: str, dashboard_id: int, rendered: dict) -> bool:
+        """Cache *rendered* next to the submission; False if it is already gone."""
+        with self._transaction() as conn:
+            return conn.execute(
+                "INSERT OR REPLACE INTO rendered (submission_id, payload) SELECT ?, ? "
+                "WHERE EXISTS (SELECT 1 FROM submissions WHERE submission_id = ? "
+                "AND dashboard_id = ? AND expires_at > ?)",
+                (submission_id, json.dumps(rendered), submission_id, dashboard_id, time.time()),
+            ).rowcount > 0
+
+    def get_thumbnail(self, submission_id: str, index: int, size: str,
+                      dashboard_id: Optional[int] = None) -> Optional[bytes]:
+        """Downscaled copy of the store-held photo *index*, or None (see app.renderer.thumbnails)."""
+        row = self._conn().execute(
+            "SELECT data FROM thumbnails WHERE submission_id = ? AND idx = ? AND size = ?",
+            (submission_id, index, size),
+        ).fetchone()
+        return bytes(row[0]) if row else None
+
+    def set_thumbnail(self, submission_id: str, dashboard_id: int, index: int,
+                      size: str, data: bytes) -> bool:
+        """Keep a downscaled copy of photo *index*; False if the submission is already gone."""
+        with self._transaction() as conn:
+            return conn.execute(
+                "INSERT OR REPLACE INTO thumbnails (submission_id, idx, size, data) "
+                "SELECT ?, ?, ?, ? WHERE EXISTS (SELECT 1 FROM submissions WHERE "
+                "submission_id = ? AND dashboard_id = ? AND expires_at > ?)",
+                (submission_id, index, size, data,
+                 submission_id, dashboard_id, time.time()),
+            ).rowcount > 0
+
+    def answer_keys_for_dashboard(self, dashboard_id: int) -> List[str]:
+        """Answer keys seen in *dashboard_id* since its last purge, first-seen first."""
+        rows = self._conn().execute(
+            "SELECT answer_key FROM answer_keys WHERE dashboard_id = ? AND expires_at > ? "
+            "ORDER BY rowid",
+            (dashboard_id, time.time()),
+        ).fetchall()
+        return [key for (key,) in rows]
+
+    def count_many(self, dashboard_ids) -> dict:
+        """Pending submissions per dashboard, in one grouped query."""
+        ids = list(dashboard_ids)
+        counts = dict.fromkeys(ids, 0)
+        if not ids:
+            return counts
+        placeholders = ",".join("?" * len(ids))
+        counts.update(self._conn().execute(
+            f"SELECT dashboard_id, COUNT(*) FROM submissions "
+            f"WHERE dashboard_id IN ({placeholders}) AND expires_at > ? GROUP BY dashboard_id",
+            [*ids, time.time()],
+        ).fetchall())
+        return counts
@@ -0,0 +1,437 @@
+"""Append-only journal + snapshot for the in-memory submission store.
+
+Gunicorn recycles workers every ``max_requests`` requests; without Redis
+that used to discard every pending submission held by the worker.  With a
+journal directory configured, the in-memory store appends each mutation
+to ``submissions.log`` and replays ``submissions.snap`` + the log when a
+worker boots.  Compaction folds the log into a fresh snapshot and drops
+entries whose room has expired: each ADD carries the room's expiry as the
+store received it (see :func:`app.store.dashboard_expire_at`), with the
+same grace as the Redis store; infinite rooms never expire and rooms
+without an expiry fall back to the 12-hour TTL.
+
+Both files are a sequence of records::
+
+    <4-byte big-endian length><1-byte op><body>
+
+    ADD    body = <4-byte entry length><codec entry>(<4-byte length><photo>)*
+    DELETE body = submission_id (UTF-8)
+    PURGE  body = dashboard_id (ASCII)
+    EXPIRY body = "<dashboard_id>:<expire_at>" (ASCII; empty expire_at = none)
+
+A truncated trailing record (crash mid-write) is ignored on replay.
+Writers from several processes are serialised with ``flock`` so records
+never interleave.  Records are streamed from disk: folding decodes only
+the entries, and compaction copies live ADD records byte-for-byte after
+renaming the log aside, so appends never wait for it.
+"""
+
+import fcntl
+import logging
+import os
+import struct
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from app.storage.redis_codec import decode_entry, encode_entry
+
+logger = logging.getLogger(__name__)
+
+_TTL = 12 * 60 * 60  # 12 hours in seconds, same as the Redis store
+# Entries outlive their room's expiry by this much, as in the Redis store.
+_EXPIRY_GRACE = 15 * 60
+
+OP_ADD = 0x01
+OP_DELETE = 0x02
+OP_PURGE = 0x03
+OP_EXPIRY = 0x04
+
+_LEN = struct.Struct(">I")
+
+LOG_NAME = "submissions.log"
+SNAPSHOT_NAME = "submissions.snap"
+# The log is renamed to this while a compaction folds it into the snapshot.
+COMPACTING_NAME = "submissions.log.compacting"
+
+_COPY_CHUNK = 1024 * 1024
+
+
+def _encode_submission(submission, expire_at: Optional[float] = None) -> bytes:
+    entry = encode_entry({
+        "submission_id": submission.submission_id,
+        "dashboard_id": submission.dashboard_id,
+        "guest_name": submission.guest_name,
+        "dob": submission.dob,
+        "rg": submission.rg,
+        "cpf": submission.cpf,
+        "phone": submission.phone,
+        "address": submission.address,
+        "answers": submission.answers,
+        "narrative": submission.narrative,
+        "crime_type": submission.crime_type,
+        "received_at": submission.received_at.isoformat(),
+        "photo_keys": list(submission.photo_keys),
+        "expire_at": expire_at,
+    })
+    parts = [_LEN.pack(len(entry)), entry]
+    for photo in submission.photos:
+        photo = bytes(photo)  # reads back spilled photos
+        parts.append(_LEN.pack(len(photo)))
+        parts.append(photo)
+    return b"".join(parts)
+
+
+def _received_at(data: dict) -> datetime:
+    received_at = datetime.fromisoformat(data["received_at"])
+    if received_at.tzinfo is None:
+        received_at = received_at.replace(tzinfo=timezone.utc)
+    return received_at
+
+
+def _decode_submission(body: bytes):
+    """Return ``(submission, expire_at)`` for an ADD body."""
+    from app.store import Submission
+
+    (entry_len,) = _LEN.unpack_from(body, 0)
+    offset = _LEN.size + entry_len
+    data = decode_entry(body[_LEN.size:offset])
+    photos = []
+    while offset < len(body):
+        (photo_len,) = _LEN.unpack_from(body, offset)
+        offset += _LEN.size
+        photos.append(body[offset:offset + photo_len])
+        offset += photo_len
+
+    sub = Submission(
+        submission_id=data["submission_id"],
+        dashboard_id=data["dashboard_id"],
+        guest_name=data["guest_name"],
+        dob=data.get("dob"),
+        rg=data.get("rg"),
+        cpf=data.get("cpf"),
+        phone=data.get("phone"),
+        address=data.get("address"),
+        answers=data.get("answers", {}),
+        narrative=data.get("narrative"),
+        crime_type=data["crime_type"],
+        photos=photos,
+        received_at=_received_at(data),
+        photo_keys=data.get("photo_keys", []),
+    )
+    return sub, data.get("expire_at")
+
+
+def _expired(received_at: datetime, expire_at: Optional[float], now: float) -> bool:
+    if expire_at is None:
+        return received_at.timestamp() + _TTL <= now
+    if expire_at == 0:
+        return False
+    return expire_at + _EXPIRY_GRACE <= now
+
+
+def _record(op: int, body: bytes) -> bytes:
+    return _LEN.pack(len(body) + 1) + bytes([op]) + body
+
+
+def _open(path: str):
+    try:
+        return open(path, "rb")
+    except FileNotFoundError:
+        return None
+
+
+def _read_exact(fh, offset: int, length: int) -> bytes:
+    fh.seek(offset)
+    data = fh.read(length)
+    if len(data) != length:
+        raise EOFError(f"short read at offset {offset} of {fh.name}")
+    return data
+
+
+def _scan_records(fh, size: int) -> Iterator[Tuple[int, int, int, bytes]]:
+    """Yield ``(op, body offset, body length, head)`` for each record in *fh*.
+
+    Only headers are read: *head* is the codec entry of an ADD (its photos
+    are skipped, not read) and the whole body of every other op.  *size*
+    bounds the scan to what was written when the file was opened.
+    """
+    offset = 0
+    while offset + _LEN.size + 1 <= size:
+        header = _read_exact(fh, offset, _LEN.size + 1)
+        (length,) = _LEN.unpack_from(header, 0)
+        start = offset + _LEN.size
+        if length == 0 or start + length > size:
+            logger.warning("Ignoring truncated record at offset %s of %s", offset, fh.name)
+            return
+        op = header[_LEN.size]
+        body_offset, body_len = start + 1, length - 1
+        if op == OP_ADD:
+            (entry_len,) = _LEN.unpack(_read_exact(fh, body_offset, _LEN.size))
+            head = _read_exact(fh, body_offset + _LEN.size, entry_len)
+        else:
+            head = _read_exact(fh, body_offset, body_len)
+        yield op, body_offset, body_len, head
+        offset = start + length
+
+
+def _copy_range(src, dst, offset: int, length: int) -> None:
+    src.seek(offset)
+    while length > 0:
+        chunk = src.read(min(length, _COPY_CHUNK))
+        if not chunk:
+            raise EOFError(f"short read at offset {offset} of {src.name}")
+        dst.write(chunk)
+        length -= len(chunk)
+
+
+class _LiveEntry:
+    """Where an unexpired ADD body sits on disk, plus its decoded entry."""
+
+    __slots__ = ("fh", "body_offset", "body_len", "entry_len", "data", "expire_at")
+
+    def __init__(self, fh, body_offset: int, body_len: int, entry_len: int, data: dict):
+        self.fh = fh
+        self.body_offset = body_offset
+        self.body_len = body_len
+        self.entry_len = entry_len
+        self.data = data
+        self.expire_at = data.get("expire_at")
+
+    def write_to(self, out) -> None:
+        """Write this ADD record to *out*, copying its photos byte-for-byte."""
+        if self.expire_at == self.data.get("expire_at"):
+            out.write(_LEN.pack(self.body_len + 1) + bytes([OP_ADD]))
+            _copy_range(self.fh, out, self.body_offset, self.body_len)
+            return
+        # The room's expiry changed: re-encode the entry, keep the photos.
+        data = {k: v for k, v in self.data.items() if k != "photo_encoding"}
+        data["expire_at"] = self.expire_at
+        entry = encode_entry(data)
+        photos_len = self.body_len - _LEN.size - self.entry_len
+        out.write(_LEN.pack(_LEN.size + len(entry) + photos_len + 1) + bytes([OP_ADD]))
+        out.write(_LEN.pack(len(entry)) + entry)
+        _copy_range(self.fh, out, self.body_offset + _LEN.size + self.entry_len, photos_len)
+
+    def read(self):
+        """Decode the full submission, photos included."""
+        body = _read_exact(self.fh, self.body_offset, self.body_len)
+        return _decode_submission(body)[0]
+
+
+class StoreJournal:
+    """Durable log of SubmissionStore mutations in *directory*."""
+
+    def __init__(self, directory: str, compact_every: int = 500, ttl: int = _TTL):
+        os.makedirs(directory, exist_ok=True)
+        self._log_path = os.path.join(directory, LOG_NAME)
+        self._compacting_path = os.path.join(directory, COMPACTING_NAME)
+        self._snapshot_path = os.path.join(directory, SNAPSHOT_NAME)
+        self._lock_path = os.path.join(directory, ".lock")
+        self._compact_lock_path = os.path.join(directory, ".compact.lock")
+        self._compact_every = compact_every
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._appended = 0
+
+    def _flock(self, path: Optional[str] = None, blocking: bool = True):
+        fd = os.open(path or self._lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return None
+        return fd
+
+    def _funlock(self, fd) -> None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def encode_add(self, submission, expire_at: Optional[float] = None) -> bytes:
+        """Return the ADD record for *submission*, ready for :meth:`append`.
+
+        Encoding reads every photo, so callers do it before taking their
+        own locks — and before photos are spilled to disk.
+        """
+        return _record(OP_ADD, _encode_submission(submission, expire_at))
+
+    def append(self, record: bytes) -> None:
+        """Append one encoded record; only this write is serialised."""
+        with self._lock:
+            fd = self._flock()
+            try:
+                log_fd = os.open(self._log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+                try:
+                    os.write(log_fd, record)
+                finally:
+                    os.close(log_fd)
+            finally:
+                self._funlock(fd)
+            self._appended += 1
+
+    def record_add(self, submission, expire_at: Optional[float] = None) -> None:
+        self.append(self.encode_add(submission, expire_at))
+
+    def record_delete(self, submission_id: str) -> None:
+        self.append(_record(OP_DELETE, submission_id.encode()))
+
+    def record_purge(self, dashboard_id: int) -> None:
+        self.append(_record(OP_PURGE, str(dashboard_id).encode()))
+
+    def record_expiry(self, dashboard_id: int, expire_at: Optional[float]) -> None:
+        value = "" if expire_at is None else repr(float(expire_at))
+        self.append(_record(OP_EXPIRY, f"{dashboard_id}:{value}".encode()))
+
+    def due_for_compaction(self) -> bool:
+        return self._appended >= self._compact_every
+
+    # ------------------------------------------------------------------
+    # Replay and compaction
+    # ------------------------------------------------------------------
+
+    def _open_locked(self, paths) -> List[Tuple[object, int]]:
+        """Open *paths* under the writer lock; return ``(file, size)`` pairs.
+
+        Sizes are taken under the lock, so a scan never sees a half-written
+        append, and open handles stay valid after a concurrent compaction
+        replaces or unlinks the files.
+        """
+        opened = []
+        with self._lock:
+            fd = self._flock()
+            try:
+                for path in paths:
+                    fh = _open(path)
+                    if fh is not None:
+                        opened.append((fh, os.fstat(fh.fileno()).st_size))
+            finally:
+                self._funlock(fd)
+        return opened
+
+    @staticmethod
+    def _fold(files) -> Dict[str, _LiveEntry]:
+        """Apply *files* in order; return the unexpired ADDs by submission_id.
+
+        Records are streamed: only entries are decoded and photos stay on
+        disk, referenced by offset.
+        """
+        live: Dict[str, _LiveEntry] = {}
+        for fh, size in files:
+            for op, body_offset, body_len, head in _scan_records(fh, size):
+                if op == OP_ADD:
+                    try:
+                        data = decode_entry(head)
+                    except Exception as exc:
+                        logger.warning("Skipping unreadable journal entry: %s", exc)
+                        continue
+                    live[data["submission_id"]] = _LiveEntry(
+                        fh, body_offset, body_len, len(head), data
+                    )
+                elif op == OP_DELETE:
+                    live.pop(head.decode(), None)
+                elif op == OP_PURGE:
+                    dashboard_id = int(head)
+                    for sid in [s for s, item in live.items() if item.data["dashboard_id"] == dashboard_id]:
+                        del live[sid]
+                elif op == OP_EXPIRY:
+                    dashboard_id, _, value = head.decode().partition(":")
+                    expire_at = float(value) if value else None
+                    for item in live.values():
+                        if item.data["dashboard_id"] == int(dashboard_id):
+                            item.expire_at = expire_at
+        now = time.time()
+        return {
+            sid: item for sid, item in live.items()
+            if not _expired(_received_at(item.data), item.expire_at, now)
+        }
+
+    def compact(self, blocking: bool = True) -> Optional[int]:
+        """Fold snapshot + log into a fresh snapshot.
+
+        The log is rotated aside under the writer lock, so appends go on
+        while the snapshot is rewritten; live ADD records are copied
+        byte-for-byte.  Folding the files (rather than dumping this
+        worker's memory) keeps records appended by other workers sharing
+        the directory.  Returns the number of submissions kept, or None
+        when another process is already compacting and *blocking* is False.
+        """
+        compact_fd = self._flock(self._compact_lock_path, blocking)
+        if compact_fd is None:
+            return None
+        try:
+            with self._lock:
+                fd = self._flock()
+                try:
+                    # A leftover file is a compaction that died midway:
+                    # finish it first, the log keeps growing meanwhile.
+                    if not os.path.exists(self._compacting_path) and os.path.exists(self._log_path):
+                        os.replace(self._log_path, self._compacting_path)
+                    self._appended = 0
+                finally:
+                    self._funlock(fd)
+
+            files = [(fh, os.fstat(fh.fileno()).st_size)
+                     for fh in map(_open, (self._snapshot_path, self._compacting_path))
+                     if fh is not None]
+            try:
+                live = self._fold(files)
+                tmp_path = self._snapshot_path + ".tmp"
+                with open(tmp_path, "wb") as out:
+                    for item in live.values():
+                        item.write_to(out)
+                    out.flush()
+                    os.fsync(out.fileno())
+            finally:
+                for fh, _ in files:
+                    fh.close()
+
+            with self._lock:
+                fd = self._flock()
+                try:
+                    os.replace(tmp_path, self._snapshot_path)
+                    # Rotation also leaves a torn tail behind, so new
+                    # appends to the log stay readable.
+                    if os.path.exists(self._compacting_path):
+                        os.unlink(self._compacting_path)
+                finally:
+                    self._funlock(fd)
+            return len(live)
+        finally:
+            self._funlock(compact_fd)
+
+    def replay(self) -> Iterator:
+        """Compact, then yield the live, unexpired submissions in received_at order.
+
+        Submissions are decoded one at a time, so the caller can spill each
+        one's photos before the next is read.
+        """
+        self.compact()
+        files = self._open_locked((self._snapshot_path, self._compacting_path, self._log_path))
+        try:
+            live = self._fold(files)
+            order = sorted(live.items(), key=lambda kv: (_received_at(kv[1].data), kv[0]))
+            del live
+            for _, item in order:
+                try:
+                    yield item.read()
+                except Exception as exc:
+                    logger.warning("Skipping unreadable journal entry: %s", exc)
+        finally:
+            for fh, _ in files:
+                fh.close()
+
+
+def build_journal(directory: Optional[str]) -> Optional[StoreJournal]:
+    """Return a journal for *directory*, or None when it is unset or unusable."""
+    if not directory:
+        return None
+    try:
+        return StoreJournal(directory)
+    except OSError as exc:
+        logger.warning("Submission journal disabled — cannot use %s: %s", directory, exc)
+        return None
@@ -1,10 +1,18 @@
+import bisect
 import hashlib
 import re
+import sys
 import threading
+import time
 import uuid
-from datetime import datetime, timezone
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta, timezone
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Set
+from typing import Dict, List, Optional, Set, Tuple
+
+
+class StoreUnavailableError(RuntimeError):
+    """The store cannot take writes right now (e.g. its disk is full)."""
 
 
 def _normalize_name(name: str) -> str:
@@ -21,33 +29,377 @@ def _normalize_rg(rg: str) -> str:
     return re.sub(r"\D", "", rg)
 
 
-@dataclass
+def _index_score(received_at: datetime) -> float:
+    """Ordering score of a submission in its dashboard index."""
+    if received_at.tzinfo is None:
+        received_at = received_at.replace(tzinfo=timezone.utc)
+    return received_at.timestamp()
+
+
+def dashboard_expire_at(session) -> Optional[float]:
+    """Expiry of a DashboardSession as epoch seconds, for store key TTLs.
+
+    Returns 0 for infinite rooms (keys never expire) and None when the
+    session has no expiry, in which case stores apply their default TTL.
+    """
+    if session.is_infinite:
+        return 0
+    if session.expires_at is None:
+        return None
+    return _index_score(session.expires_at)
+
+
+def _encode_cursor(score: float, submission_id: str) -> str:
+    """Opaque pagination cursor pointing just after (score, submission_id)."""
+    return f"{score!r}:{submission_id}"
+
+
+def _decode_cursor(cursor: str) -> Tuple[float, str]:
+    score, _, submission_id = cursor.partition(":")
+    return float(score), submission_id
+
+
+# Changes remembered per dashboard for ``changes_since`` deltas; clients
+# further behind get the full list.
+_CHANGE_LOG_LIMIT = 256
+
+
+def _seed_version() -> int:
+    """First version of a dashboard: a millisecond clock reading, so versions
+    keep increasing when a store restarts empty."""
+    return int(time.time() * 1000)
+
+
+def _net_changes(entries, since: int, version: int) -> Optional[Tuple[List[str], List[str]]]:
+    """Net (added, removed) submission ids after version *since*.
+
+    *entries* are ``(version, op, submission_id)`` in ascending order, where
+    op is ``"added"``, ``"removed"`` or ``"purge"``.  Returns None when the
+    log no longer reaches back to *since* or a purge happened after it —
+    the caller must then send the full list.
+    """
+    if since == version:
+        return [], []
+    if since > version:
+        return None
+    last: Dict[str, str] = {}
+    expected = since + 1
+    for entry_version, op, submission_id in entries:
+        if entry_version <= since:
+            continue
+        if entry_version != expected or op == "purge":
+            return None
+        expected += 1
+        last.pop(submission_id, None)  # keep ids in order of their last change
+        last[submission_id] = op
+    if expected != version + 1:
+        return None
+    added = [sid for sid, op in last.items() if op == "added"]
+    removed = [sid for sid, op in last.items() if op == "removed"]
+    return added, removed
+
+
+class _EmptyAnswers(dict):
+    """Read-only empty dict shared by every submission without answers."""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("shared empty answers are read-only")
+
+    __setitem__ = __delitem__ = update = setdefault = pop = popitem = clear = _readonly
+
+
+_EMPTY_ANSWERS = _EmptyAnswers()
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _intern_keys(value):
+    """Return *value* with every dict key interned, recursively."""
+    if isinstance(value, dict):
+        return {
+            sys.intern(k) if isinstance(k, str) else k: _intern_keys(v)
+            for k, v in value.items()
+        }
+    if isinstance(value, list):
+        return [_intern_keys(v) for v in value]
+    return value
+
+
+def _to_epoch_us(received_at: datetime) -> int:
+    if received_at.tzinfo is None:
+        received_at = received_at.replace(tzinfo=timezone.utc)
+    delta = received_at - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
 class Submission:
+    """A pending guest submission, kept in a compact slotted form.
+
+    ``crime_type`` and answer keys are interned (a room repeats the same
+    handful of values thousands of times), submissions without answers
+    share one read-only empty dict, and ``received_at`` is held as integer
+    epoch microseconds and only turned into a UTC ``datetime`` on access.
+    """
+
+    __slots__ = (
+        "submission_id", "dashboard_id", "guest_name", "dob", "rg", "cpf",
+        "phone", "address", "answers", "narrative", "crime_type", "photos",
+        "_received_us", "photo_keys", "stored_photo_count",
+    )
+
+    def __init__(
+        self,
+        submission_id: str,
+        dashboard_id: int,
+        guest_name: str,
+        dob: Optional[str],
+        rg: Optional[str],
+        cpf: Optional[str],
+        phone: Optional[str],
+        address: Optional[str],
+        answers: Dict,
+        narrative: Optional[str],
+        crime_type: str,
+        photos: List[bytes],
+        received_at: datetime,
+        photo_keys: Optional[List[str]] = None,
+        stored_photo_count: Optional[int] = None,
+    ):
+        self.submission_id = submission_id
+        self.dashboard_id = dashboard_id
+        self.guest_name = guest_name
+        self.dob = dob
+        self.rg = rg
+        self.cpf = cpf
+        self.phone = phone
+        self.address = address
+        self.answers = _intern_keys(answers) if answers else _EMPTY_ANSWERS
+        self.narrative = narrative
+        self.crime_type = sys.intern(crime_type)
+        # Photo payloads; the in-memory store may replace large ones with
+        # SpilledPhoto handles — use bytes(photo) to read either kind.
+        self.photos = photos
+        self._received_us = _to_epoch_us(received_at)
+        # Storage keys for photos saved via photo_storage (S3 / local disk).
+        # When set, photos bytes are not kept in memory.  Defaults to empty list
+        # for backward compatibility with existing in-memory submissions.
+        self.photo_keys = photo_keys if photo_keys is not None else []
+        # Photos held by the store, set when it was read without them
+        # (``get_many(..., with_photos=False)``); None means len(photos).
+        self.stored_photo_count = stored_photo_count
+
+    @property
+    def photo_count(self) -> int:
+        """Total attachments: external photo_keys plus photos held by the store."""
+        stored = len(self.photos) if self.stored_photo_count is None else self.stored_photo_count
+        return len(self.photo_keys) + stored
+    @property
+    def received_at(self) -> datetime:
+        return _EPOCH + timedelta(microseconds=self._received_us)
+
+    @received_at.setter
+    def received_at(self, value: datetime) -> None:
+        self._received_us = _to_epoch_us(value)
+
+    @property
+    def received_ts(self) -> float:
+        """``received_at`` as a POSIX timestamp, without building a datetime."""
+        return self._received_us / 1_000_000
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return all(getattr(self, f) == getattr(other, f) for f in self.__slots__)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return (
+            f"Submission(submission_id={self.submission_id!r}, "
+            f"dashboard_id={self.dashboard_id!r}, crime_type={self.crime_type!r}, "
+            f"received_at={self.received_at!r}, photos={len(self.photos)})"
+        )
+
+
+@dataclass
+class SubmissionSummary:
+    """Listing projection of a Submission — never carries photo bytes."""
     submission_id: str
     dashboard_id: int
     guest_name: str
-    dob: Optional[str]
-    rg: Optional[str]
-    cpf: Optional[str]
-    phone: Optional[str]
-    address: Optional[str]
-    answers: Dict
-    narrative: Optional[str]
     crime_type: str
-    photos: List[bytes]
     received_at: datetime
-    # Storage keys for photos saved via photo_storage (S3 / local disk).
-    # When set, photos bytes are not kept in memory.  Defaults to empty list
-    # for backward compatibility with existing in-memory submissions.
     photo_keys: List[str] = field(default_factory=list)
+    # Total attachments: external photo_keys plus photos held by the store.
+    photo_count: int = 0
+
+    @classmethod
+    def from_submission(cls, submission: Submission) -> "SubmissionSummary":
+        return cls(
+            submission_id=submission.submission_id,
+            dashboard_id=submission.dashboard_id,
+            guest_name=submission.guest_name,
+            crime_type=submission.crime_type,
+            received_at=submission.received_at,
+            photo_keys=list(submission.photo_keys),
+            photo_count=submission.photo_count,
+        )
 
 
 class SubmissionStore:
-    def __init__(self):
-        self._lock = threading.Lock()
+    def __init__(self, journal=None, stripes: int = 16,
+                 memory_budget: Optional[int] = None,
+                 spill_threshold: int = 256 * 1024,
+                 spill_dir: Optional[str] = None):
+        # Per-dashboard lock striping: a dashboard's index, dedup set and the
+        # _store entries of its submissions are only mutated under the
+        # stripe lock for that dashboard, so rooms never wait on each other.
+        # Lookups by submission_id are single dict reads and take no lock.
+        self._stripes = [threading.Lock() for _ in range(max(1, stripes))]
         self._store: Dict[str, Submission] = {}  # submission_id -> Submission
-        self._dashboard_index: Dict[int, List[str]] = {}  # dashboard_id -> [submission_ids]
+        # dashboard_id -> {submission_id: index score}, in received_at order
+        self._dashboard_index: Dict[int, "OrderedDict[str, float]"] = {}
+        # dashboard_id -> sorted [(score, submission_id)], bisected by
+        # iter_for_dashboard so a page costs O(log n + limit)
+        self._dashboard_order: Dict[int, List[Tuple[float, str]]] = {}
         self._dedup_index: Dict[int, Set[str]] = {}
+        # submission_id -> cached rendering (see app.renderer.cache); entries
+        # live and die with their submission
+        self._rendered: Dict[str, dict] = {}
+        # submission_id -> {(photo index, size): JPEG bytes}, downscaled
+        # copies of the photos held here (see app.renderer.thumbnails)
+        self._thumbnails: Dict[str, Dict[Tuple[int, str], bytes]] = {}
+        # dashboard_id -> answer keys in first-seen order (CSV columns)
+        self._answer_keys: Dict[int, Dict[str, None]] = {}
+        # dashboard_id -> list version, and its recent (version, op, id) log
+        self._versions: Dict[int, int] = {}
+        self._changes: Dict[int, deque] = {}
+        # Photo bytes per dashboard: {"memory_bytes": n, "spilled_bytes": n}.
+        self._usage: Dict[int, Dict[str, int]] = {}
+        # With a memory budget, photos >= spill_threshold — and any photo
+        # that would exceed the budget — are spilled to temp files.  The
+        # budget is soft: concurrent adds may overshoot it slightly.
+        self._memory_budget = memory_budget
+        self._spill_threshold = spill_threshold
+        self._spill_dir = spill_dir
+        self._memory_bytes = 0
+        self._usage_lock = threading.Lock()
+        from app.storage.change_feed import LocalChangeFeed
+        self._feed = LocalChangeFeed()
+        # Optional StoreJournal: mutations are appended to disk and replayed
+        # here so a recycled worker keeps its pending submissions.
+        self._journal = journal
+        # Compaction runs on this background thread, one at a time.
+        self._compactor: Optional[threading.Thread] = None
+        self._compactor_lock = threading.Lock()
+        if memory_budget is not None:
+            # Files spilled by recycled or crashed workers are unreachable.
+            from app.storage.photo_spill import sweep_stale_spills
+            sweep_stale_spills(spill_dir)
+        if journal is not None:
+            for submission in journal.replay():
+                self._spill_photos(submission)
+                self._add_locked(submission)
+
+    def _lock_for(self, dashboard_id: int) -> threading.Lock:
+        return self._stripes[hash(dashboard_id) % len(self._stripes)]
+
+    def _spill_photos(self, submission: Submission) -> None:
+        """Replace large photo payloads by on-disk SpilledPhoto handles."""
+        if self._memory_budget is None or not submission.photos:
+            return
+        submission.photos = [self._maybe_spill(photo) for photo in submission.photos]
+
+    def _maybe_spill(self, data):
+        """Spill *data* to disk when it is large or would exceed the memory budget."""
+        if self._memory_budget is None or not isinstance(data, bytes):
+            return data
+        if len(data) < self._spill_threshold and self._memory_bytes + len(data) <= self._memory_budget:
+            return data
+        from app.storage.photo_spill import spill_photo
+
+        try:
+            return spill_photo(data, self._spill_dir)
+        except OSError as exc:
+            import logging
+            logging.getLogger(__name__).warning("Photo spill failed, keeping in memory: %s", exc)
+            return data
+
+    @classmethod
+    def _discard_spilled(cls, submissions) -> None:
+        for sub in submissions:
+            cls._discard_payloads(sub.photos)
+
+    @staticmethod
+    def _discard_payloads(payloads) -> None:
+        from app.storage.photo_spill import SpilledPhoto
+
+        for payload in payloads:
+            if isinstance(payload, SpilledPhoto):
+                payload.discard()
+
+    def _account_locked(self, submission: Submission, sign: int) -> None:
+        self._account_bytes_locked(submission.dashboard_id, submission.photos, sign)
+
+    def _account_bytes_locked(self, dashboard_id: int, payloads, sign: int) -> None:
+        """Count photo or thumbnail *payloads* in (sign=1) or out of (sign=-1) the usage."""
+        from app.storage.photo_spill import SpilledPhoto
+
+        memory = spilled = 0
+        for photo in payloads:
+            if isinstance(photo, SpilledPhoto):
+                spilled += len(photo)
+            else:
+                memory += len(photo)
+        usage = self._usage.setdefault(
+            dashboard_id, {"memory_bytes": 0, "spilled_bytes": 0}
+        )
+        usage["memory_bytes"] += sign * memory
+        usage["spilled_bytes"] += sign * spilled
+        with self._usage_lock:
+            self._memory_bytes += sign * memory
+
+    def _drop_thumbnails_locked(self, submission_id: str, dashboard_id: int) -> list:
+        """Forget *submission_id*'s thumbnails; return them for _discard_spilled."""
+        thumbs = list(self._thumbnails.pop(submission_id, {}).values())
+        self._account_bytes_locked(dashboard_id, thumbs, -1)
+        return thumbs
+
+    def _compact_journal(self) -> None:
+        try:
+            self._journal.compact(blocking=False)
+        except OSError as exc:
+            import logging
+            logging.getLogger(__name__).warning("Journal compaction failed: %s", exc)
+
+    def _compact_journal_if_due(self) -> None:
+        """Start a background compaction when the journal asks for one."""
+        if self._journal is None or not self._journal.due_for_compaction():
+            return
+        with self._compactor_lock:
+            if self._compactor is not None and self._compactor.is_alive():
+                return
+            self._compactor = threading.Thread(
+                target=self._compact_journal, name="journal-compaction", daemon=True
+            )
+            self._compactor.start()
+
+    def _encode_for_journal(self, submission: Submission,
+                            expire_at: Optional[float]) -> Optional[bytes]:
+        """Encode the ADD record before any lock is taken and photos are spilled."""
+        if self._journal is None:
+            return None
+        return self._journal.encode_add(submission, expire_at)
+
+    def _journal_call(self, method: str, *args) -> None:
+        """Append a mutation to the journal; a failing disk never blocks intake."""
+        if self._journal is None:
+            return
+        try:
+            getattr(self._journal, method)(*args)
+        except OSError as exc:
+            import logging
+            logging.getLogger(__name__).warning("Journal write failed: %s", exc)
     
     def _dedup_keys(self, submission: Submission) -> list:
         keys = []
@@ -60,75 +412,363 @@ class SubmissionStore:
                 keys.append(f"rg:{hashlib.sha256(norm_rg.encode()).hexdigest()[:16]}")
         return keys
 
+    def _is_duplicate_locked(self, submission: Submission) -> bool:
+        existing = self._dedup_index.get(submission.dashboard_id, set())
+        for key in self._dedup_keys(submission):
+            if key in existing:
+                return True
+        return False
+
+    def _add_locked(self, submission: Submission) -> str:
+        sid = submission.submission_id
+        self._store[sid] = submission
+        self._account_locked(submission, 1)
+        index = self._dashboard_index.setdefault(submission.dashboard_id, OrderedDict())
+        order = self._dashboard_order.setdefault(submission.dashboard_id, [])
+        score = submission.received_ts
+        previous = index.pop(sid, None)
+        if previous is not None:
+            self._unorder_locked(submission.dashboard_id, previous, sid)
+        index[sid] = score
+        if not order or (score, sid) > order[-1]:
+            order.append((score, sid))
+        else:
+            # Arrived out of order (racing threads): restore (score, id) order.
+            bisect.insort(order, (score, sid))
+            self._dashboard_index[submission.dashboard_id] = OrderedDict(
+                (member, member_score) for member_score, member in order
+            )
+        if submission.dashboard_id not in self._dedup_index:
+            self._dedup_index[submission.dashboard_id] = set()
+        for key in self._dedup_keys(submission):
+            self._dedup_index[submission.dashboard_id].add(key)
+        if submission.answers:
+            keys = self._answer_keys.setdefault(submission.dashboard_id, {})
+            for key in submission.answers:
+                keys.setdefault(key, None)
+        return sid
+
+    def _unorder_locked(self, dashboard_id: int, score: float, submission_id: str) -> None:
+        order = self._dashboard_order.get(dashboard_id, [])
+        position = bisect.bisect_left(order, (score, submission_id))
+        if position < len(order) and order[position] == (score, submission_id):
+            del order[position]
+
+    def _bump_locked(self, dashboard_id: int, op: str, submission_id: Optional[str]) -> None:
+        version = (self._versions.get(dashboard_id) or _seed_version()) + 1
+        self._versions[dashboard_id] = version
+        log = self._changes.get(dashboard_id)
+        if log is None:
+            log = self._changes[dashboard_id] = deque(maxlen=_CHANGE_LOG_LIMIT)
+        log.append((version, op, submission_id))
+
+    def _publish_added(self, submission: Submission) -> None:
+        from app.storage.change_feed import added_event
+        self._feed.publish(submission.dashboard_id, added_event(submission))
+
     def is_duplicate(self, submission: Submission) -> bool:
-        with self._lock:
-            existing = self._dedup_index.get(submission.dashboard_id, set())
-            for key in self._dedup_keys(submission):
-                if key in existing:
-                    return True
-            return False
-
-    def add(self, submission: Submission) -> str:
-        with self._lock:
-            sid = submission.submission_id
-            self._store[sid] = submission
-            if submission.dashboard_id not in self._dashboard_index:
-                self._dashboard_index[submission.dashboard_id] = []
-            self._dashboard_index[submission.dashboard_id].append(sid)
-            if submission.dashboard_id not in self._dedup_index:
-                self._dedup_index[submission.dashboard_id] = set()
-            for key in self._dedup_keys(submission):
-                self._dedup_index[submission.dashboard_id].add(key)
-            return sid
+        with self._lock_for(submission.dashboard_id):
+            return self._is_duplicate_locked(submission)
+
+    def add(self, submission: Submission, expire_at: Optional[float] = None) -> str:
+        # In-memory rooms are only dropped by purge_dashboard; expire_at is
+        # journaled so compaction keeps each room for its own lifetime.
+        record = self._encode_for_journal(submission, expire_at)
+        self._spill_photos(submission)
+        with self._lock_for(submission.dashboard_id):
+            sid = self._add_locked(submission)
+            self._bump_locked(submission.dashboard_id, "added", sid)
+            if record is not None:
+                self._journal_call("append", record)
+        self._publish_added(submission)
+        self._compact_journal_if_due()
+        return sid
+
+    def add_if_unique(self, submission: Submission, expire_at: Optional[float] = None) -> bool:
+        """Insert *submission* unless its name/RG is already in the dashboard.
+
+        Check and insert happen under one acquisition of the dashboard's
+        lock, so concurrent submits of the same guest cannot both succeed.
+        Returns True when the submission was stored.
+        """
+        record = self._encode_for_journal(submission, expire_at)
+        self._spill_photos(submission)
+        with self._lock_for(submission.dashboard_id):
+            if self._is_duplicate_locked(submission):
+                self._discard_spilled([submission])
+                return False
+            self._add_locked(submission)
+            self._bump_locked(submission.dashboard_id, "added", submission.submission_id)
+            if record is not None:
+                self._journal_call("append", record)
+        self._publish_added(submission)
+        self._compact_journal_if_due()
+        return True
     
-    def get(self, submission_id: str) -> Optional[Submission]:
-        with self._lock:
-            return self._store.get(submission_id)
+    def get(self, submission_id: str, dashboard_id: Optional[int] = None) -> Optional[Submission]:
+        """Return one submission, or None if unknown or not in *dashboard_id*."""
+        sub = self._store.get(submission_id)
+        if sub is not None and dashboard_id is not None and sub.dashboard_id != dashboard_id:
+            return None
+        return sub
     
+    def get_many(self, submission_ids: List[str], with_photos: bool = True,
+                 dashboard_id: Optional[int] = None) -> List[Submission]:
+        """Return the submissions for *submission_ids* in the given order.
+
+        Unknown ids, and ids outside *dashboard_id* when given, are skipped.
+        *with_photos* exists for interface parity with the Redis store;
+        photos are never loaded eagerly here.
+        """
+        store = self._store
+        return [
+            sub for sub in map(store.get, submission_ids)
+            if sub is not None and (dashboard_id is None or sub.dashboard_id == dashboard_id)
+        ]
+
+    def get_photo(self, submission_id: str, index: int, dashboard_id: Optional[int] = None):
+        """Store-held photo *index* of a submission (bytes or SpilledPhoto), or None."""
+        sub = self._store.get(submission_id)
+        if sub is None or (dashboard_id is not None and sub.dashboard_id != dashboard_id):
+            return None
+        if not 0 <= index < len(sub.photos):
+            return None
+        return sub.photos[index]
+
     def list_for_dashboard(self, dashboard_id: int) -> List[Submission]:
-        with self._lock:
-            ids = self._dashboard_index.get(dashboard_id, [])
+        with self._lock_for(dashboard_id):
+            ids = self._dashboard_index.get(dashboard_id, {})
             return [self._store[sid] for sid in ids if sid in self._store]
     
-    def delete(self, submission_id: str):
-        with self._lock:
-            sub = self._store.pop(submission_id, None)
-            if sub:
-                ids = self._dashboard_index.get(sub.dashboard_id, [])
-                if submission_id in ids:
-                    ids.remove(submission_id)
-
-    def purge_dashboard(self, dashboard_id: int):
-        with self._lock:
-            # Delete photos from external storage before purging
-            try:
-                from flask import current_app
-                storage = getattr(current_app, "photo_storage", None)
-                if storage:
-                    ids = self._dashboard_index.get(dashboard_id, [])
-                    for sid in ids:
-                        sub = self._store.get(sid)
-                        if sub and sub.photo_keys:
-                            for key in sub.photo_keys:
-                                try:
-                                    storage.delete(key)
-                                except Exception:
-                                    pass
-            except RuntimeError:
-                pass  # No application context (e.g. tests)
-
-            ids = self._dashboard_index.pop(dashboard_id, [])
+    def list_summaries_for_dashboard(self, dashboard_id: int) -> List[SubmissionSummary]:
+        with self._lock_for(dashboard_id):
+            ids = self._dashboard_index.get(dashboard_id, {})
+            return [
+                SubmissionSummary.from_submission(self._store[sid])
+                for sid in ids if sid in self._store
+            ]
+
+    def iter_for_dashboard(
+        self, dashboard_id: int, cursor: Optional[str] = None, limit: int = 50
+    ) -> Tuple[List[SubmissionSummary], Optional[str]]:
+        """Return one page of summaries in received_at order and the next cursor.
+
+        Pass the returned cursor back to fetch the following page; it is
+        None once the last page has been returned.
+        """
+        if limit <= 0:
+            raise ValueError("limit must be positive")
+        after = _decode_cursor(cursor) if cursor else None
+        with self._lock_for(dashboard_id):
+            order = self._dashboard_order.get(dashboard_id, [])
+            start = bisect.bisect_right(order, after) if after is not None else 0
+            page = []
+            next_cursor = None
+            for position in range(start, len(order)):
+                score, sid = order[position]
+                sub = self._store.get(sid)
+                if sub is None:
+                    continue
+                if len(page) == limit:
+                    next_cursor = _encode_cursor(*last)
+                    break
+                page.append(SubmissionSummary.from_submission(sub))
+                last = (score, sid)
+            return page, next_cursor
+
+    def delete(self, submission_id: str, dashboard_id: Optional[int] = None):
+        sub = self.get(submission_id, dashboard_id)
+        if sub is None:
+            return
+        with self._lock_for(sub.dashboard_id):
+            if self._store.pop(submission_id, None) is None:
+                return  # Deleted or purged by another thread meanwhile
+            score = self._dashboard_index.get(sub.dashboard_id, {}).pop(submission_id, None)
+            if score is not None:
+                self._unorder_locked(sub.dashboard_id, score, submission_id)
+            self._rendered.pop(submission_id, None)
+            thumbs = self._drop_thumbnails_locked(submission_id, sub.dashboard_id)
+            self._account_locked(sub, -1)
+            self._bump_locked(sub.dashboard_id, "removed", submission_id)
+            self._journal_call("record_delete", submission_id)
+        from app.storage.change_feed import removed_event
+        self._feed.publish(sub.dashboard_id, removed_event(submission_id))
+        self._discard_spilled([sub])
+        self._discard_payloads(thumbs)
+        self._compact_journal_if_due()
+
+    def purge_dashboard(self, dashboard_id: int) -> List[str]:
+        """Drop every submission of *dashboard_id*; return their external photo keys."""
+        with self._lock_for(dashboard_id):
+            photo_keys = []
+            purged = []
+            thumbs = []
+            ids = self._dashboard_index.pop(dashboard_id, {})
+            self._dashboard_order.pop(dashboard_id, None)
             for sid in ids:
-                self._store.pop(sid, None)
+                self._rendered.pop(sid, None)
+                thumbs.extend(self._drop_thumbnails_locked(sid, dashboard_id))
+                sub = self._store.pop(sid, None)
+                if sub:
+                    purged.append(sub)
+                    photo_keys.extend(sub.photo_keys)
+                    self._account_locked(sub, -1)
+            self._usage.pop(dashboard_id, None)
             self._dedup_index.pop(dashboard_id, None)
+            self._answer_keys.pop(dashboard_id, None)
+            if not purged:
+                # An empty or unknown room: nothing to version or announce.
+                return photo_keys
+            # Dropping the version makes clients holding the old one reload.
+            self._versions.pop(dashboard_id, None)
+            self._changes.pop(dashboard_id, None)
+            self._journal_call("record_purge", dashboard_id)
+        from app.storage.change_feed import PURGED_EVENT
+        self._feed.publish(dashboard_id, PURGED_EVENT)
+
+        # Delete photos from external storage (network calls for S3) only
+        # after the dashboard's lock is released.
+        try:
+            from flask import current_app
+            storage = getattr(current_app, "photo_storage", None)
+            if storage:
+                for key in photo_keys:
+                    try:
+                        storage.delete(key)
+                    except Exception:
+                        pass
+        except RuntimeError:
+            pass  # No application context (e.g. tests)
+
+        self._discard_spilled(purged)
+        self._discard_payloads(thumbs)
+        self._compact_journal_if_due()
+        return photo_keys
     
     def count_for_dashboard(self, dashboard_id: int) -> int:
-        with self._lock:
-            return len([sid for sid in self._dashboard_index.get(dashboard_id, []) if sid in self._store])
+        with self._lock_for(dashboard_id):
+            return len(self._dashboard_index.get(dashboard_id, {}))
+
+    def version_for_dashboard(self, dashboard_id: int) -> int:
+        """Version of the pending list, bumped by every add and delete; a purge resets it."""
+        return self._versions.get(dashboard_id, 0)
+
+    def changes_since(
+        self, dashboard_id: int, since: int
+    ) -> Optional[Tuple[int, List[str], List[str]]]:
+        """Return ``(version, added_ids, removed_ids)`` after version *since*.
+
+        Returns None when *since* is too old (or unknown) for a delta.
+        """
+        with self._lock_for(dashboard_id):
+            version = self._versions.get(dashboard_id, 0)
+            delta = _net_changes(self._changes.get(dashboard_id, ()), since, version)
+        return None if delta is None else (version, *delta)
+
+    def get_rendered(self, submission_id: str, dashboard_id: Optional[int] = None) -> Optional[dict]:
+        """Cached rendering of a submission, or None (see app.renderer.cache).
+
+        *dashboard_id* exists for interface parity with the Redis store.
+        """
+        return self._rendered.get(submission_id)
+
+    def get_rendered_many(self, submission_ids: List[str],
+                          dashboard_id: Optional[int] = None) -> Dict[str, dict]:
+        """Cached renderings of *submission_ids* that exist, keyed by id."""
+        rendered = self._rendered
+        return {sid: rendered[sid] for sid in submission_ids if sid in rendered}
+
+    def set_rendered(self, submission_id: str, dashboard_id: int, rendered: dict) -> bool:
+        """Cache *rendered* next to the submission; False if it is already gone."""
+        with self._lock_for(dashboard_id):
+            sub = self._store.get(submission_id)
+            if sub is None or sub.dashboard_id != dashboard_id:
+                return False
+            self._rendered[submission_id] = rendered
+            return True
+
+    def get_thumbnail(self, submission_id: str, index: int, size: str,
+                      dashboard_id: Optional[int] = None) -> Optional[bytes]:
+        """Downscaled copy of the store-held photo *index*, or None (see app.renderer.thumbnails)."""
+        thumb = self._thumbnails.get(submission_id, {}).get((index, size))
+        if thumb is None:
+            return None
+        try:
+            return bytes(thumb)  # reads back a spilled thumbnail
+        except OSError:
+            return None
+
+    def set_thumbnail(self, submission_id: str, dashboard_id: int, index: int,
+                      size: str, data: bytes) -> bool:
+        """Keep a downscaled copy of photo *index*; False if the submission is already gone.
+
+        Thumbnails count towards the memory budget and spill like photos.
+        """
+        thumb = self._maybe_spill(data)
+        with self._lock_for(dashboard_id):
+            sub = self._store.get(submission_id)
+            if sub is None or sub.dashboard_id != dashboard_id:
+                replaced = [thumb]
+                stored = False
+            else:
+                thumbs = self._thumbnails.setdefault(submission_id, {})
+                previous = thumbs.get((index, size))
+                replaced = [previous] if previous is not None else []
+                self._account_bytes_locked(dashboard_id, replaced, -1)
+                thumbs[(index, size)] = thumb
+                self._account_bytes_locked(dashboard_id, [thumb], 1)
+                stored = True
+        self._discard_payloads(replaced)
+        return stored
+
+    def answer_keys_for_dashboard(self, dashboard_id: int) -> List[str]:
+        """Answer keys seen in *dashboard_id* since its last purge, first-seen first.
+
+        Maintained on insert, so it may still list keys of submissions
+        deleted since; callers get an empty column for those.
+        """
+        with self._lock_for(dashboard_id):
+            return list(self._answer_keys.get(dashboard_id, ()))
+
+    def count_many(self, dashboard_ids) -> Dict[int, int]:
+        """Pending submissions per dashboard, for every id in *dashboard_ids*."""
+        return {dashboard_id: self.count_for_dashboard(dashboard_id) for dashboard_id in dashboard_ids}
+
+    def set_dashboard_expiry(self, dashboard_id: int, expire_at: Optional[float]) -> int:
+        """Journal the room's new expiry (in-memory entries have no TTL).
+
+        Returns the submission count.
+        """
+        with self._lock_for(dashboard_id):
+            self._journal_call("record_expiry", dashboard_id, expire_at)
+            count = len(self._dashboard_index.get(dashboard_id, {}))
+        self._compact_journal_if_due()
+        return count
+
+    def subscribe(self, dashboard_id: int):
+        """Follow changes to *dashboard_id*'s pending list (this process only)."""
+        return self._feed.subscribe(dashboard_id)
+
+    def usage_for_dashboard(self, dashboard_id: int) -> Dict[str, int]:
+        """Photo and thumbnail bytes held for *dashboard_id*, in RAM and spilled to disk."""
+        with self._lock_for(dashboard_id):
+            return dict(self._usage.get(dashboard_id, {"memory_bytes": 0, "spilled_bytes": 0}))
+
+    @property
+    def memory_bytes(self) -> int:
+        """Photo and thumbnail bytes currently held in RAM across all dashboards."""
+        return self._memory_bytes
 
 
 def _build_store():
-    """Return a Redis-backed store if Redis is available, else in-memory."""
+    """Return a Redis-backed store if Redis is available, else a local one.
+
+    Without Redis, ``SUBMISSION_STORE=sqlite`` selects a SQLite file shared
+    by every worker on the host (``SUBMISSION_STORE_PATH``, defaulting to
+    the system temp dir); otherwise submissions live in this process's memory,
+    journaled to ``SUBMISSION_JOURNAL_DIR`` when set, with photos spilled to
+    disk beyond ``SUBMISSION_STORE_MEMORY_MB``.
+    """
     try:
         from app.redis_client import get_redis_client
         from app.storage.redis_store import RedisSubmissionStore
@@ -136,11 +776,32 @@ def _build_store():
         client = get_redis_client()
         if client is not None:
             import logging
+            import os
             logging.getLogger(__name__).info("Using Redis-backed submission store")
-            return RedisSubmissionStore(client)
+            return RedisSubmissionStore(
+                client,
+                compression=os.environ.get("REDIS_STORE_COMPRESSION", "zlib"),
+            )
     except Exception:
         pass
-    return SubmissionStore()
+
+    import os
+    if os.environ.get("SUBMISSION_STORE", "memory").lower() == "sqlite":
+        import logging
+        from app.storage.sqlite_store import SQLiteSubmissionStore, default_store_path
+
+        path = os.environ.get("SUBMISSION_STORE_PATH") or default_store_path()
+        logging.getLogger(__name__).info("Using SQLite submission store at %s", path)
+        return SQLiteSubmissionStore(path)
+
+    from app.storage.store_journal import build_journal
+    budget_mb = os.environ.get("SUBMISSION_STORE_MEMORY_MB")
+    return SubmissionStore(
+        journal=build_journal(os.environ.get("SUBMISSION_JOURNAL_DIR")),
+        memory_budget=int(budget_mb) * 1024 * 1024 if budget_mb else None,
+        spill_threshold=int(os.environ.get("SUBMISSION_SPILL_THRESHOLD_KB", 256)) * 1024,
+        spill_dir=os.environ.get("SUBMISSION_SPILL_DIR") or None,
+    )
 
 
 submission_store = _build_store()
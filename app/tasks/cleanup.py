@@ -34,15 +34,17 @@ try:
 
                 from app.store import submission_store
                 from app.models import DashboardSession
+                from app.storage.photo_storage import PHOTO_VARIANTS, variant_key
 
-                # Collect all active photo keys
+                # Collect all active photo keys, with their thumbnails
                 active_keys = set()
                 active_sessions = DashboardSession.query.filter_by(is_active=True).all()
                 for session in active_sessions:
-                    subs = submission_store.list_for_dashboard(session.id)
+                    subs = submission_store.list_summaries_for_dashboard(session.id)
                     for sub in subs:
-                        if sub.photo_keys:
-                            active_keys.update(sub.photo_keys)
+                        for key in sub.photo_keys or ():
+                            active_keys.add(key)
+                            active_keys.update(variant_key(key, v) for v in PHOTO_VARIANTS)
 
                 # Scan S3 and delete orphans
                 deleted = 0
@@ -35,7 +35,7 @@ def expire_sessions_task():
             expires = expires.replace(tzinfo=timezone.utc)
 
         if now >= expires:
-            pending = submission_store.list_for_dashboard(session.id)
+            pending = submission_store.list_summaries_for_dashboard(session.id)
             if pending:
                 now2 = datetime.now(timezone.utc)
 
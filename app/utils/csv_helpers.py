@@ -3,7 +3,10 @@
 import csv
 from io import StringIO
 
-from flask import make_response
+from flask import Response, has_request_context, stream_with_context
+
+# Encoded rows are sent in chunks of about this size.
+_FLUSH_BYTES = 16 * 1024
 
 
 def sanitize_csv_value(value):
@@ -17,20 +20,31 @@ def sanitize_csv_value(value):
 
 
 def generate_csv_response(data, filename):
-    """Generate an HTTP response with a CSV file.
+    """Generate a streamed HTTP response with a CSV file.
+
+    Rows are encoded as the response is sent, a few kilobytes at a time, so
+    *data* may be a generator over arbitrarily many rows.  Inside a request
+    the generator runs with the request context kept alive (database
+    queries, ``current_user``).
 
     :param data: Iterable of iterables (rows), each row is a list of values.
     :param filename: The filename for the Content-Disposition header.
     :returns: Flask response object.
     """
-    output = StringIO()
-    writer = csv.writer(output)
-
-    for row in data:
-        sanitized_row = [sanitize_csv_value(v) for v in row]
-        writer.writerow(sanitized_row)
-
-    response = make_response(output.getvalue())
+    def _generate():
+        output = StringIO()
+        writer = csv.writer(output)
+        for row in data:
+            writer.writerow([sanitize_csv_value(v) for v in row])
+            if output.tell() >= _FLUSH_BYTES:
+                yield output.getvalue()
+                output.seek(0)
+                output.truncate()
+        if output.tell():
+            yield output.getvalue()
+
+    body = stream_with_context(_generate()) if has_request_context() else _generate()
+    response = Response(body, mimetype="text/csv")
     response.headers["Content-Disposition"] = f"attachment; filename={filename}"
     response.headers["Content-Type"] = "text/csv; charset=utf-8"
     return response
@@ -0,0 +1,45 @@
+"""Handing media transfers to nginx with ``X-Accel-Redirect``.
+
+With ``MEDIA_ACCEL_REDIRECT`` enabled, the routes that serve attachments
+only authorise and audit the request, then answer with an empty response
+whose ``X-Accel-Redirect`` header points nginx at an internal location
+under ``MEDIA_ACCEL_PREFIX`` (see ``nginx.conf``).  nginx sends the bytes
+itself — straight from ``UPLOAD_FOLDER`` for local storage, or proxied
+from a short-lived pre-signed URL for S3 — and handles Range requests, so
+no gunicorn thread is held for the transfer.
+
+nginx keeps ``Cache-Control`` and ``Content-Disposition`` from the app's
+response; the MIME type is sniffed here and passed on by the backend.
+"""
+
+from typing import Callable, Dict, Optional
+
+from flask import Response, current_app
+
+from app.utils.mime import detect_mimetype
+
+# Leading bytes detect_mimetype needs to tell the formats apart.
+SNIFF_BYTES = 8
+
+
+def accel_response(storage, key: str,
+                   headers_for: Callable[[str], Dict[str, str]]) -> Optional[Response]:
+    """Redirect response for the photo at *key*, or None to send it from Python.
+
+    None is returned when offloading is disabled, when the backend cannot
+    offload, and when the photo is missing (the caller's own path then
+    answers 404).  *headers_for(mimetype)* gives the headers to keep.
+    """
+    if storage is None or not current_app.config.get("MEDIA_ACCEL_REDIRECT"):
+        return None
+    head = storage.download_stream(key, 0, SNIFF_BYTES)
+    if head is None or head.total == 0:
+        return None
+    mimetype = detect_mimetype(b"".join(head.chunks))
+    target = storage.accel_redirect(key, current_app.config.get("MEDIA_ACCEL_PREFIX", "/_media/"), mimetype)
+    if target is None:
+        return None
+    path, extra_headers = target
+    response = Response(mimetype=mimetype, headers={**headers_for(mimetype), **extra_headers})
+    response.headers["X-Accel-Redirect"] = path
+    return response
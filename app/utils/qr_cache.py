@@ -0,0 +1,119 @@
+"""Rendered QR codes for intake links.
+
+A room's intake URL does not change all shift long, so its SVG QR code is
+rendered once and kept in a small in-process LRU, with Redis (when
+configured) as a second tier shared by every worker.  The SVG is a pure
+function of the URL, so a copy can never be stale; ``invalidate`` only
+frees the entries of links that were replaced.
+"""
+
+import hashlib
+import io
+import logging
+import re
+import threading
+from collections import OrderedDict
+from typing import Iterable
+
+import qrcode
+import qrcode.image.svg
+
+logger = logging.getLogger(__name__)
+
+# Bump when the rendering below changes, so cached SVGs and ETags roll over.
+_RENDER_VERSION = "1"
+_REDIS_PREFIX = "triagem:qr:"
+_REDIS_TTL = 12 * 60 * 60
+
+
+def render_qr_svg(url: str) -> str:
+    """Generate a clean inline SVG QR code string."""
+    try:
+        factory = qrcode.image.svg.SvgPathImage
+        qr = qrcode.QRCode(version=1, box_size=8, border=2)
+        qr.add_data(url)
+        qr.make(fit=True)
+        img = qr.make_image(image_factory=factory)
+        buf = io.BytesIO()
+        img.save(buf)
+        svg_str = buf.getvalue().decode("utf-8")
+        svg_str = re.sub(r'<\?xml[^?]*\?>\s*', '', svg_str)
+        svg_str = re.sub(r'<!DOCTYPE[^>]*>\s*', '', svg_str)
+        return svg_str.strip()
+    except Exception:
+        return ""
+
+
+class QRCache:
+    """LRU of rendered QR SVGs keyed by URL, optionally backed by Redis."""
+
+    def __init__(self, max_entries: int = 128, redis_client=None):
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        # None: look the client up on first use; False: no Redis tier.
+        self._redis = redis_client
+
+    @staticmethod
+    def etag(url: str) -> str:
+        """Validator of the QR code for *url*, usable before rendering it."""
+        return hashlib.sha256(f"{_RENDER_VERSION}:{url}".encode()).hexdigest()[:32]
+
+    def _redis_client(self):
+        if self._redis is None:
+            from app.redis_client import get_redis_client
+            self._redis = get_redis_client() or False
+        return self._redis or None
+
+    def get(self, url: str) -> str:
+        """Return the SVG QR code for *url*, rendering it at most once."""
+        with self._lock:
+            svg = self._entries.get(url)
+            if svg is not None:
+                self._entries.move_to_end(url)
+                return svg
+
+        client = self._redis_client()
+        key = _REDIS_PREFIX + self.etag(url)
+        svg = None
+        if client is not None:
+            try:
+                raw = client.get(key)
+                svg = raw.decode("utf-8") if raw is not None else None
+            except Exception as exc:
+                logger.debug("QR cache read failed: %s", exc)
+        if svg is None:
+            svg = render_qr_svg(url)
+            if svg and client is not None:
+                try:
+                    client.set(key, svg.encode("utf-8"), ex=_REDIS_TTL)
+                except Exception as exc:
+                    logger.debug("QR cache write failed: %s", exc)
+
+        if svg:
+            with self._lock:
+                self._entries[url] = svg
+                self._entries.move_to_end(url)
+                while len(self._entries) > self._max_entries:
+                    self._entries.popitem(last=False)
+        return svg
+
+    def invalidate(self, urls: Iterable[str]) -> None:
+        """Drop the cached QR codes of *urls* from both tiers."""
+        urls = list(urls)
+        with self._lock:
+            for url in urls:
+                self._entries.pop(url, None)
+        client = self._redis_client()
+        if client is not None and urls:
+            try:
+                for url in urls:
+                    client.delete(_REDIS_PREFIX + self.etag(url))
+            except Exception as exc:
+                logger.debug("QR cache invalidation failed: %s", exc)
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._entries
+
+
+qr_cache = QRCache()
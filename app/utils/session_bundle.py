@@ -0,0 +1,207 @@
+"""Streaming ZIP bundle of a room's pending submissions.
+
+The archive is produced while it is sent: ``zipfile`` writes into an
+unseekable sink (entries get data descriptors instead of back-patched
+headers) and every compressed chunk is yielded as soon as it exists, so
+neither the whole archive nor more than a few attachments are ever held
+in memory.  Submissions are read without their photos; attachments —
+downloaded from ``photo_storage`` or read from the store — are fetched on
+a small thread pool a few entries ahead of the writer, so S3 round trips
+overlap with compression and with the client's download.  An attachment
+that cannot be fetched is left out of the archive.
+
+Layout, one folder per submission in arrival order::
+
+    001_Nome_do_Convidado/relato.txt       rendered narrative (cached TextRenderer)
+    001_Nome_do_Convidado/respostas.json   identification and answers
+    001_Nome_do_Convidado/anexos/anexo_1.jpg
+"""
+
+import io
+import json
+import logging
+import re
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple, Union
+
+from app.renderer.cache import rendered_for
+from app.utils.mime import detect_mimetype
+
+logger = logging.getLogger(__name__)
+
+# Submissions read from the store per round trip (without their photos).
+_PAGE_SIZE = 10
+# Attachment downloads kept in flight ahead of the writer.
+_PREFETCH = 4
+# Attachments are written to the archive in slices of this size.
+_WRITE_CHUNK = 64 * 1024
+
+Entry = Tuple[str, Union[bytes, Callable[[], bytes]]]
+
+
+class _Sink(io.RawIOBase):
+    """Write-only, unseekable buffer drained by the generator after each write."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_zip(entries: Iterable[Tuple[str, bytes]], date_time=None) -> Iterator[bytes]:
+    """Yield a ZIP archive of *entries* (``(name, data)`` pairs) chunk by chunk."""
+    sink = _Sink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, data in entries:
+            info = zipfile.ZipInfo(name, date_time=date_time or (1980, 1, 1, 0, 0, 0))
+            # Photos and PDFs are already compressed; deflating them only costs CPU.
+            info.compress_type = (
+                zipfile.ZIP_STORED if name.endswith((".jpg", ".png", ".pdf"))
+                else zipfile.ZIP_DEFLATED
+            )
+            with archive.open(info, "w") as dest:
+                for start in range(0, len(data), _WRITE_CHUNK):
+                    dest.write(data[start:start + _WRITE_CHUNK])
+                    chunk = sink.drain()
+                    if chunk:
+                        yield chunk
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    yield sink.drain()
+
+
+def _prefetch(entries: Iterable[Entry], window: int) -> Iterator[Tuple[str, bytes]]:
+    """Resolve callable entries on a thread pool, up to *window* ahead, in order."""
+    executor = ThreadPoolExecutor(max_workers=window, thread_name_prefix="bundle-fetch")
+    pending: deque = deque()
+    try:
+        for name, data in entries:
+            pending.append((name, executor.submit(data) if callable(data) else data))
+            while len(pending) > window:
+                yield _resolve(*pending.popleft())
+        while pending:
+            yield _resolve(*pending.popleft())
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _resolve(name, value):
+    if not hasattr(value, "result"):
+        return name, value
+    try:
+        return name, value.result()
+    except Exception as exc:
+        # Empty data: _named_attachments skips it like a missing object.
+        logger.warning("Bundle: fetching %s failed: %s", name, exc)
+        return name, b""
+
+
+def _folder_name(position: int, guest_name: str) -> str:
+    safe = re.sub(r"[^\w\-]+", "_", guest_name or "").strip("_")[:60]
+    return f"{position:03d}_{safe or 'convidado'}"
+
+
+def _answers_json(sub) -> bytes:
+    return json.dumps({
+        "id": sub.submission_id,
+        "guest_name": sub.guest_name,
+        "dob": sub.dob,
+        "rg": sub.rg,
+        "cpf": sub.cpf,
+        "phone": sub.phone,
+        "address": sub.address,
+        "crime_type": sub.crime_type,
+        "received_at": sub.received_at.isoformat(),
+        "narrative": sub.narrative,
+        "answers": sub.answers,
+    }, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def _attachment_name(folder: str, number: int, data: bytes) -> str:
+    ext = "pdf" if detect_mimetype(data) == "application/pdf" else "jpg"
+    return f"{folder}/anexos/anexo_{number}.{ext}"
+
+
+def _id_pages(store, dashboard_id: int, submission_ids) -> Iterator[List[str]]:
+    if submission_ids is not None:
+        for start in range(0, len(submission_ids), _PAGE_SIZE):
+            yield submission_ids[start:start + _PAGE_SIZE]
+        return
+    cursor = None
+    while True:
+        page, cursor = store.iter_for_dashboard(dashboard_id, cursor, _PAGE_SIZE)
+        yield [s.submission_id for s in page]
+        if cursor is None:
+            break
+
+
+def _stored_photo(store, submission_id: str, index: int, dashboard_id: int) -> bytes:
+    photo = store.get_photo(submission_id, index, dashboard_id=dashboard_id)
+    return bytes(photo) if photo is not None else b""
+
+
+def _bundle_entries(store, dashboard_id: int, storage, with_attachments: bool,
+                    submission_ids=None) -> Iterator[Entry]:
+    position = 0
+    for ids in _id_pages(store, dashboard_id, submission_ids):
+        # Photos are fetched one by one through the prefetch window below.
+        subs = store.get_many(ids, with_photos=False, dashboard_id=dashboard_id)
+        for sub in subs:
+            position += 1
+            folder = _folder_name(position, sub.guest_name)
+            yield f"{folder}/relato.txt", rendered_for(sub, store)["text"].encode("utf-8")
+            yield f"{folder}/respostas.json", _answers_json(sub)
+            if not with_attachments:
+                continue
+            # Same numbering as api.get_photo: storage keys first, then bytes.
+            photo_keys = getattr(sub, "photo_keys", [])
+            number = 0
+            for key in photo_keys:
+                number += 1
+                if storage is not None:
+                    yield f"{folder}/anexos/{number}", (lambda key=key: storage.download(key))
+            for index in range(sub.photo_count - len(photo_keys)):
+                number += 1
+                yield f"{folder}/anexos/{number}", (
+                    lambda sid=sub.submission_id, index=index:
+                        _stored_photo(store, sid, index, dashboard_id)
+                )
+
+
+def _named_attachments(entries: Iterable[Tuple[str, bytes]]) -> Iterator[Tuple[str, bytes]]:
+    """Give downloaded attachments their extension; skip the ones that failed."""
+    for name, data in entries:
+        folder, sep, number = name.rpartition("/anexos/")
+        if sep and number.isdigit():
+            if not data:
+                logger.warning("Bundle: attachment %s unavailable", name)
+                continue
+            name = _attachment_name(folder, int(number), data)
+        yield name, data
+
+
+def stream_session_bundle(store, dashboard_id: int, storage=None,
+                          with_attachments: bool = True,
+                          submission_ids: Optional[List[str]] = None) -> Iterator[bytes]:
+    """Yield the ZIP bundle of *dashboard_id*'s pending submissions.
+
+    Pass *submission_ids* to bundle exactly those (in that order), e.g. the
+    ids already recorded in the audit log; ids gone meanwhile are skipped.
+    """
+    entries = _prefetch(
+        _bundle_entries(store, dashboard_id, storage, with_attachments, submission_ids), _PREFETCH
+    )
+    return stream_zip(_named_attachments(entries))
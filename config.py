@@ -78,6 +78,22 @@ class Config:
     S3_ACCESS_KEY = os.environ.get("S3_ACCESS_KEY", "")
     S3_SECRET_KEY = os.environ.get("S3_SECRET_KEY", "")
     S3_SIGNED_URL_TTL = int(os.environ.get("S3_SIGNED_URL_TTL", 3600))
+    # Let nginx send attachment bytes (X-Accel-Redirect to the internal
+    # locations in nginx.conf); only enable behind that nginx.
+    MEDIA_ACCEL_REDIRECT = _bool_env("MEDIA_ACCEL_REDIRECT", "False")
+    MEDIA_ACCEL_PREFIX = os.environ.get("MEDIA_ACCEL_PREFIX", "/_media/")
+
+    # ------------------------------------------------------------------
+    # Live dashboard updates (Server-Sent Events)
+    # ------------------------------------------------------------------
+    # Each open stream holds one gunicorn thread; by default at most half of
+    # a worker's threads stream, and browsers beyond that fall back to polling.
+    SSE_MAX_STREAMS = int(os.environ.get(
+        "SSE_MAX_STREAMS", max(int(os.environ.get("GUNICORN_THREADS", 2)) // 2, 1)
+    ))
+    # Streams are closed after this long; EventSource reconnects by itself.
+    SSE_STREAM_MAX_SECONDS = int(os.environ.get("SSE_STREAM_MAX_SECONDS", 300))
+    SSE_HEARTBEAT_SECONDS = 20
 
     # ------------------------------------------------------------------
     # E-mail
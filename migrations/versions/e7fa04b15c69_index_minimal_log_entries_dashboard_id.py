@@ -0,0 +1,31 @@
+"""index_minimal_log_entries_dashboard_id
+
+Revision ID: e7fa04b15c69
+Revises: d6e9f3a04b58
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7fa04b15c69'
+down_revision = 'd6e9f3a04b58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Backs the grouped per-dashboard log count on the dashboard index.
+    with op.batch_alter_table('minimal_log_entries', schema=None) as batch_op:
+        batch_op.create_index(
+            batch_op.f('ix_minimal_log_entries_dashboard_id'),
+            ['dashboard_id'],
+            unique=False,
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('minimal_log_entries', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_minimal_log_entries_dashboard_id'))
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""Compare the Redis submission codec against the legacy JSON + base64 format.
+
+Reports bytes stored per submission (entry + photos) and encode/decode time.
+When REDIS_URL is set, ``MEMORY USAGE`` from the server is reported as well.
+
+Usage:
+    python scripts/bench_redis_codec.py [--count 1000] [--photos 2] [--photo-kb 300]
+"""
+
+import argparse
+import base64
+import json
+import os
+import random
+import string
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.storage.redis_codec import _zstd, decode_entry, decode_photo, encode_entry  # noqa: E402
+
+
+def _words(n: int) -> str:
+    return " ".join(
+        "".join(random.choices(string.ascii_lowercase, k=random.randint(3, 9)))
+        for _ in range(n)
+    )
+
+
+def _sample_entry(i: int, photo_count: int, narrative_words: int) -> dict:
+    return {
+        "submission_id": f"bench-{i:06d}",
+        "dashboard_id": 1,
+        "guest_name": f"Convidado {i}",
+        "dob": None,
+        "rg": "12.345.678-9",
+        "cpf": None,
+        "phone": None,
+        "address": None,
+        "answers": {
+            "data_fato": "2026-01-01",
+            "hora_fato": None,
+            "local_fato": _words(6),
+            "autores": [{"nome": None, "caracteristicas": _words(8), "armado": None}],
+            "testemunhas": [],
+            "objetos": None,
+            "relato": _words(narrative_words),
+        },
+        "narrative": _words(narrative_words),
+        "crime_type": "roubo_furto",
+        "received_at": datetime.now(timezone.utc).isoformat(),
+        "photo_count": photo_count,
+        "photo_keys": [],
+    }
+
+
+def _legacy_encode(data: dict, photos: list) -> tuple:
+    return json.dumps(data).encode(), [base64.b64encode(p) for p in photos]
+
+
+def _legacy_decode(raw: bytes, photos: list) -> tuple:
+    return json.loads(raw.decode()), [base64.b64decode(p) for p in photos]
+
+
+def _codec_encode(data: dict, photos: list, compression: str) -> tuple:
+    return encode_entry(data, compression=compression), list(photos)
+
+
+def _codec_decode(raw: bytes, photos: list) -> tuple:
+    data = decode_entry(raw)
+    return data, [decode_photo(p, data["photo_encoding"]) for p in photos]
+
+
+def _server_memory(client, entries: list) -> float:
+    """Average MEMORY USAGE (bytes) per submission, entry + photo keys."""
+    total = 0
+    for i, (raw, photos) in enumerate(entries):
+        keys = [f"bench:sub:{i}"] + [f"bench:photo:{i}:{j}" for j in range(len(photos))]
+        pipe = client.pipeline()
+        pipe.set(keys[0], raw)
+        for key, photo in zip(keys[1:], photos):
+            pipe.set(key, photo)
+        pipe.execute()
+        total += sum(client.memory_usage(k) or 0 for k in keys)
+        client.delete(*keys)
+    return total / len(entries)
+
+
+def run(count: int, photo_count: int, photo_kb: int, narrative_words: int) -> None:
+    random.seed(42)
+    samples = []
+    for i in range(count):
+        photos = [os.urandom(photo_kb * 1024) for _ in range(photo_count)]
+        samples.append((_sample_entry(i, photo_count, narrative_words), photos))
+
+    client = None
+    if os.environ.get("REDIS_URL"):
+        import redis
+        client = redis.from_url(os.environ["REDIS_URL"])
+
+    variants = [("legacy json+base64", _legacy_encode, _legacy_decode)]
+    compressions = ["none", "zlib"] + (["zstd"] if _zstd() is not None else [])
+    for compression in compressions:
+        variants.append((
+            f"codec ({compression})",
+            lambda d, p, c=compression: _codec_encode(d, p, c),
+            _codec_decode,
+        ))
+
+    print(f"{count} submissions, {photo_count} photo(s) x {photo_kb} KB, "
+          f"{narrative_words}-word narrative\n")
+    header = f"{'format':<22}{'entry B':>10}{'photos B':>12}{'enc us':>10}{'dec us':>10}"
+    if client is not None:
+        header += f"{'redis B':>12}"
+    print(header)
+
+    for name, encode, decode in variants:
+        start = time.perf_counter()
+        encoded = [encode(data, photos) for data, photos in samples]
+        enc_us = (time.perf_counter() - start) * 1e6 / count
+
+        start = time.perf_counter()
+        for raw, photos in encoded:
+            decode(raw, photos)
+        dec_us = (time.perf_counter() - start) * 1e6 / count
+
+        entry_bytes = sum(len(raw) for raw, _ in encoded) / count
+        photo_bytes = sum(len(p) for _, photos in encoded for p in photos) / count
+        line = f"{name:<22}{entry_bytes:>10.0f}{photo_bytes:>12.0f}{enc_us:>10.1f}{dec_us:>10.1f}"
+        if client is not None:
+            line += f"{_server_memory(client, encoded):>12.0f}"
+        print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the Redis submission codec")
+    parser.add_argument("--count", type=int, default=1000, help="Submissions to encode")
+    parser.add_argument("--photos", type=int, default=2, help="Photos per submission")
+    parser.add_argument("--photo-kb", type=int, default=300, help="Size of each photo in KB")
+    parser.add_argument("--narrative-words", type=int, default=250,
+                        help="Words in the narrative and free-text answer")
+    args = parser.parse_args()
+    run(args.count, args.photos, args.photo_kb, args.narrative_words)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Measure in-memory SubmissionStore throughput as threads are added.
+
+Each thread owns a set of dashboards and loops over a gthread-like mix:
+submit (add_if_unique), list summaries, count, and — every ``--purge-every``
+operations — purge one of its dashboards.  Photo storage deletions sleep
+``--delete-ms`` to stand in for S3 round-trips.  ``--stripes 1`` reproduces
+the former single global lock for comparison.
+
+Usage:
+    python scripts/bench_store_concurrency.py [--threads 1,2,4,8] [--stripes 16]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask  # noqa: E402
+
+from app.store import Submission, SubmissionStore  # noqa: E402
+
+
+class _SlowStorage:
+    def __init__(self, delay: float):
+        self._delay = delay
+
+    def delete(self, key: str) -> None:
+        time.sleep(self._delay)
+
+
+def _submission(dashboard_id: int) -> Submission:
+    sid = str(uuid.uuid4())
+    return Submission(
+        submission_id=sid, dashboard_id=dashboard_id, guest_name=f"Convidado {sid[:8]}",
+        dob=None, rg=None, cpf=None, phone=None, address=None,
+        answers={"descricao": "teste"}, narrative=None, crime_type="outros",
+        photos=[], received_at=datetime.now(timezone.utc), photo_keys=[f"photos/{sid}.jpg"],
+    )
+
+
+def _worker(app, store, dashboards, ops, purge_every, counter):
+    with app.app_context():
+        for i in range(ops):
+            dashboard_id = dashboards[i % len(dashboards)]
+            if purge_every and i % purge_every == purge_every - 1:
+                store.purge_dashboard(dashboard_id)
+            elif i % 3 == 0:
+                store.add_if_unique(_submission(dashboard_id))
+            elif i % 3 == 1:
+                store.list_summaries_for_dashboard(dashboard_id)
+            else:
+                store.count_for_dashboard(dashboard_id)
+        counter.append(ops)
+
+
+def run(thread_counts, stripes, ops, purge_every, delete_ms, dashboards_per_thread):
+    app = Flask(__name__)
+    app.photo_storage = _SlowStorage(delete_ms / 1000)
+
+    print(f"{ops} ops/thread, purge every {purge_every}, storage delete {delete_ms} ms, "
+          f"{stripes} stripe(s)\n")
+    print(f"{'threads':>8}{'ops/s':>12}{'speedup':>10}")
+    baseline = None
+    for n in thread_counts:
+        store = SubmissionStore(stripes=stripes)
+        counter = []
+        threads = [
+            threading.Thread(
+                target=_worker,
+                args=(app, store,
+                      [t * dashboards_per_thread + d for d in range(dashboards_per_thread)],
+                      ops, purge_every, counter),
+            )
+            for t in range(n)
+        ]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        rate = sum(counter) / (time.perf_counter() - start)
+        baseline = baseline or rate
+        print(f"{n:>8}{rate:>12.0f}{rate / baseline:>10.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark SubmissionStore lock contention")
+    parser.add_argument("--threads", default="1,2,4,8",
+                        help="Comma-separated thread counts to run")
+    parser.add_argument("--stripes", type=int, default=16,
+                        help="Lock stripes (1 = single global lock)")
+    parser.add_argument("--ops", type=int, default=3000, help="Operations per thread")
+    parser.add_argument("--purge-every", type=int, default=100,
+                        help="Purge a dashboard every N operations (0 = never)")
+    parser.add_argument("--delete-ms", type=float, default=2.0,
+                        help="Simulated latency of each storage delete")
+    parser.add_argument("--dashboards", type=int, default=2,
+                        help="Dashboards owned by each thread")
+    args = parser.parse_args()
+    run([int(n) for n in args.threads.split(",")], args.stripes, args.ops,
+        args.purge_every, args.delete_ms, args.dashboards)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""Measure heap bytes per 1,000 Submission records with tracemalloc.
+
+Compares the former plain ``@dataclass`` Submission with the current
+slotted, interned representation.  Records are built from JSON the way
+the Redis and SQLite stores deserialise them, so every answer key and
+``crime_type`` starts out as a fresh string.
+
+Usage:
+    python scripts/bench_submission_memory.py [--count 1000] [--empty-ratio 0.3]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tracemalloc
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.store import Submission  # noqa: E402
+
+
+@dataclass
+class _DataclassSubmission:
+    """The Submission layout before it was slotted."""
+    submission_id: str
+    dashboard_id: int
+    guest_name: str
+    dob: Optional[str]
+    rg: Optional[str]
+    cpf: Optional[str]
+    phone: Optional[str]
+    address: Optional[str]
+    answers: Dict
+    narrative: Optional[str]
+    crime_type: str
+    photos: List[bytes]
+    received_at: datetime
+    photo_keys: List[str] = field(default_factory=list)
+
+
+_CRIME_TYPES = ["roubo_furto", "estelionato", "violencia_domestica", "outros"]
+
+
+def _payloads(count: int, empty_ratio: float) -> List[str]:
+    random.seed(7)
+    base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    payloads = []
+    for i in range(count):
+        answers = {} if random.random() < empty_ratio else {
+            "data_fato": "2026-01-01",
+            "hora_fato": "14:30",
+            "local_fato": "Rua das Flores, 100",
+            "autores": [{"nome": "Desconhecido", "caracteristicas": "alto", "armado": False}],
+            "testemunhas": [],
+            "relato": "Fui abordado na saída do mercado.",
+        }
+        payloads.append(json.dumps({
+            "submission_id": f"bench-{i:06d}",
+            "dashboard_id": 1,
+            "guest_name": f"Convidado {i}",
+            "dob": None, "rg": "12.345.678-9", "cpf": None, "phone": None, "address": None,
+            "answers": answers,
+            "narrative": None,
+            "crime_type": random.choice(_CRIME_TYPES),
+            "received_at": (base + timedelta(seconds=i)).isoformat(),
+            "photo_keys": [],
+        }))
+    return payloads
+
+
+def _build(cls, raw: str):
+    data = json.loads(raw)
+    return cls(
+        submission_id=data["submission_id"],
+        dashboard_id=data["dashboard_id"],
+        guest_name=data["guest_name"],
+        dob=data["dob"], rg=data["rg"], cpf=data["cpf"],
+        phone=data["phone"], address=data["address"],
+        answers=data["answers"],
+        narrative=data["narrative"],
+        crime_type=data["crime_type"],
+        photos=[],
+        received_at=datetime.fromisoformat(data["received_at"]),
+        photo_keys=data["photo_keys"],
+    )
+
+
+def _measure(cls, payloads: List[str]) -> int:
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    records = [_build(cls, raw) for raw in payloads]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    del records
+    return size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark Submission memory footprint")
+    parser.add_argument("--count", type=int, default=1000, help="Submissions to build")
+    parser.add_argument("--empty-ratio", type=float, default=0.3,
+                        help="Fraction of submissions with no answers")
+    args = parser.parse_args()
+
+    payloads = _payloads(args.count, args.empty_ratio)
+    scale = 1000 / args.count
+    print(f"{args.count} submissions, {args.empty_ratio:.0%} without answers\n")
+    print(f"{'layout':<12}{'bytes/1k':>14}")
+    results = {}
+    for name, cls in (("dataclass", _DataclassSubmission), ("slotted", Submission)):
+        results[name] = _measure(cls, payloads) * scale
+        print(f"{name:<12}{results[name]:>14,.0f}")
+    print(f"\nsaved {1 - results['slotted'] / results['dataclass']:.0%}")
+
+
+if __name__ == "__main__":
+    main()
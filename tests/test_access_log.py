@@ -140,3 +140,66 @@ def test_my_audit_log_endpoint(app, logged_in_client):
     resp = client.get("/dashboard/my-audit-log")
     assert resp.status_code == 200
     assert b"Hist" in resp.data  # "Histórico"
+
+
+def test_batch_submission_details_single_audit_insert(app, logged_in_client):
+    """GET /api/sessions/<id>/submissions/batch returns every found id and audits each once."""
+    client, user_id, session_id = logged_in_client
+
+    ids = ["test-batch-001", "test-batch-002", "test-batch-003"]
+    for i, sid in enumerate(ids):
+        submission_store.add(Submission(
+            submission_id=sid,
+            dashboard_id=session_id,
+            guest_name=f"Convidado {'ABC'[i]}",
+            dob=None, rg=None, cpf=None, phone=None, address=None,
+            answers={}, narrative="", crime_type="outros", photos=[],
+            received_at=datetime.now(timezone.utc),
+        ))
+    submission_store.add(Submission(
+        submission_id="test-batch-other", dashboard_id=session_id + 1,
+        guest_name="Outra Sala", dob=None, rg=None, cpf=None, phone=None, address=None,
+        answers={}, narrative="", crime_type="outros", photos=[],
+        received_at=datetime.now(timezone.utc),
+    ))
+    try:
+        resp = client.get(
+            f"/api/sessions/{session_id}/submissions/batch"
+            f"?ids=test-batch-003,test-batch-001,test-batch-other,nope"
+        )
+        assert resp.status_code == 200
+        data = resp.get_json()
+        assert [d["id"] for d in data["submissions"]] == ["test-batch-003", "test-batch-001"]
+        assert data["missing"] == ["test-batch-other", "nope"]
+        assert "Convidado C" in data["submissions"][0]["text"]
+
+        with app.app_context():
+            logged = {
+                log.submission_id
+                for log in AccessLog.query.filter_by(user_id=user_id, action="prefetch")
+            }
+            assert AccessLog.query.filter_by(user_id=user_id, action="view").count() == 0
+        assert logged == {"test-batch-003", "test-batch-001"}
+
+        # Opening a prefetched submission records the view on its own.
+        assert client.post(
+            f"/api/sessions/{session_id}/submissions/test-batch-003/viewed"
+        ).status_code == 200
+        assert client.post(
+            f"/api/sessions/{session_id}/submissions/test-batch-other/viewed"
+        ).status_code == 404
+        with app.app_context():
+            viewed = [
+                log.submission_id
+                for log in AccessLog.query.filter_by(user_id=user_id, action="view")
+            ]
+        assert viewed == ["test-batch-003"]
+
+        too_many = ",".join(f"x{i}" for i in range(21))
+        assert client.get(
+            f"/api/sessions/{session_id}/submissions/batch?ids={too_many}"
+        ).status_code == 400
+        assert client.get(f"/api/sessions/{session_id}/submissions/batch").status_code == 400
+    finally:
+        for sid in ids + ["test-batch-other"]:
+            submission_store.delete(sid)
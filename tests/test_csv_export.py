@@ -208,3 +208,58 @@ def test_csv_header_present(app, client):
     assert "Nome" in content
     assert "Tipo" in content
     assert "Status" in content
+
+
+def test_export_session_csv_streams_in_batches(app, client, monkeypatch):
+    """Active rows and logs are streamed page by page with indexed answer columns."""
+    import csv
+    import io
+    from app.store import submission_store, Submission
+
+    monkeypatch.setattr("app.dashboard.routes._EXPORT_BATCH", 2)
+    with app.app_context():
+        user = _make_user("owner8@csv.com", "Owner8")
+        sess = DashboardSession(
+            user_id=user.id,
+            label="Stream",
+            expires_at=datetime.now(timezone.utc) + timedelta(hours=12),
+        )
+        _db.session.add(sess)
+        _db.session.commit()
+        for i in range(5):
+            _db.session.add(MinimalLogEntry(
+                dashboard_id=sess.id,
+                police_user_id=user.id,
+                guest_display_name=f"Log {i}",
+                crime_type="furto",
+                received_at=datetime.now(timezone.utc) - timedelta(minutes=i),
+                status="closed",
+            ))
+        _db.session.commit()
+        sess_id = sess.id
+
+    sids = [f"test-csv-{i}" for i in range(3)]
+    for i, sid in enumerate(sids):
+        submission_store.add(Submission(
+            submission_id=sid, dashboard_id=sess_id, guest_name=f"Ativo {i}",
+            dob=None, rg=None, cpf=None, phone=None, address=None,
+            answers={"local": f"Rua {i}"} if i else {"arma": ["faca", "pedra"]},
+            narrative="", crime_type="roubo", photos=[],
+            received_at=datetime.now(timezone.utc) + timedelta(seconds=i),
+        ))
+    try:
+        _login(client, "owner8@csv.com")
+        resp = client.get(f"/dashboard/sessions/{sess_id}/export-all-csv")
+        assert resp.status_code == 200
+        assert resp.is_streamed
+        rows = list(csv.reader(io.StringIO(resp.get_data(as_text=True))))
+    finally:
+        for sid in sids:
+            submission_store.delete(sid)
+
+    assert rows[0] == ["ID", "Nome", "Tipo", "Status", "Recebido em", "arma", "local"]
+    assert [r[1] for r in rows[1:4]] == ["Ativo 0", "Ativo 1", "Ativo 2"]
+    assert rows[1][5:] == ["faca;pedra", ""]
+    assert rows[3][5:] == ["", "Rua 2"]
+    assert [r[1] for r in rows[4:]] == [f"Log {i}" for i in range(5)]
+    assert all(r[5:] == ["", ""] for r in rows[4:])
@@ -108,3 +108,83 @@ def test_intake_submit_post_works(client, active_link):
     )
     assert resp.status_code == 302
     assert f"/t/{active_link}/ok" in resp.location
+
+
+def test_intake_submit_renders_narrative_in_background(client, app, active_link):
+    """A stored submission gets its cached rendering without anyone opening it."""
+    import time
+    from app.renderer.cache import content_key
+    from app.store import submission_store
+
+    resp = client.post(
+        f"/t/{active_link}/submit",
+        data={"guest_name": "Render Guest", "crime_type": "roubo"},
+    )
+    assert resp.status_code == 302
+
+    with app.app_context():
+        dashboard_id = IntakeLink.query.filter_by(token=active_link).first().dashboard_id
+    sub = next(s for s in submission_store.list_for_dashboard(dashboard_id)
+               if s.guest_name == "Render Guest")
+    try:
+        deadline = time.monotonic() + 5
+        while submission_store.get_rendered(sub.submission_id) is None:
+            assert time.monotonic() < deadline, "background render never finished"
+            time.sleep(0.01)
+        rendered = submission_store.get_rendered(sub.submission_id)
+        assert rendered["key"] == content_key(sub)
+        assert "Render Guest" in rendered["text"]
+    finally:
+        submission_store.delete(sub.submission_id)
+
+
+def test_intake_submit_creates_thumbnails_in_background(client, app, active_link):
+    """Uploaded photos get their downscaled copies without anyone opening them."""
+    import io
+    import time
+    from PIL import Image
+    from app.store import submission_store
+
+    buf = io.BytesIO()
+    Image.effect_noise((1200, 900), 64).convert("RGB").save(buf, format="JPEG")
+    resp = client.post(
+        f"/t/{active_link}/submit",
+        data={
+            "guest_name": "Thumb Guest",
+            "crime_type": "roubo",
+            "photos": (io.BytesIO(buf.getvalue()), "foto.jpg", "image/jpeg"),
+        },
+        content_type="multipart/form-data",
+    )
+    assert resp.status_code == 302
+
+    with app.app_context():
+        dashboard_id = IntakeLink.query.filter_by(token=active_link).first().dashboard_id
+    sub = next(s for s in submission_store.list_for_dashboard(dashboard_id)
+               if s.guest_name == "Thumb Guest")
+    try:
+        assert len(sub.photos) == 1
+        deadline = time.monotonic() + 5
+        while submission_store.get_thumbnail(sub.submission_id, 0, "preview") is None:
+            assert time.monotonic() < deadline, "background thumbnails never finished"
+            time.sleep(0.01)
+        thumb = submission_store.get_thumbnail(sub.submission_id, 0, "thumb")
+        assert max(Image.open(io.BytesIO(thumb)).size) == 240
+    finally:
+        submission_store.delete(sub.submission_id)
+
+
+def test_intake_submit_returns_503_when_the_store_is_full(client, active_link, monkeypatch):
+    """A store that cannot take the write answers 503, not a 500."""
+    from app.store import StoreUnavailableError, submission_store
+
+    def _full(sub, expire_at=None):
+        raise StoreUnavailableError("database or disk is full")
+
+    monkeypatch.setattr(submission_store, "add_if_unique", _full)
+    resp = client.post(
+        f"/t/{active_link}/submit",
+        data={"guest_name": "Full Guest", "crime_type": "roubo"},
+    )
+    assert resp.status_code == 503
+    assert "indisponível" in resp.get_data(as_text=True)
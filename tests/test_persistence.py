@@ -1,4 +1,5 @@
 """Tests for idempotent submission persistence."""
+import re
 import pytest
 from datetime import datetime, timezone, timedelta
 from unittest.mock import MagicMock, patch
@@ -91,7 +92,7 @@ def test_all_submissions_persisted_on_close(app, client):
         sub2 = _make_submission("Bob", received_at=received_at + timedelta(seconds=1))
 
         with patch("app.dashboard.routes.submission_store") as mock_store:
-            mock_store.list_for_dashboard.return_value = [sub1, sub2]
+            mock_store.list_summaries_for_dashboard.return_value = [sub1, sub2]
             mock_store.count_for_dashboard.return_value = 2
             mock_store.purge_dashboard.return_value = None
 
@@ -124,7 +125,7 @@ def test_no_duplicate_entries(app):
         sub = _make_submission("Charlie", received_at=received_at)
 
         with patch("app.dashboard.routes.submission_store") as mock_store:
-            mock_store.list_for_dashboard.return_value = [sub]
+            mock_store.list_summaries_for_dashboard.return_value = [sub]
 
             from app.dashboard.routes import _persist_pending_submissions
 
@@ -174,7 +175,7 @@ def test_persist_skips_existing_entries(app):
         sub = _make_submission("Dave", crime_type="furto", received_at=now)
 
         with patch("app.dashboard.routes.submission_store") as mock_store:
-            mock_store.list_for_dashboard.return_value = [sub]
+            mock_store.list_summaries_for_dashboard.return_value = [sub]
 
             from app.dashboard.routes import _persist_pending_submissions
             count = _persist_pending_submissions(sess, status="received")
@@ -183,3 +184,41 @@ def test_persist_skips_existing_entries(app):
         assert count == 0
         entries = MinimalLogEntry.query.filter_by(dashboard_id=sess_id).all()
         assert len(entries) == 1
+
+
+def test_dashboard_index_counts_records_in_batch(app, client):
+    """The index page counts pending and logged records with one call each."""
+    with app.app_context():
+        user = _make_user("index@test.com", "Indexer")
+        sessions = []
+        for label in ("Sala A", "Sala B", "Sala C"):
+            sess = DashboardSession(
+                user_id=user.id,
+                label=label,
+                expires_at=datetime.now(timezone.utc) + timedelta(hours=12),
+            )
+            _db.session.add(sess)
+            sessions.append(sess)
+        _db.session.commit()
+        sessions[2].is_active = False
+        for sess, logged in zip(sessions, (1, 0, 4)):
+            for i in range(logged):
+                _db.session.add(MinimalLogEntry(
+                    dashboard_id=sess.id, police_user_id=user.id,
+                    guest_display_name=f"Guest {i}", status="closed",
+                ))
+        _db.session.commit()
+        ids = [s.id for s in sessions]
+
+    _login(client, "index@test.com")
+    with patch("app.dashboard.routes.submission_store") as mock_store:
+        mock_store.count_many.return_value = {ids[0]: 2, ids[1]: 3}
+        resp = client.get("/dashboard/")
+
+    assert resp.status_code == 200
+    mock_store.count_many.assert_called_once()
+    assert sorted(mock_store.count_many.call_args[0][0]) == sorted(ids[:2])
+    mock_store.count_for_dashboard.assert_not_called()
+    html = resp.get_data(as_text=True)
+    totals = [int(t) for t in re.findall(r"Registros: <strong>(\d+)</strong>", html)]
+    assert sorted(totals) == [3, 3, 4]
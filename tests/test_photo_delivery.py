@@ -0,0 +1,356 @@
+"""Tests for photo delivery through api.get_photo."""
+import io
+import pytest
+from datetime import datetime, timezone, timedelta
+from unittest.mock import patch
+from app import create_app
+from app.extensions import db as _db
+from app.models import PoliceUser, DashboardSession, AccessLog
+from app.renderer.thumbnails import generate_thumbnails
+from app.store import Submission, SubmissionStore, submission_store
+from app.storage.local_storage import LocalPhotoStorage
+from app.storage.photo_spill import spill_photo
+from app.storage.photo_storage import stream_bytes, variant_key
+
+
+class TestConfig:
+    TESTING = True
+    SECRET_KEY = "test-secret-key"
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    WTF_CSRF_ENABLED = False
+    RATELIMIT_ENABLED = False
+    RATELIMIT_STORAGE_URI = "memory://"
+    RATELIMIT_DEFAULT = "10000 per day"
+    SMTP_HOST = ""
+    MAIL_FROM = ""
+    CONFIRMATION_TOKEN_MAX_AGE = 86400
+    REQUIRE_CPF_FOR_SIGNUP = False
+    MAX_CONTENT_LENGTH = 12 * 1024 * 1024
+    DASHBOARD_MAX_AGE_HOURS = 12
+    DEFAULT_MAX_PHOTOS = 3
+    DEFAULT_MAX_PHOTO_SIZE_MB = 3
+
+
+@pytest.fixture()
+def app():
+    application = create_app(TestConfig)
+    with application.app_context():
+        _db.create_all()
+        yield application
+        _db.session.remove()
+        _db.drop_all()
+
+
+@pytest.fixture()
+def client(app):
+    return app.test_client()
+
+
+def _make_user(email, plan_type="premium", password="senha1234"):
+    user = PoliceUser(email=email, display_name=email, is_active=True, plan_type=plan_type)
+    user.set_password(password)
+    _db.session.add(user)
+    _db.session.commit()
+    return user
+
+
+def _login(client, email, password="senha1234"):
+    return client.post("/login", data={"email": email, "password": password})
+
+
+def _make_session(app, email):
+    with app.app_context():
+        owner = _make_user(email)
+        sess = DashboardSession(
+            user_id=owner.id,
+            label="Plantão",
+            expires_at=datetime.now(timezone.utc) + timedelta(hours=12),
+        )
+        _db.session.add(sess)
+        _db.session.commit()
+        return sess.id
+
+
+def _make_sub(sid, dashboard_id, photos=None, photo_keys=None):
+    return Submission(
+        submission_id=sid, dashboard_id=dashboard_id, guest_name="Convidado",
+        dob=None, rg="1234567", cpf=None, phone=None, address=None,
+        answers={}, narrative="", crime_type="outros",
+        photos=photos or [], photo_keys=photo_keys or [],
+        received_at=datetime.now(timezone.utc),
+    )
+
+
+def _jpeg(width=1600, height=1200):
+    from PIL import Image
+    output = io.BytesIO()
+    Image.effect_noise((width, height), 64).convert("RGB").save(output, format="JPEG", quality=85)
+    return output.getvalue()
+
+
+PDF = b"%PDF-1.4 " + bytes(range(256)) * 600  # ~150 KB, several chunks
+
+
+# ---------------------------------------------------------------------------
+# Storage streams
+# ---------------------------------------------------------------------------
+
+def test_local_download_stream_reads_only_the_range(tmp_path):
+    storage = LocalPhotoStorage(str(tmp_path))
+    key = storage.save(PDF, "doc.pdf")
+
+    whole = storage.download_stream(key)
+    assert (whole.start, whole.stop, whole.total) == (0, len(PDF), len(PDF))
+    chunks = list(whole.chunks)
+    assert len(chunks) > 1 and b"".join(chunks) == PDF
+
+    part = storage.download_stream(key, 100, 200)
+    assert b"".join(part.chunks) == PDF[100:200]
+    suffix = storage.download_stream(key, -10)
+    assert (suffix.start, b"".join(suffix.chunks)) == (len(PDF) - 10, PDF[-10:])
+    past = storage.download_stream(key, len(PDF) + 5)
+    assert (past.start, past.stop) == (len(PDF), len(PDF))
+    assert storage.download_stream("missing") is None
+
+
+def test_stream_bytes_and_spilled_photo_ranges(tmp_path):
+    spilled = spill_photo(PDF, str(tmp_path))
+    for stream in (stream_bytes(PDF, 5, 70_000), spilled.stream(5, 70_000)):
+        assert (stream.start, stream.stop, stream.total) == (5, 70_000, len(PDF))
+        assert b"".join(stream.chunks) == PDF[5:70_000]
+
+
+def test_s3_download_stream_forwards_the_range():
+    import io
+    from botocore.response import StreamingBody
+    from app.storage.s3_storage import S3PhotoStorage
+
+    storage = S3PhotoStorage("bucket", "key", "secret")
+    calls = []
+
+    def get_object(**kwargs):
+        calls.append(kwargs.get("Range"))
+        return {
+            "Body": StreamingBody(io.BytesIO(PDF[100:200]), 100),
+            "ContentLength": 100,
+            "ContentRange": f"bytes 100-199/{len(PDF)}",
+        }
+
+    storage._client.get_object = get_object
+    stream = storage.download_stream("photos/x", 100, 200)
+
+    assert calls == ["bytes=100-199"]
+    assert (stream.start, stream.stop, stream.total) == (100, 200, len(PDF))
+    assert b"".join(stream.chunks) == PDF[100:200]
+
+
+def test_s3_delete_reports_per_key_errors(caplog):
+    from app.storage.s3_storage import S3PhotoStorage
+
+    storage = S3PhotoStorage("bucket", "key", "secret")
+    requests = []
+
+    def delete_objects(**kwargs):
+        requests.append([obj["Key"] for obj in kwargs["Delete"]["Objects"]])
+        if len(requests) == 1:
+            return {}
+        return {"Errors": [{"Key": "photos/x.thumb.jpg", "Code": "AccessDenied",
+                            "Message": "Access Denied"}]}
+
+    storage._client.delete_objects = delete_objects
+    assert storage.delete("photos/x")
+    assert requests[0] == ["photos/x", "photos/x.thumb.jpg", "photos/x.preview.jpg"]
+    assert not storage.delete("photos/x")
+    assert "photos/x.thumb.jpg: AccessDenied Access Denied" in caplog.text
+
+
+def test_accel_redirect_targets(tmp_path):
+    from urllib.parse import parse_qs, urlsplit
+    from app.storage.s3_storage import S3PhotoStorage
+
+    local = LocalPhotoStorage(str(tmp_path))
+    key = local.save(PDF, "doc.pdf")
+    assert local.accel_redirect(key, "/_media/", "application/pdf") == (f"/_media/local/{key}", {})
+    assert local.accel_redirect("../" + key, "/_media/", "application/pdf") is None
+    assert local.accel_redirect("missing", "/_media/", "application/pdf") is None
+
+    s3 = S3PhotoStorage("bucket", "key", "secret")
+    path, headers = s3.accel_redirect("photos/x.jpg", "/_media/", "application/pdf")
+    assert path == "/_media/s3"
+    query = parse_qs(urlsplit(headers["X-Media-Url"]).query)
+    assert query["response-content-type"] == ["application/pdf"]
+
+
+# ---------------------------------------------------------------------------
+# Thumbnails
+# ---------------------------------------------------------------------------
+
+def test_generate_thumbnails_for_storage_and_store_photos(tmp_path):
+    from PIL import Image
+    from app.storage.photo_storage import variant_key
+
+    storage = LocalPhotoStorage(str(tmp_path))
+    store = SubmissionStore()
+    photo = _jpeg()
+    key = storage.save(photo, "foto.jpg")
+    pdf_key = storage.save(PDF, "doc.pdf")
+    sub = _make_sub("th1", 1, photos=[photo, PDF], photo_keys=[key, pdf_key])
+    store.add(sub)
+
+    # The first key's bytes are handed over; the second is downloaded.
+    assert generate_thumbnails(sub, {key: photo}, storage, store) == 4
+
+    thumb = b"".join(storage.download_stream(variant_key(key, "thumb")).chunks)
+    assert max(Image.open(io.BytesIO(thumb)).size) == 240
+    assert len(photo) // len(thumb) >= 20
+    assert storage.download_stream(variant_key(key, "preview")) is not None
+    assert storage.download_stream(variant_key(pdf_key, "thumb")) is None
+    assert store.get_thumbnail("th1", 0, "thumb") is not None
+    assert store.get_thumbnail("th1", 1, "thumb") is None
+
+    storage.delete(key)
+    assert sorted(p.name for p in tmp_path.iterdir()) == [pdf_key]
+
+
+# ---------------------------------------------------------------------------
+# Route: get_photo
+# ---------------------------------------------------------------------------
+
+def test_get_photo_streams_from_storage_with_ranges(app, client, tmp_path):
+    sess_id = _make_session(app, "owner@photo.com")
+    app.photo_storage = LocalPhotoStorage(str(tmp_path))
+    key = app.photo_storage.save(PDF, "doc.pdf")
+    submission_store.add(_make_sub("test-photo-1", sess_id, photo_keys=[key]))
+    url = f"/api/sessions/{sess_id}/submissions/test-photo-1/photo/0"
+    try:
+        _login(client, "owner@photo.com")
+
+        resp = client.get(url + "?download=1")
+        assert resp.status_code == 200
+        assert resp.is_streamed
+        assert resp.mimetype == "application/pdf"
+        assert resp.headers["Content-Length"] == str(len(PDF))
+        assert resp.headers["Accept-Ranges"] == "bytes"
+        assert resp.headers["Content-Disposition"] == "attachment; filename=photo_0.pdf"
+        assert resp.get_data() == PDF
+
+        resp = client.get(url, headers={"Range": "bytes=1000-1999"})
+        assert resp.status_code == 206
+        assert resp.mimetype == "application/pdf"
+        assert resp.headers["Content-Range"] == f"bytes 1000-1999/{len(PDF)}"
+        assert resp.headers["Content-Length"] == "1000"
+        assert resp.get_data() == PDF[1000:2000]
+
+        resp = client.get(url, headers={"Range": "bytes=-100"})
+        assert resp.status_code == 206
+        assert resp.get_data() == PDF[-100:]
+
+        resp = client.get(url, headers={"Range": f"bytes={len(PDF)}-"})
+        assert resp.status_code == 416
+        assert resp.headers["Content-Range"] == f"bytes */{len(PDF)}"
+
+        # A validator we never issued cannot match: the whole photo is sent.
+        resp = client.get(url, headers={"Range": "bytes=0-9", "If-Range": '"x"'})
+        assert resp.status_code == 200
+        assert resp.get_data() == PDF
+    finally:
+        submission_store.delete("test-photo-1")
+
+
+def test_get_photo_serves_ranges_of_store_held_photos(app, client):
+    sess_id = _make_session(app, "mem@photo.com")
+    jpeg = b"\xff\xd8\xff" + b"j" * 500
+    submission_store.add(_make_sub("test-photo-2", sess_id, photos=[jpeg]))
+    url = f"/api/sessions/{sess_id}/submissions/test-photo-2/photo/0"
+    try:
+        _login(client, "mem@photo.com")
+        # Only the requested photo is read, never the whole submission.
+        with patch.object(submission_store, "get", side_effect=AssertionError):
+            resp = client.get(url, headers={"Range": "bytes=10-"})
+        assert resp.status_code == 206
+        assert resp.mimetype == "image/jpeg"
+        assert resp.get_data() == jpeg[10:]
+        assert client.get(url.replace("/photo/0", "/photo/1")).status_code == 404
+    finally:
+        submission_store.delete("test-photo-2")
+
+
+def test_get_photo_hands_the_transfer_to_nginx(app, client, tmp_path):
+    sess_id = _make_session(app, "accel@photo.com")
+    app.config["MEDIA_ACCEL_REDIRECT"] = True
+    app.photo_storage = LocalPhotoStorage(str(tmp_path))
+    key = app.photo_storage.save(PDF, "doc.pdf")
+    jpeg = b"\xff\xd8\xff" + b"j" * 500
+    submission_store.add(_make_sub("test-photo-3", sess_id, photos=[jpeg], photo_keys=[key]))
+    url = f"/api/sessions/{sess_id}/submissions/test-photo-3/photo"
+    try:
+        _login(client, "accel@photo.com")
+        resp = client.get(url + "/0?download=1")
+        assert resp.status_code == 200
+        assert resp.headers["X-Accel-Redirect"] == f"/_media/local/{key}"
+        assert resp.headers["Content-Disposition"] == "attachment; filename=photo_0.pdf"
+        assert resp.headers["Cache-Control"] == "no-store"
+        assert resp.get_data() == b""
+        with app.app_context():
+            assert AccessLog.query.filter_by(submission_id="test-photo-3",
+                                             action="download_photo").count() == 1
+
+        # Photos held by the store cannot be offloaded.
+        resp = client.get(url + "/1")
+        assert "X-Accel-Redirect" not in resp.headers
+        assert resp.get_data() == jpeg
+    finally:
+        submission_store.delete("test-photo-3")
+
+
+def test_form_image_hands_the_transfer_to_nginx(app, client, tmp_path):
+    app.config["MEDIA_ACCEL_REDIRECT"] = True
+    app.photo_storage = LocalPhotoStorage(str(tmp_path))
+    key = app.photo_storage.save(b"\x89PNG\r\n\x1a\n" + b"p" * 50, "banner.png")
+
+    resp = client.get(f"/dashboard/form-image/{key}")
+    assert resp.headers["X-Accel-Redirect"] == f"/_media/local/{key}"
+    assert resp.headers["Cache-Control"] == "public, max-age=3600"
+    assert client.get("/dashboard/form-image/missing.png").status_code == 404
+
+
+def test_get_photo_serves_thumbnails_and_falls_back_to_the_original(app, client, tmp_path):
+    sess_id = _make_session(app, "thumb@photo.com")
+    app.photo_storage = LocalPhotoStorage(str(tmp_path))
+    photo = _jpeg()
+    key = app.photo_storage.save(photo, "foto.jpg")
+    pdf_key = app.photo_storage.save(PDF, "doc.pdf")
+    sub = _make_sub("test-photo-4", sess_id, photos=[photo], photo_keys=[key, pdf_key])
+    submission_store.add(sub)
+    url = f"/api/sessions/{sess_id}/submissions/test-photo-4/photo"
+    try:
+        _login(client, "thumb@photo.com")
+        # Before the thumbnails exist, the original is sent.
+        assert client.get(url + "/0?size=thumb").get_data() == photo
+
+        generate_thumbnails(sub, storage=app.photo_storage, store=submission_store)
+
+        for index in (0, 2):
+            resp = client.get(f"{url}/{index}?size=thumb")
+            assert resp.status_code == 200
+            assert resp.mimetype == "image/jpeg"
+            assert int(resp.headers["Content-Length"]) * 20 <= len(photo)
+        thumb = client.get(url + "/0?size=thumb").get_data()
+        preview = client.get(url + "/0?size=preview").get_data()
+        assert len(thumb) < len(preview) < len(photo)
+        assert client.get(url + "/1?size=thumb").get_data() == PDF
+        assert client.get(url + "/0?size=huge").status_code == 400
+
+        # A stored thumbnail is sent before any original is read.
+        with patch.object(submission_store, "get_photo", side_effect=AssertionError), \
+                patch.object(submission_store, "get", side_effect=AssertionError), \
+                patch.object(app.photo_storage, "download_stream",
+                             wraps=app.photo_storage.download_stream) as download:
+            assert client.get(url + "/2?size=thumb").status_code == 200
+            assert client.get(url + "/0?size=thumb").status_code == 200
+            assert [call.args[0] for call in download.call_args_list] == [
+                variant_key(key, "thumb")
+            ]
+    finally:
+        submission_store.delete("test-photo-4")
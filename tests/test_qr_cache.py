@@ -0,0 +1,151 @@
+"""Tests for the intake-link QR code cache and the qr.svg endpoint."""
+import pytest
+from datetime import datetime, timezone, timedelta
+from unittest.mock import patch
+from app import create_app
+from app.extensions import db as _db
+from app.models import PoliceUser, DashboardSession, IntakeLink
+from app.schemas.crime_types import DEFAULT_FORM_SCHEMA
+from app.utils.qr_cache import QRCache, qr_cache, render_qr_svg
+
+
+class TestConfig:
+    TESTING = True
+    SECRET_KEY = "test-secret-key"
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    WTF_CSRF_ENABLED = False
+    RATELIMIT_ENABLED = False
+    RATELIMIT_STORAGE_URI = "memory://"
+    RATELIMIT_DEFAULT = "10000 per day"
+    SMTP_HOST = ""
+    MAIL_FROM = ""
+    CONFIRMATION_TOKEN_MAX_AGE = 86400
+    REQUIRE_CPF_FOR_SIGNUP = False
+    MAX_CONTENT_LENGTH = 12 * 1024 * 1024
+    DASHBOARD_MAX_AGE_HOURS = 12
+    DEFAULT_MAX_PHOTOS = 3
+    DEFAULT_MAX_PHOTO_SIZE_MB = 3
+
+
+@pytest.fixture()
+def app():
+    application = create_app(TestConfig)
+    with application.app_context():
+        _db.create_all()
+        yield application
+        _db.session.remove()
+        _db.drop_all()
+
+
+@pytest.fixture()
+def client(app):
+    return app.test_client()
+
+
+def _make_user(email, password="senha1234"):
+    user = PoliceUser(email=email, display_name=email, is_active=True, plan_type="premium")
+    user.set_password(password)
+    _db.session.add(user)
+    _db.session.commit()
+    return user
+
+
+def _make_session_with_link(user_id):
+    sess = DashboardSession(
+        user_id=user_id,
+        label="QR Shift",
+        expires_at=datetime.now(timezone.utc) + timedelta(hours=12),
+    )
+    _db.session.add(sess)
+    _db.session.commit()
+    _db.session.add(IntakeLink(dashboard_id=sess.id, form_schema=DEFAULT_FORM_SCHEMA))
+    _db.session.commit()
+    return sess.id
+
+
+def _login(client, email, password="senha1234"):
+    return client.post("/login", data={"email": email, "password": password})
+
+
+# ---------------------------------------------------------------------------
+# QRCache
+# ---------------------------------------------------------------------------
+
+def test_qr_cache_renders_each_url_once_and_evicts_lru():
+    cache = QRCache(max_entries=2, redis_client=False)
+    with patch("app.utils.qr_cache.render_qr_svg", side_effect=lambda url: f"<svg>{url}</svg>") as render:
+        assert cache.get("a") == "<svg>a</svg>"
+        assert cache.get("a") == "<svg>a</svg>"
+        cache.get("b")
+        cache.get("a")
+        cache.get("c")  # evicts b, the least recently used
+        assert render.call_count == 3
+        assert "a" in cache and "c" in cache and "b" not in cache
+
+        cache.invalidate(["a"])
+        assert "a" not in cache
+
+
+def test_qr_cache_redis_tier_is_shared_between_workers():
+    fakeredis = pytest.importorskip("fakeredis")
+    client = fakeredis.FakeRedis()
+    url = "https://example.com/t/abc"
+    first, second = QRCache(redis_client=client), QRCache(redis_client=client)
+
+    assert first.get(url) == render_qr_svg(url)
+    with patch("app.utils.qr_cache.render_qr_svg") as render:
+        assert second.get(url) == first.get(url)
+        render.assert_not_called()
+
+    first.invalidate([url])
+    assert client.keys("*") == []
+
+
+# ---------------------------------------------------------------------------
+# Endpoints
+# ---------------------------------------------------------------------------
+
+def test_qr_svg_endpoint_is_cacheable(app, client):
+    with app.app_context():
+        owner = _make_user("qr-owner@test.com")
+        _make_user("qr-stranger@test.com")
+        sess_id = _make_session_with_link(owner.id)
+
+    _login(client, "qr-owner@test.com")
+    page = client.get(f"/dashboard/sessions/{sess_id}")
+    assert page.status_code == 200
+    assert f"/dashboard/sessions/{sess_id}/qr.svg".encode() in page.data
+    assert b"<svg" not in page.data
+
+    resp = client.get(f"/dashboard/sessions/{sess_id}/qr.svg")
+    assert resp.status_code == 200
+    assert resp.mimetype == "image/svg+xml"
+    assert resp.data.startswith(b"<svg")
+    etag = resp.headers["ETag"]
+
+    with patch("app.utils.qr_cache.render_qr_svg") as render:
+        again = client.get(f"/dashboard/sessions/{sess_id}/qr.svg", headers={"If-None-Match": etag})
+        print_page = client.get(f"/dashboard/sessions/{sess_id}/print-qr")
+        render.assert_not_called()
+    assert again.status_code == 304
+    assert print_page.data.count(b"<svg") == 1
+
+    client.post("/logout")
+    _login(client, "qr-stranger@test.com")
+    assert client.get(f"/dashboard/sessions/{sess_id}/qr.svg").status_code == 403
+
+
+def test_new_link_invalidates_cached_qr(app, client):
+    with app.app_context():
+        owner = _make_user("qr-new@test.com")
+        sess_id = _make_session_with_link(owner.id)
+        token = IntakeLink.query.filter_by(dashboard_id=sess_id).first().token
+
+    _login(client, "qr-new@test.com")
+    client.get(f"/dashboard/sessions/{sess_id}/qr.svg")
+    old_urls = [url for url in qr_cache._entries if token in url]
+    assert old_urls
+
+    client.post(f"/dashboard/sessions/{sess_id}/links/new")
+    assert not any(url in qr_cache for url in old_urls)
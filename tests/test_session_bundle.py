@@ -0,0 +1,233 @@
+"""Tests for the streaming ZIP bundle export of a session."""
+import io
+import json
+import threading
+import zipfile
+import pytest
+from datetime import datetime, timezone, timedelta
+from app import create_app
+from app.extensions import db as _db
+from app.models import PoliceUser, DashboardSession, AccessLog
+from app.store import SubmissionStore, Submission, submission_store
+from app.utils.session_bundle import stream_session_bundle, stream_zip
+
+
+class TestConfig:
+    TESTING = True
+    SECRET_KEY = "test-secret-key"
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    WTF_CSRF_ENABLED = False
+    RATELIMIT_ENABLED = False
+    RATELIMIT_STORAGE_URI = "memory://"
+    RATELIMIT_DEFAULT = "10000 per day"
+    SMTP_HOST = ""
+    MAIL_FROM = ""
+    CONFIRMATION_TOKEN_MAX_AGE = 86400
+    REQUIRE_CPF_FOR_SIGNUP = False
+    MAX_CONTENT_LENGTH = 12 * 1024 * 1024
+    DASHBOARD_MAX_AGE_HOURS = 12
+    DEFAULT_MAX_PHOTOS = 3
+    DEFAULT_MAX_PHOTO_SIZE_MB = 3
+
+
+@pytest.fixture()
+def app():
+    application = create_app(TestConfig)
+    with application.app_context():
+        _db.create_all()
+        yield application
+        _db.session.remove()
+        _db.drop_all()
+
+
+@pytest.fixture()
+def client(app):
+    return app.test_client()
+
+
+def _make_user(email, plan_type="premium", password="senha1234"):
+    user = PoliceUser(email=email, display_name=email, is_active=True, plan_type=plan_type)
+    user.set_password(password)
+    _db.session.add(user)
+    _db.session.commit()
+    return user
+
+
+def _login(client, email, password="senha1234"):
+    return client.post("/login", data={"email": email, "password": password})
+
+
+def _make_sub(sid, dashboard_id, name, photos=None, photo_keys=None, offset=0):
+    return Submission(
+        submission_id=sid, dashboard_id=dashboard_id, guest_name=name,
+        dob=None, rg="1234567", cpf=None, phone=None, address=None,
+        answers={"descricao": "Levaram o celular"}, narrative="Relato livre",
+        crime_type="outros", photos=photos or [], photo_keys=photo_keys or [],
+        received_at=datetime.now(timezone.utc) + timedelta(seconds=offset),
+    )
+
+
+class _SlowStorage:
+    """photo_storage stand-in that records how many downloads overlap."""
+
+    def __init__(self, objects):
+        self._objects = objects
+        self._lock = threading.Lock()
+        self._active = 0
+        self.max_active = 0
+        self._gate = threading.Barrier(2, timeout=2)
+
+    def download(self, key):
+        with self._lock:
+            self._active += 1
+            self.max_active = max(self.max_active, self._active)
+        try:
+            # The first two downloads only finish if they run concurrently.
+            if key in ("photos/a", "photos/b"):
+                self._gate.wait()
+            return self._objects.get(key)
+        finally:
+            with self._lock:
+                self._active -= 1
+
+
+# ---------------------------------------------------------------------------
+# stream_zip / stream_session_bundle
+# ---------------------------------------------------------------------------
+
+def test_stream_zip_yields_a_valid_archive_in_chunks():
+    payload = bytes(range(256)) * 1024  # 256 KB, written in several slices
+    chunks = list(stream_zip([("a.txt", b"ola"), ("b.jpg", payload)]))
+
+    assert len(chunks) > 2
+    with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as archive:
+        assert archive.testzip() is None
+        assert archive.read("a.txt") == b"ola"
+        assert archive.read("b.jpg") == payload
+        assert archive.getinfo("b.jpg").compress_type == zipfile.ZIP_STORED
+
+
+def test_bundle_contains_texts_answers_and_overlapped_attachments():
+    store = SubmissionStore()
+    jpeg = b"\xff\xd8\xff" + b"0" * 100
+    pdf = b"%PDF-1.4 test"
+    store.add(_make_sub("b1", 1, "Ana Souza", photo_keys=["photos/a", "photos/b"], offset=0))
+    store.add(_make_sub("b2", 1, "José", photos=[pdf], photo_keys=["photos/missing"], offset=1))
+    store.add(_make_sub("b3", 2, "Outra Sala"))
+    storage = _SlowStorage({"photos/a": jpeg, "photos/b": pdf})
+
+    data = b"".join(stream_session_bundle(store, 1, storage=storage))
+
+    assert storage.max_active >= 2
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        assert archive.namelist() == [
+            "001_Ana_Souza/relato.txt",
+            "001_Ana_Souza/respostas.json",
+            "001_Ana_Souza/anexos/anexo_1.jpg",
+            "001_Ana_Souza/anexos/anexo_2.pdf",
+            "002_José/relato.txt",
+            "002_José/respostas.json",
+            "002_José/anexos/anexo_2.pdf",
+        ]
+        assert archive.read("001_Ana_Souza/anexos/anexo_1.jpg") == jpeg
+        answers = json.loads(archive.read("002_José/respostas.json"))
+        assert answers["id"] == "b2"
+        assert answers["answers"] == {"descricao": "Levaram o celular"}
+        assert "Levaram o celular" in archive.read("001_Ana_Souza/relato.txt").decode("utf-8")
+
+
+def test_bundle_without_attachments_skips_photos():
+    store = SubmissionStore()
+    store.add(_make_sub("t1", 1, "Ana", photos=[b"\xff\xd8\xffdata"]))
+
+    data = b"".join(stream_session_bundle(store, 1, with_attachments=False))
+
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        assert archive.namelist() == ["001_Ana/relato.txt", "001_Ana/respostas.json"]
+
+
+def test_bundle_fetches_store_photos_lazily_and_skips_failed_downloads(monkeypatch):
+    store = SubmissionStore()
+    jpeg = b"\xff\xd8\xff" + b"1" * 50
+    store.add(_make_sub("f1", 1, "Ana", photos=[jpeg], photo_keys=["photos/broken"]))
+
+    class _BrokenStorage:
+        def download(self, key):
+            raise ConnectionError("S3 indisponível")
+
+    original_get_many = store.get_many
+
+    def _get_many(ids, with_photos=True, dashboard_id=None):
+        assert not with_photos
+        return original_get_many(ids, with_photos=with_photos, dashboard_id=dashboard_id)
+
+    monkeypatch.setattr(store, "get_many", _get_many)
+    data = b"".join(stream_session_bundle(store, 1, storage=_BrokenStorage()))
+
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        assert archive.namelist() == [
+            "001_Ana/relato.txt",
+            "001_Ana/respostas.json",
+            "001_Ana/anexos/anexo_2.jpg",
+        ]
+        assert archive.read("001_Ana/anexos/anexo_2.jpg") == jpeg
+
+
+# ---------------------------------------------------------------------------
+# Route: export_session_bundle
+# ---------------------------------------------------------------------------
+
+def test_export_session_bundle_route(app, client):
+    with app.app_context():
+        owner = _make_user("owner@bundle.com")
+        _make_user("other@bundle.com")
+        sess = DashboardSession(
+            user_id=owner.id,
+            label="Plantão Noite",
+            expires_at=datetime.now(timezone.utc) + timedelta(hours=12),
+        )
+        _db.session.add(sess)
+        _db.session.commit()
+        sess_id = sess.id
+        owner_id = owner.id
+
+    submission_store.add(_make_sub("test-bundle-1", sess_id, "Maria",
+                                   photos=[b"\xff\xd8\xffphoto"]))
+    try:
+        _login(client, "owner@bundle.com")
+        resp = client.get(f"/dashboard/sessions/{sess_id}/export-bundle")
+        assert resp.status_code == 200
+        assert resp.is_streamed
+        assert resp.mimetype == "application/zip"
+        assert "sessao_" in resp.headers["Content-Disposition"]
+        with zipfile.ZipFile(io.BytesIO(resp.get_data())) as archive:
+            assert "001_Maria/anexos/anexo_1.jpg" in archive.namelist()
+        with app.app_context():
+            logs = AccessLog.query.filter_by(user_id=owner_id, action="export_bundle").all()
+            assert [log.submission_id for log in logs] == ["test-bundle-1"]
+
+        client.post("/logout")
+        _login(client, "other@bundle.com")
+        assert client.get(f"/dashboard/sessions/{sess_id}/export-bundle").status_code == 403
+    finally:
+        submission_store.delete("test-bundle-1")
+
+
+def test_export_session_bundle_closed_session_redirects(app, client):
+    with app.app_context():
+        owner = _make_user("closed@bundle.com")
+        sess = DashboardSession(
+            user_id=owner.id,
+            label="Encerrada",
+            expires_at=datetime.now(timezone.utc) - timedelta(hours=1),
+            is_active=False,
+        )
+        _db.session.add(sess)
+        _db.session.commit()
+        sess_id = sess.id
+
+    _login(client, "closed@bundle.com")
+    resp = client.get(f"/dashboard/sessions/{sess_id}/export-bundle")
+    assert resp.status_code == 302
+    assert f"/dashboard/sessions/{sess_id}" in resp.headers["Location"]
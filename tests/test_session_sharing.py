@@ -1,9 +1,10 @@
 """Tests for session sharing / collaboration feature."""
+import re
 import pytest
 from datetime import datetime, timezone, timedelta
 from app import create_app
 from app.extensions import db as _db
-from app.models import PoliceUser, DashboardSession, IntakeLink, SessionCollaborator
+from app.models import PoliceUser, DashboardSession, IntakeLink, SessionCollaborator, MinimalLogEntry
 from app.schemas.crime_types import DEFAULT_FORM_SCHEMA
 from app.store import submission_store, Submission
 
@@ -294,3 +295,165 @@ def test_assign_submission_endpoint_removed(app, client):
     assert response.status_code in (404, 405)
 
     submission_store.delete("test-assign-001")
+
+
+def test_submission_events_stream_respects_access(app, client):
+    """The live events stream is limited to the owner and collaborators."""
+    with app.app_context():
+        owner = _make_user("owner-sse@test.com", "Owner")
+        _make_user("stranger-sse@test.com", "Stranger")
+        sess_id = _make_session(owner.id).id
+
+    _login(client, "stranger-sse@test.com")
+    assert client.get(f"/api/sessions/{sess_id}/events").status_code == 403
+
+
+def test_submission_events_stream_pushes_new_submissions(app, client):
+    """A new submission reaches an open stream as a compact summary."""
+    app.config["SSE_HEARTBEAT_SECONDS"] = 0.1
+    app.config["SSE_MAX_STREAMS"] = 1
+    with app.app_context():
+        owner = _make_user("owner-sse2@test.com", "Owner")
+        sess_id = _make_session(owner.id).id
+
+    _login(client, "owner-sse2@test.com")
+    response = client.get(f"/api/sessions/{sess_id}/events")
+    assert response.status_code == 200
+    assert response.mimetype == "text/event-stream"
+    # One stream per worker here: a second viewer falls back to polling.
+    assert client.get(f"/api/sessions/{sess_id}/events").status_code == 503
+
+    chunks = response.response
+    assert next(chunks).startswith(b"retry:")
+    submission_store.add(Submission(
+        submission_id="test-sse-001", dashboard_id=sess_id, guest_name="Live Person",
+        dob=None, rg="123", cpf="secret", phone=None, address=None, answers={},
+        narrative="", crime_type="outros", photos=[], received_at=datetime.now(timezone.utc),
+    ))
+    chunk = next(chunks)
+    while chunk.startswith(b":"):
+        chunk = next(chunks)
+    assert chunk.startswith(b"event: added\n")
+    assert b"Live Person" in chunk and b"secret" not in chunk
+    response.close()
+
+    assert client.get(f"/api/sessions/{sess_id}/events").status_code == 200
+    submission_store.delete("test-sse-001")
+
+
+def test_list_submissions_conditional_get_and_delta(app, client):
+    """ETag revalidation answers 304; ?since returns only the changes."""
+    with app.app_context():
+        owner = _make_user("owner-etag@test.com", "Owner")
+        sess_id = _make_session(owner.id).id
+
+    def _sub(sid, name):
+        return Submission(
+            submission_id=sid, dashboard_id=sess_id, guest_name=name,
+            dob=None, rg=None, cpf=None, phone=None, address=None, answers={},
+            narrative="", crime_type="outros", photos=[],
+            received_at=datetime.now(timezone.utc),
+        )
+
+    submission_store.add(_sub("test-etag-001", "Primeira"))
+    _login(client, "owner-etag@test.com")
+    first = client.get(f"/api/sessions/{sess_id}/submissions")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    version = int(first.headers["X-Submissions-Version"])
+
+    again = client.get(f"/api/sessions/{sess_id}/submissions", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.data == b""
+
+    submission_store.add(_sub("test-etag-002", "Segunda"))
+    submission_store.delete("test-etag-001")
+    assert client.get(
+        f"/api/sessions/{sess_id}/submissions", headers={"If-None-Match": etag}
+    ).status_code == 200
+
+    delta = client.get(f"/api/sessions/{sess_id}/submissions?since={version}").get_json()
+    assert delta["reset"] is False
+    assert delta["version"] == version + 2
+    assert [s["id"] for s in delta["added"]] == ["test-etag-002"]
+    assert delta["removed"] == ["test-etag-001"]
+    assert delta["count"] == 1
+
+    reset = client.get(f"/api/sessions/{sess_id}/submissions?since=0").get_json()
+    assert reset["reset"] is True
+    assert [s["id"] for s in reset["added"]] == ["test-etag-002"]
+
+    submission_store.delete("test-etag-002")
+
+
+def test_session_detail_pages_pending_and_logs(app, client):
+    """Only the first page is rendered inline; fragments serve the rest by cursor."""
+    base = datetime(2026, 1, 5, 12, 0)
+    with app.app_context():
+        owner = _make_user("owner-pages@test.com", "Owner")
+        _make_user("stranger-pages@test.com", "Stranger")
+        sess_id = _make_session(owner.id).id
+        # Shared timestamps and undated rows exercise the keyset tie-breaks.
+        for i in range(70):
+            _db.session.add(MinimalLogEntry(
+                dashboard_id=sess_id, police_user_id=owner.id,
+                guest_display_name=f"Log {i:03d}", status="closed",
+                received_at=None if i % 10 == 0 else base + timedelta(minutes=i // 3),
+            ))
+        _db.session.commit()
+
+    sids = [f"test-page-{i:03d}" for i in range(60)]
+    for i, sid in enumerate(sids):
+        submission_store.add(Submission(
+            submission_id=sid, dashboard_id=sess_id, guest_name=f"Pessoa {i:03d}",
+            dob=None, rg=None, cpf=None, phone=None, address=None, answers={},
+            narrative="", crime_type="outros", photos=[],
+            received_at=datetime.now(timezone.utc) + timedelta(seconds=i),
+        ))
+    try:
+        _login(client, "owner-pages@test.com")
+        html = client.get(f"/dashboard/sessions/{sess_id}").get_data(as_text=True)
+        assert html.count('id="sub-test-page-') == 50
+        assert 'id="sub-test-page-050"' not in html
+        assert html.count("Log 0") == 50
+        assert "let _pendingTotal = 60;" in html
+
+        first = client.get(f"/dashboard/sessions/{sess_id}/fragments/pending")
+        rest = client.get(
+            f"/dashboard/sessions/{sess_id}/fragments/pending",
+            query_string={"cursor": first.headers["X-Next-Cursor"]},
+        )
+        assert rest.headers["X-Next-Cursor"] == ""
+        assert rest.headers["X-Pending-Count"] == "60"
+        assert rest.get_data(as_text=True).count('id="sub-test-page-') == 10
+
+        names, cursor = [], None
+        while True:
+            page = client.get(
+                f"/dashboard/sessions/{sess_id}/fragments/logs",
+                query_string={"cursor": cursor} if cursor else {},
+            )
+            assert page.status_code == 200
+            names += re.findall(r"<td>(Log \d+)</td>", page.get_data(as_text=True))
+            cursor = page.headers["X-Next-Cursor"]
+            if not cursor:
+                break
+        assert len(names) == len(set(names)) == 70
+        # Newest first, undated rows last.
+        assert names[:3] == ["Log 069", "Log 068", "Log 067"]
+        assert names[-7:] == [f"Log {i:03d}" for i in (60, 50, 40, 30, 20, 10, 0)]
+
+        assert client.get(
+            f"/dashboard/sessions/{sess_id}/fragments/logs?cursor=bogus"
+        ).status_code == 400
+        assert client.get(
+            f"/dashboard/sessions/{sess_id}/fragments/pending?cursor=bogus"
+        ).status_code == 400
+
+        client.post("/logout")
+        _login(client, "stranger-pages@test.com")
+        assert client.get(f"/dashboard/sessions/{sess_id}/fragments/pending").status_code == 403
+        assert client.get(f"/dashboard/sessions/{sess_id}/fragments/logs").status_code == 403
+    finally:
+        for sid in sids:
+            submission_store.delete(sid)
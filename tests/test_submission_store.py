@@ -0,0 +1,1041 @@
+"""Tests for the submission stores (in-memory, SQLite and Redis-backed)."""
+import pytest
+from datetime import datetime, timezone, timedelta
+
+from app.store import Submission, SubmissionStore
+
+
+def _make_sub(submission_id, dashboard_id=1, guest_name=None, photos=None,
+              photo_keys=None, received_at=None, **overrides):
+    fields = dict(
+        submission_id=submission_id,
+        dashboard_id=dashboard_id,
+        guest_name=guest_name or f"Guest {submission_id}",
+        dob=None, rg=None, cpf=None, phone=None, address=None,
+        answers={"descricao": "teste"},
+        narrative=None,
+        crime_type="outros",
+        photos=photos or [],
+        photo_keys=photo_keys or [],
+        received_at=received_at or datetime.now(timezone.utc),
+    )
+    fields.update(overrides)
+    return Submission(**fields)
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return SubmissionStore()
+    if request.param == "sqlite":
+        from app.storage.sqlite_store import SQLiteSubmissionStore
+        return SQLiteSubmissionStore(str(tmp_path / "submissions.db"))
+    fakeredis = pytest.importorskip("fakeredis")
+    from app.storage.redis_store import RedisSubmissionStore
+    return RedisSubmissionStore(fakeredis.FakeRedis())
+
+
+# ---------------------------------------------------------------------------
+# Batched reads
+# ---------------------------------------------------------------------------
+
+def test_get_many_preserves_order_and_skips_unknown(store):
+    now = datetime.now(timezone.utc)
+    for i in range(3):
+        store.add(_make_sub(f"s{i}", received_at=now + timedelta(seconds=i)))
+
+    subs = store.get_many(["s2", "missing", "s0"])
+
+    assert [s.submission_id for s in subs] == ["s2", "s0"]
+    assert store.get_many([]) == []
+
+
+def test_get_many_loads_photos(store):
+    store.add(_make_sub("p1", photos=[b"\xff\xd8\xffone", b"\xff\xd8\xfftwo"]))
+    store.add(_make_sub("p2"))
+
+    subs = {s.submission_id: s for s in store.get_many(["p1", "p2"])}
+
+    assert subs["p1"].photos == [b"\xff\xd8\xffone", b"\xff\xd8\xfftwo"]
+    assert subs["p2"].photos == []
+
+
+def test_get_many_without_photos_keeps_the_photo_count(store):
+    store.add(_make_sub("pc1", photos=[b"\xff\xd8\xffone", b"\xff\xd8\xfftwo"],
+                        photo_keys=["photos/pc1"]))
+
+    (sub,) = store.get_many(["pc1"], with_photos=False)
+    assert sub.photo_count == 3
+    assert store.list_summaries_for_dashboard(1)[0].photo_count == 3
+
+
+def test_get_photo_returns_one_photo(store):
+    store.add(_make_sub("p1", photos=[b"\xff\xd8\xffone", b"\xff\xd8\xfftwo"]))
+
+    assert bytes(store.get_photo("p1", 1)) == b"\xff\xd8\xfftwo"
+    assert bytes(store.get_photo("p1", 0, dashboard_id=1)) == b"\xff\xd8\xffone"
+    assert store.get_photo("p1", 2) is None
+    assert store.get_photo("p1", -1) is None
+    assert store.get_photo("p1", 0, dashboard_id=2) is None
+    assert store.get_photo("missing", 0) is None
+
+
+def test_list_for_dashboard_returns_only_that_dashboard(store):
+    store.add(_make_sub("a", dashboard_id=1))
+    store.add(_make_sub("b", dashboard_id=2))
+    store.add(_make_sub("c", dashboard_id=1))
+
+    assert [s.submission_id for s in store.list_for_dashboard(1)] == ["a", "c"]
+
+
+# ---------------------------------------------------------------------------
+# Summary projection
+# ---------------------------------------------------------------------------
+
+def test_list_summaries_for_dashboard_has_no_photo_bytes(store):
+    from app.store import SubmissionSummary
+
+    store.add(_make_sub("x1", photos=[b"\xff\xd8\xffdata"], photo_keys=["photos/k1"]))
+    store.add(_make_sub("x2", dashboard_id=2))
+
+    summaries = store.list_summaries_for_dashboard(1)
+
+    assert len(summaries) == 1
+    summary = summaries[0]
+    assert isinstance(summary, SubmissionSummary)
+    assert not hasattr(summary, "photos")
+    assert summary.submission_id == "x1"
+    assert summary.guest_name == "Guest x1"
+    assert summary.photo_keys == ["photos/k1"]
+    assert summary.photo_count == 2
+
+
+def test_list_summaries_does_not_read_photo_keys():
+    fakeredis = pytest.importorskip("fakeredis")
+    from app.storage.redis_store import RedisSubmissionStore
+
+    client = fakeredis.FakeRedis()
+    store = RedisSubmissionStore(client)
+    store.add(_make_sub("r1", photos=[b"\xff\xd8\xffdata"]))
+    for key in client.scan_iter(match=b"*photo*"):
+        client.delete(key)
+
+    # Listing still works because it never dereferences photo keys.
+    assert [s.photo_count for s in store.list_summaries_for_dashboard(1)] == [1]
+
+
+# ---------------------------------------------------------------------------
+# Redis codec
+# ---------------------------------------------------------------------------
+
+def test_codec_round_trip_drops_nulls():
+    from app.storage.redis_codec import FORMAT_JSON, decode_entry, encode_entry
+
+    raw = encode_entry({"guest_name": "Ana", "rg": None, "answers": {"a": None, "b": [{"x": None, "y": 1}]}})
+
+    assert raw[0] == FORMAT_JSON
+    data = decode_entry(raw)
+    assert data["answers"] == {"b": [{"y": 1}]}
+    assert "rg" not in data
+    assert data["photo_encoding"] == "raw"
+
+
+def test_codec_compresses_long_payloads():
+    from app.storage.redis_codec import FORMAT_ZLIB, decode_entry, encode_entry
+
+    data = {"narrative": "relato " * 500}
+    raw = encode_entry(data, compression="zlib")
+
+    assert raw[0] == FORMAT_ZLIB
+    assert len(raw) < len(data["narrative"])
+    assert decode_entry(raw)["narrative"] == data["narrative"]
+    assert encode_entry(data, compression="none")[0] != FORMAT_ZLIB
+
+
+def test_redis_store_reads_legacy_json_entries():
+    import base64
+    import json
+    fakeredis = pytest.importorskip("fakeredis")
+    from app.storage.redis_store import RedisSubmissionStore
+
+    client = fakeredis.FakeRedis()
+    store = RedisSubmissionStore(client)
+    received_at = datetime.now(timezone.utc)
+    client.set("triagem:sub:old", json.dumps({
+        "submission_id": "old", "dashboard_id": 1, "guest_name": "Legado",
+        "dob": None, "rg": None, "cpf": None, "phone": None, "address": None,
+        "answers": {}, "narrative": None, "crime_type": "outros",
+        "received_at": received_at.isoformat(), "photo_count": 1, "photo_keys": [],
+    }).encode())
+    client.set("triagem:photo:old:0", base64.b64encode(b"\xff\xd8\xffold"))
+    client.rpush("triagem:idx:1", "old")
+    assert store.migrate_legacy_indexes() == 1
+    store.add(_make_sub("new", photos=[b"\xff\xd8\xffnew"]))
+
+    subs = {s.submission_id: s for s in store.list_for_dashboard(1)}
+
+    assert subs["old"].photos == [b"\xff\xd8\xffold"]
+    assert subs["new"].photos == [b"\xff\xd8\xffnew"]
+    assert client.get("triagem:{dash:1}:photo:new:0") == b"\xff\xd8\xffnew"
+
+
+# ---------------------------------------------------------------------------
+# Atomic dedup-and-insert
+# ---------------------------------------------------------------------------
+
+def test_add_if_unique_rejects_same_name_or_rg(store):
+    assert store.add_if_unique(_make_sub("u1", guest_name="João da Silva", rg="12.345.678-9"))
+    assert not store.add_if_unique(_make_sub("u2", guest_name="JOAO DA SILVA"))
+    assert not store.add_if_unique(_make_sub("u3", guest_name="Outro Nome", rg="123456789"))
+    assert store.add_if_unique(_make_sub("u4", guest_name="João da Silva", dashboard_id=2))
+
+    assert [s.submission_id for s in store.list_for_dashboard(1)] == ["u1"]
+    assert store.get("u2") is None
+
+
+def test_add_if_unique_stores_photos(store):
+    assert store.add_if_unique(_make_sub("ph", photos=[b"\xff\xd8\xffa", b"%PDF-b"]))
+
+    assert store.get("ph").photos == [b"\xff\xd8\xffa", b"%PDF-b"]
+
+
+def test_add_if_unique_is_atomic_under_concurrency():
+    import threading
+
+    store = SubmissionStore()
+    results = []
+    barrier = threading.Barrier(8)
+
+    def _submit(i):
+        barrier.wait()
+        results.append(store.add_if_unique(_make_sub(f"c{i}", guest_name="Mesmo Nome")))
+
+    threads = [threading.Thread(target=_submit, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results.count(True) == 1
+    assert store.count_for_dashboard(1) == 1
+
+
+# ---------------------------------------------------------------------------
+# Dashboard purge
+# ---------------------------------------------------------------------------
+
+def test_purge_dashboard_returns_external_photo_keys(store):
+    store.add(_make_sub("g1", photo_keys=["photos/a"], photos=[b"\xff\xd8\xffm"]))
+    store.add_if_unique(_make_sub("g2", guest_name="Outra", photo_keys=["photos/b"]))
+    store.add(_make_sub("g3", dashboard_id=2, photo_keys=["photos/c"]))
+
+    photo_keys = store.purge_dashboard(1)
+
+    assert sorted(photo_keys) == ["photos/a", "photos/b"]
+    assert store.list_for_dashboard(1) == []
+    assert store.get("g1") is None
+    assert store.count_for_dashboard(2) == 1
+    assert store.add_if_unique(_make_sub("g4", guest_name="Outra"))
+
+
+def test_redis_purge_dashboard_leaves_no_keys():
+    fakeredis = pytest.importorskip("fakeredis")
+    from app.storage.redis_store import RedisSubmissionStore
+
+    client = fakeredis.FakeRedis()
+    store = RedisSubmissionStore(client)
+    store.add(_make_sub("k1", photos=[b"\xff\xd8\xff1"], photo_keys=["photos/x"]))
+    store.add_if_unique(_make_sub("k2", guest_name="Outra", photos=[b"\xff\xd8\xff2"]))
+    store.delete("k1")
+
+    assert store.purge_dashboard(1) == []
+    assert client.keys("*") == []
+
+
+def test_redis_purge_of_an_unknown_room_writes_nothing():
+    fakeredis = pytest.importorskip("fakeredis")
+    from app.storage.redis_store import RedisSubmissionStore
+
+    client = fakeredis.FakeRedis()
+    store = RedisSubmissionStore(client)
+    assert store.purge_dashboard(7) == []
+    assert client.keys("*") == []
+
+
+def test_redis_purge_dashboard_handles_legacy_entries():
+    import base64
+    import json
+    fakeredis = pytest.importorskip("fakeredis")
+    from app.storage.redis_store import RedisSubmissionStore
+
+    client = fakeredis.FakeRedis()
+    store = RedisSubmissionStore(client)
+    client.set("triagem:sub:old", json.dumps({
+        "submission_id": "old", "dashboard_id": 1, "guest_name": "Legado",
+        "answers": {}, "crime_type": "outros",
+        "received_at": datetime.now(timezone.utc).isoformat(),
+        "photo_count": 1, "photo_keys": ["photos/legacy"],
+    }).encode())
+    client.set("triagem:photo:old:0", base64.b64encode(b"\xff\xd8\xffold"))
+    client.rpush("triagem:idx:1", "old")
+    store.migrate_legacy_indexes()
+
+    assert store.purge_dashboard(1) == ["photos/legacy"]
+    assert client.keys("*") == []
+
+
+# ---------------------------------------------------------------------------
+# Ordered index and cursor pagination
+# ---------------------------------------------------------------------------
+
+def test_iter_for_dashboard_pages_in_received_order(store):
+    base = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+    # Inserted out of order; pages must follow received_at.
+    for i in (3, 0, 4, 1, 2):
+        store.add(_make_sub(f"i{i}", received_at=base + timedelta(minutes=i)))
+
+    page1, cursor = store.iter_for_dashboard(1, limit=2)
+    page2, cursor2 = store.iter_for_dashboard(1, cursor=cursor, limit=2)
+    page3, cursor3 = store.iter_for_dashboard(1, cursor=cursor2, limit=2)
+
+    assert [s.submission_id for s in page1] == ["i0", "i1"]
+    assert [s.submission_id for s in page2] == ["i2", "i3"]
+    assert [s.submission_id for s in page3] == ["i4"]
+    assert cursor3 is None
+
+
+def test_iter_for_dashboard_survives_deletes_and_ties(store):
+    same = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+    for sid in ("t1", "t2", "t3", "t4"):
+        store.add(_make_sub(sid, received_at=same))
+
+    page1, cursor = store.iter_for_dashboard(1, limit=2)
+    store.delete("t1")
+    page2, cursor2 = store.iter_for_dashboard(1, cursor=cursor, limit=2)
+
+    assert [s.submission_id for s in page1] == ["t1", "t2"]
+    assert [s.submission_id for s in page2] == ["t3", "t4"]
+    assert cursor2 is None
+    assert store.count_for_dashboard(1) == 3
+
+
+def test_iter_for_dashboard_rejects_a_non_positive_limit(store):
+    store.add(_make_sub("l1"))
+    with pytest.raises(ValueError):
+        store.iter_for_dashboard(1, limit=0)
+    with pytest.raises(ValueError):
+        store.iter_for_dashboard(1, limit=-1)
+
+
+def test_iter_for_dashboard_cursor_after_deleted_and_purged_entries(store):
+    base = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+    for i in range(6):
+        store.add(_make_sub(f"d{i}", received_at=base + timedelta(minutes=i)))
+
+    page1, cursor = store.iter_for_dashboard(1, limit=3)
+    store.delete("d2")  # the cursor's own entry
+    store.delete("d3")
+    page2, cursor2 = store.iter_for_dashboard(1, cursor=cursor, limit=3)
+    assert [s.submission_id for s in page2] == ["d4", "d5"]
+    assert cursor2 is None
+
+    store.purge_dashboard(1)
+    store.add(_make_sub("d6", received_at=base))
+    assert [s.submission_id for s in store.iter_for_dashboard(1, limit=3)[0]] == ["d6"]
+    assert store.iter_for_dashboard(1, cursor=cursor, limit=3) == ([], None)
+
+
+# ---------------------------------------------------------------------------
+# Shared SQLite store
+# ---------------------------------------------------------------------------
+
+def test_sqlite_store_is_shared_between_instances(tmp_path):
+    from app.storage.sqlite_store import SQLiteSubmissionStore
+
+    path = str(tmp_path / "shared.db")
+    worker_a = SQLiteSubmissionStore(path)
+    worker_b = SQLiteSubmissionStore(path)
+
+    assert worker_a.add_if_unique(_make_sub("w1", guest_name="Maria", photos=[b"\xff\xd8\xffw"]))
+    assert not worker_b.add_if_unique(_make_sub("w2", guest_name="maria"))
+
+    assert worker_b.get("w1").photos == [b"\xff\xd8\xffw"]
+    worker_b.purge_dashboard(1)
+    assert worker_a.count_for_dashboard(1) == 0
+
+
+def test_sqlite_store_full_database_raises_store_unavailable(tmp_path):
+    from app.storage.sqlite_store import SQLiteSubmissionStore
+    from app.store import StoreUnavailableError
+
+    store = SQLiteSubmissionStore(str(tmp_path / "full.db"))
+    conn = store._conn()
+    (pages,) = conn.execute("PRAGMA page_count").fetchone()
+    conn.execute(f"PRAGMA max_page_count = {pages + 2}")
+
+    with pytest.raises(StoreUnavailableError):
+        store.add_if_unique(_make_sub("big", photos=[b"\xff\xd8" * 100_000]))
+
+    assert not conn.in_transaction
+    assert store.get("big") is None
+    store.add(_make_sub("small"))
+    assert store.get("small") is not None
+
+
+def test_sqlite_default_path_is_not_on_tmpfs():
+    from app.storage.sqlite_store import default_store_path
+
+    assert not default_store_path().startswith("/dev/shm")
+
+
+def test_sqlite_store_selected_by_config(tmp_path, monkeypatch):
+    from app import store as store_module
+    from app.storage.sqlite_store import SQLiteSubmissionStore
+
+    monkeypatch.setenv("SUBMISSION_STORE", "sqlite")
+    monkeypatch.setenv("SUBMISSION_STORE_PATH", str(tmp_path / "cfg.db"))
+    monkeypatch.setattr("app.redis_client.get_redis_client", lambda: None)
+
+    assert isinstance(store_module._build_store(), SQLiteSubmissionStore)
+
+
+# ---------------------------------------------------------------------------
+# In-memory store journal
+# ---------------------------------------------------------------------------
+
+def test_journal_replays_store_after_restart(tmp_path):
+    from app.storage.store_journal import StoreJournal
+
+    first = SubmissionStore(journal=StoreJournal(str(tmp_path)))
+    first.add_if_unique(_make_sub("j1", guest_name="Ana", photos=[b"\xff\xd8\xffj"]))
+    first.add(_make_sub("j2", photo_keys=["photos/j2"]))
+    first.add(_make_sub("j3", dashboard_id=2))
+    first.delete("j2")
+    first.purge_dashboard(2)
+
+    recycled = SubmissionStore(journal=StoreJournal(str(tmp_path)))
+
+    assert [s.submission_id for s in recycled.list_for_dashboard(1)] == ["j1"]
+    assert recycled.get("j1").photos == [b"\xff\xd8\xffj"]
+    assert recycled.count_for_dashboard(2) == 0
+    assert not recycled.add_if_unique(_make_sub("j4", guest_name="ana"))
+
+
+def test_journal_compaction_drops_expired_and_ignores_torn_tail(tmp_path):
+    from app.storage.store_journal import LOG_NAME, StoreJournal
+
+    journal = StoreJournal(str(tmp_path), compact_every=3)
+    store = SubmissionStore(journal=journal)
+    old = datetime.now(timezone.utc) - timedelta(hours=13)
+    store.add(_make_sub("old", received_at=old))
+    store.add(_make_sub("k1"))
+    store.add(_make_sub("k2"))  # third append starts a background compaction
+    store._compactor.join(timeout=5)
+    store.add(_make_sub("k3"))
+
+    assert (tmp_path / "submissions.snap").exists()
+    with open(tmp_path / LOG_NAME, "ab") as fh:
+        fh.write(b"\x00\x00\x10\x00\x01partial")
+
+    recycled = SubmissionStore(journal=StoreJournal(str(tmp_path)))
+    recycled.add(_make_sub("k4"))
+    again = SubmissionStore(journal=StoreJournal(str(tmp_path)))
+
+    assert [s.submission_id for s in recycled.list_for_dashboard(1)] == ["k1", "k2", "k3", "k4"]
+    assert [s.submission_id for s in again.list_for_dashboard(1)] == ["k1", "k2", "k3", "k4"]
+
+
+def test_journal_compaction_copies_photos_without_decoding_them(tmp_path, monkeypatch):
+    import time
+    from app.storage import store_journal
+    from app.storage.store_journal import StoreJournal
+
+    store = SubmissionStore(journal=StoreJournal(str(tmp_path)))
+    store.add(_make_sub("p1", dashboard_id=1, photos=[b"\xff\xd8one", b"\xff\xd8two"]))
+    store.add(_make_sub("p2", dashboard_id=2, photos=[b"\xff\xd8three"]),
+              expire_at=time.time() + 3600)
+    store.set_dashboard_expiry(2, 0)
+
+    def _no_decode(body):
+        raise AssertionError("compaction must not decode photos")
+
+    monkeypatch.setattr(store_journal, "_decode_submission", _no_decode)
+    assert StoreJournal(str(tmp_path)).compact() == 2
+    assert not (tmp_path / store_journal.LOG_NAME).exists()
+    monkeypatch.undo()
+
+    recycled = SubmissionStore(journal=StoreJournal(str(tmp_path)))
+    assert recycled.get("p1").photos == [b"\xff\xd8one", b"\xff\xd8two"]
+    assert recycled.get("p2").photos == [b"\xff\xd8three"]
+
+
+def test_journal_add_encodes_before_spilling(tmp_path, monkeypatch):
+    from app.storage.photo_spill import SpilledPhoto
+    from app.storage.store_journal import StoreJournal
+
+    store = SubmissionStore(journal=StoreJournal(str(tmp_path / "journal")), memory_budget=1024,
+                            spill_threshold=8, spill_dir=str(tmp_path))
+
+    def _read_back(photo):
+        raise AssertionError("spilled photo read back")
+
+    monkeypatch.setattr(SpilledPhoto, "__bytes__", _read_back)
+    store.add(_make_sub("s1", photos=[b"\xff\xd8" + b"x" * 64]))
+    assert isinstance(store.get("s1").photos[0], SpilledPhoto)
+    monkeypatch.undo()
+
+    recycled = SubmissionStore(journal=StoreJournal(str(tmp_path / "journal")))
+    assert bytes(recycled.get("s1").photos[0]) == b"\xff\xd8" + b"x" * 64
+
+
+def test_journal_keeps_each_room_for_its_own_lifetime(tmp_path):
+    import time
+    from app.storage.store_journal import StoreJournal
+
+    store = SubmissionStore(journal=StoreJournal(str(tmp_path)))
+    old = datetime.now(timezone.utc) - timedelta(hours=20)
+    now = time.time()
+    store.add(_make_sub("day", dashboard_id=1, received_at=old), expire_at=now + 4 * 3600)
+    store.add_if_unique(_make_sub("forever", dashboard_id=2, received_at=old), expire_at=0)
+    store.add(_make_sub("gone", dashboard_id=3), expire_at=now - 3600)
+    store.add(_make_sub("extended", dashboard_id=4), expire_at=now - 3600)
+    store.set_dashboard_expiry(4, 0)
+
+    recycled = SubmissionStore(journal=StoreJournal(str(tmp_path)))
+    again = SubmissionStore(journal=StoreJournal(str(tmp_path)))
+
+    for replayed in (recycled, again):
+        assert [replayed.count_for_dashboard(d) for d in (1, 2, 3, 4)] == [1, 1, 0, 1]
+
+
+# ---------------------------------------------------------------------------
+# Lock striping
+# ---------------------------------------------------------------------------
+
+def test_purge_deletes_external_photos_outside_the_lock():
+    from flask import Flask
+
+    store = SubmissionStore()
+    store.add(_make_sub("l1", photo_keys=["photos/l1"]))
+    lock_free_during_delete = []
+
+    class _Storage:
+        def delete(self, key):
+            lock = store._lock_for(1)
+            lock_free_during_delete.append(lock.acquire(blocking=False))
+            lock.release()
+
+    app = Flask(__name__)
+    app.photo_storage = _Storage()
+    with app.app_context():
+        assert store.purge_dashboard(1) == ["photos/l1"]
+
+    assert lock_free_during_delete == [True]
+
+
+def test_dashboards_on_different_stripes_do_not_block_each_other():
+    store = SubmissionStore(stripes=4)
+    with store._lock_for(1):
+        store.add(_make_sub("d2", dashboard_id=2))
+        assert store.count_for_dashboard(2) == 1
+        assert store.get("d2").dashboard_id == 2
+
+
+# ---------------------------------------------------------------------------
+# Memory budget and photo spill
+# ---------------------------------------------------------------------------
+
+def _spill_files(base):
+    import os
+    from app.storage.photo_spill import process_spill_dir
+    return os.listdir(process_spill_dir(str(base)))
+
+
+def test_large_photos_are_spilled_and_read_back(tmp_path):
+    from app.storage.photo_spill import SpilledPhoto
+
+    store = SubmissionStore(memory_budget=10_000, spill_threshold=1_000, spill_dir=str(tmp_path))
+    big, small = b"\xff\xd8\xff" + b"x" * 2_000, b"\xff\xd8\xffsmall"
+    store.add(_make_sub("sp1", photos=[big, small]))
+
+    photos = store.get("sp1").photos
+    assert isinstance(photos[0], SpilledPhoto)
+    assert [bytes(p) for p in photos] == [big, small]
+    assert store.usage_for_dashboard(1) == {"memory_bytes": len(small), "spilled_bytes": len(big)}
+    assert store.memory_bytes == len(small)
+    assert len(list(_spill_files(tmp_path))) == 1
+
+
+def test_photos_over_budget_spill_and_files_are_removed(tmp_path):
+    store = SubmissionStore(memory_budget=150, spill_threshold=10_000, spill_dir=str(tmp_path))
+    store.add(_make_sub("b1", photos=[b"a" * 100]))
+    store.add(_make_sub("b2", photos=[b"b" * 100]))
+    assert not store.add_if_unique(_make_sub("b3", guest_name="Guest b2", photos=[b"c" * 100]))
+
+    assert store.usage_for_dashboard(1) == {"memory_bytes": 100, "spilled_bytes": 100}
+    assert len(list(_spill_files(tmp_path))) == 1
+
+    store.delete("b2")
+    assert list(_spill_files(tmp_path)) == []
+    store.purge_dashboard(1)
+    assert store.memory_bytes == 0
+    assert store.usage_for_dashboard(1) == {"memory_bytes": 0, "spilled_bytes": 0}
+
+
+def test_thumbnails_count_towards_the_budget_and_spill(tmp_path):
+    store = SubmissionStore(memory_budget=150, spill_threshold=10_000, spill_dir=str(tmp_path))
+    store.add(_make_sub("t1", photos=[b"a" * 100]))
+    store.add(_make_sub("t2", photos=[b"b" * 10]))
+
+    assert store.set_thumbnail("t1", 1, 0, "sm", b"s" * 30)
+    assert store.set_thumbnail("t1", 1, 0, "md", b"m" * 30)  # would exceed the budget
+    assert store.set_thumbnail("t2", 1, 0, "sm", b"t" * 5)
+    assert store.get_thumbnail("t1", 0, "md") == b"m" * 30
+    assert store.usage_for_dashboard(1) == {"memory_bytes": 145, "spilled_bytes": 30}
+    assert store.memory_bytes == 145
+    assert len(list(_spill_files(tmp_path))) == 1
+
+    store.delete("t1")
+    assert store.get_thumbnail("t1", 0, "sm") is None
+    assert store.usage_for_dashboard(1) == {"memory_bytes": 15, "spilled_bytes": 0}
+    assert list(_spill_files(tmp_path)) == []
+    store.purge_dashboard(1)
+    assert store.get_thumbnail("t2", 0, "sm") is None
+    assert store.memory_bytes == 0
+
+
+def test_spills_of_dead_processes_are_swept(tmp_path):
+    import os
+    import subprocess
+    import sys
+    from app.storage.photo_spill import _remove_process_dir, process_spill_dir, sweep_stale_spills
+
+    dead = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"],
+                          capture_output=True, text=True, check=True)
+    stale = tmp_path / f"triagem-photos-{dead.stdout.strip()}"
+    stale.mkdir()
+    (stale / "triagem-photo-x").write_bytes(b"guest photo")
+    (tmp_path / "triagem-photo-legacy").write_bytes(b"guest photo")
+    (tmp_path / "unrelated").write_bytes(b"keep")
+
+    own = process_spill_dir(str(tmp_path))
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted([os.path.basename(own), "unrelated"])
+    assert sweep_stale_spills(str(tmp_path)) == 0
+
+    _remove_process_dir(own, os.getpid())
+    assert not os.path.exists(own)
+
+
+# ---------------------------------------------------------------------------
+# Compact Submission record
+# ---------------------------------------------------------------------------
+
+def test_submission_is_slotted_and_interned():
+    import sys
+
+    a = _make_sub("m1", crime_type="".join(["roubo", "_furto"]),
+                  answers={"".join(["local", "_fato"]): "Rua A"})
+    b = _make_sub("m2", crime_type="roubo_furto", answers={"local_fato": "Rua B"})
+
+    assert not hasattr(a, "__dict__")
+    assert a.crime_type is b.crime_type is sys.intern("roubo_furto")
+    assert next(iter(a.answers)) is next(iter(b.answers))
+
+
+def test_submission_shares_read_only_empty_answers():
+    a = _make_sub("e1", answers={})
+    b = _make_sub("e2", answers=None)
+
+    assert a.answers is b.answers
+    assert a.answers == {}
+    with pytest.raises(TypeError):
+        a.answers["x"] = 1
+
+
+def test_submission_received_at_round_trips_as_utc():
+    aware = datetime(2026, 3, 1, 9, 30, 15, 123456, tzinfo=timezone(timedelta(hours=-3)))
+    naive = datetime(2026, 3, 1, 12, 30, 15, 123456)
+
+    assert _make_sub("t1", received_at=aware).received_at == aware
+    assert _make_sub("t2", received_at=naive).received_at == naive.replace(tzinfo=timezone.utc)
+    assert _make_sub("t3", received_at=aware).received_ts == aware.timestamp()
+
+
+# ---------------------------------------------------------------------------
+# Expiry-aligned TTLs
+# ---------------------------------------------------------------------------
+
+def test_dashboard_expire_at_reflects_session():
+    from types import SimpleNamespace
+    from app.store import dashboard_expire_at
+
+    expires = datetime(2026, 5, 1, 18, 0)
+    assert dashboard_expire_at(SimpleNamespace(is_infinite=True, expires_at=None)) == 0
+    assert dashboard_expire_at(SimpleNamespace(is_infinite=False, expires_at=None)) is None
+    assert dashboard_expire_at(SimpleNamespace(is_infinite=False, expires_at=expires)) == \
+        expires.replace(tzinfo=timezone.utc).timestamp()
+
+
+def test_redis_keys_expire_with_their_room():
+    import time
+    fakeredis = pytest.importorskip("fakeredis")
+    from app.storage.redis_store import _EXPIRY_GRACE, _TTL, RedisSubmissionStore
+
+    client = fakeredis.FakeRedis()
+    store = RedisSubmissionStore(client)
+    room_expiry = time.time() + 6 * 3600
+    store.add_if_unique(_make_sub("x1", photos=[b"\xff\xd8\xff1"]), expire_at=room_expiry)
+    store.add(_make_sub("x2", dashboard_id=2))
+    store.add_if_unique(_make_sub("x3", dashboard_id=3, photos=[b"\xff\xd8\xff3"]), expire_at=0)
+
+    expected = room_expiry + _EXPIRY_GRACE - time.time()
+    for key in ("triagem:{dash:1}:sub:x1", "triagem:{dash:1}:photo:x1:0",
+                "triagem:{dash:1}:zidx", "triagem:{dash:1}:dedup", "triagem:loc:x1"):
+        assert abs(client.ttl(key) - expected) <= 2
+    assert abs(client.ttl("triagem:{dash:2}:sub:x2") - _TTL) <= 2
+    assert client.ttl("triagem:{dash:3}:sub:x3") == -1
+    assert client.ttl("triagem:{dash:3}:photo:x3:0") == -1
+
+
+def test_redis_set_dashboard_expiry_refreshes_existing_keys():
+    import time
+    fakeredis = pytest.importorskip("fakeredis")
+    from app.storage.redis_store import _EXPIRY_GRACE, RedisSubmissionStore
+
+    client = fakeredis.FakeRedis()
+    store = RedisSubmissionStore(client)
+    store.add_if_unique(_make_sub("y1", photos=[b"\xff\xd8\xff1"]), expire_at=time.time() + 3600)
+    store.add_if_unique(_make_sub("y2", guest_name="Outra"), expire_at=time.time() + 3600)
+
+    extended = time.time() + 24 * 3600
+    assert store.set_dashboard_expiry(1, extended) == 2
+    assert abs(client.ttl("triagem:{dash:1}:sub:y1") - (extended + _EXPIRY_GRACE - time.time())) <= 2
+    assert client.ttl("triagem:{dash:1}:photo:y1:0") > 23 * 3600
+
+    assert store.set_dashboard_expiry(1, 0) == 2
+    for key in client.keys("*"):
+        assert client.ttl(key) == -1
+
+
+def test_redis_scripts_only_touch_declared_keys():
+    import re
+    from app.storage import redis_store
+
+    scripts = {name: getattr(redis_store, name) for name in dir(redis_store)
+               if name.endswith("_LUA")}
+    assert {"_SET_RENDERED_LUA", "_SET_THUMBNAIL_LUA", "_PURGE_DASHBOARD_LUA"} <= set(scripts)
+    for name, script in scripts.items():
+        for command, key in re.findall(r"redis\.call\('(\w+)',\s*([^,)]+)", script):
+            # ``key`` is the parameter of the shared expire() helper.
+            assert key.startswith("KEYS[") or key == "key", (name, command, key)
+
+
+def test_redis_room_scripts_declare_every_key_and_retry_on_change():
+    fakeredis = pytest.importorskip("fakeredis")
+    from app.storage.redis_store import RedisSubmissionStore
+
+    client = fakeredis.FakeRedis()
+    store = RedisSubmissionStore(client)
+    store.add(_make_sub("q1", photos=[b"\xff\xd8\xff1"], photo_keys=["photos/q1"]))
+    store.set_rendered("q1", 1, {"key": "k", "text": "t", "structured": []})
+    store.set_thumbnail("q1", 1, 0, "thumb", b"small")
+
+    script = store._purge_dashboard_script
+    declared = []
+
+    def racing_purge(keys, args):
+        declared.append(set(keys))
+        room = {k.decode() for k in client.keys("*") if not k.startswith(b"triagem:loc:")}
+        assert room <= set(keys)
+        if len(declared) == 1:
+            # Lands between the snapshot and the script: forces a re-read.
+            store.add_if_unique(_make_sub("q2", guest_name="Outra", photos=[b"\xff\xd8\xff2"]))
+        return script(keys=keys, args=args)
+
+    store._purge_dashboard_script = racing_purge
+    assert store.purge_dashboard(1) == ["photos/q1"]
+    assert len(declared) == 2
+    assert "triagem:{dash:1}:photo:q2:0" in declared[1]
+    assert client.keys("*") == []
+
+
+def test_sqlite_rows_follow_room_expiry(tmp_path):
+    import time
+    from app.storage.sqlite_store import SQLiteSubmissionStore
+
+    store = SQLiteSubmissionStore(str(tmp_path / "exp.db"))
+    store.add_if_unique(_make_sub("z1"), expire_at=time.time() - 3600)
+    assert store.count_for_dashboard(1) == 0
+
+    store.set_dashboard_expiry(1, 0)
+    assert store.count_for_dashboard(1) == 1
+
+
+# ---------------------------------------------------------------------------
+# Cluster-ready key layout
+# ---------------------------------------------------------------------------
+
+def test_redis_dashboard_keys_share_one_hash_slot():
+    fakeredis = pytest.importorskip("fakeredis")
+    from redis.crc import key_slot
+    from app.storage.redis_store import RedisSubmissionStore
+
+    client = fakeredis.FakeRedis()
+    store = RedisSubmissionStore(client)
+    store.add_if_unique(_make_sub("h1", dashboard_id=7, photos=[b"\xff\xd8\xff1"],
+                                  photo_keys=["photos/h1"]))
+    store.add(_make_sub("h2", dashboard_id=7, photos=[b"\xff\xd8\xff2"]))
+
+    room_keys = [k for k in client.keys("*") if not k.startswith(b"triagem:loc:")]
+    assert len(room_keys) == 11
+    assert {key_slot(k) for k in room_keys} == {key_slot(b"{dash:7}")}
+    assert client.get("triagem:loc:h1") == b"7"
+
+
+def test_get_and_delete_scoped_to_dashboard(store):
+    store.add(_make_sub("sc1", dashboard_id=1))
+
+    assert store.get("sc1", dashboard_id=2) is None
+    assert store.get_many(["sc1"], dashboard_id=2) == []
+    store.delete("sc1", dashboard_id=2)
+    assert store.get("sc1", dashboard_id=1).submission_id == "sc1"
+
+    store.delete("sc1", dashboard_id=1)
+    assert store.get("sc1") is None
+
+
+def test_redis_migrate_key_layout_moves_old_keys():
+    fakeredis = pytest.importorskip("fakeredis")
+    from app.storage.redis_codec import encode_entry
+    from app.storage.redis_store import RedisSubmissionStore
+
+    client = fakeredis.FakeRedis()
+    store = RedisSubmissionStore(client)
+    received_at = datetime.now(timezone.utc)
+    client.set("triagem:sub:m1", encode_entry({
+        "submission_id": "m1", "dashboard_id": 4, "guest_name": "Antigo",
+        "answers": {}, "crime_type": "outros", "received_at": received_at.isoformat(),
+        "photo_count": 1, "photo_keys": ["photos/m1"],
+    }), ex=3600)
+    client.set("triagem:photo:m1:0", b"\xff\xd8\xffm1", ex=3600)
+    client.zadd("triagem:zidx:4", {"m1": received_at.timestamp()})
+    client.sadd("triagem:photos:4", "triagem:photo:m1:0")
+    client.sadd("triagem:ext:4", "photos/m1")
+    client.sadd("triagem:dedup:4", "name:abc")
+    client.expire("triagem:zidx:4", 3600)
+
+    assert store.migrate_key_layout() == 1
+
+    assert not any(k.startswith(b"triagem:sub:") or k.startswith(b"triagem:zidx:")
+                   for k in client.keys("*"))
+    sub = store.get("m1")
+    assert sub.photos == [b"\xff\xd8\xffm1"]
+    assert 3500 < client.ttl("triagem:{dash:4}:sub:m1") <= 3600
+    assert store.count_for_dashboard(4) == 1
+    assert store.purge_dashboard(4) == ["photos/m1"]
+    assert client.keys("*") == []
+    assert store.migrate_key_layout() == 0
+
+
+# ---------------------------------------------------------------------------
+# Change feed
+# ---------------------------------------------------------------------------
+
+def _drain(subscription, expected, timeout=2.0):
+    import time
+    events = []
+    deadline = time.monotonic() + timeout
+    while len(events) < expected and time.monotonic() < deadline:
+        events.extend(subscription.get(timeout=0.2))
+    return events
+
+
+def test_subscribe_receives_add_delete_and_purge(store):
+    subscription = store.subscribe(1)
+    other = store.subscribe(2)
+    try:
+        store.add(_make_sub("f1", guest_name="Ana"))
+        store.add_if_unique(_make_sub("f2", guest_name="Bia"))
+        store.add_if_unique(_make_sub("f3", guest_name="Ana"))  # duplicate
+        store.delete("f1", dashboard_id=1)
+        store.delete("missing", dashboard_id=1)
+        store.purge_dashboard(1)
+
+        events = _drain(subscription, 4)
+        assert [e["type"] for e in events] == ["added", "added", "removed", "purged"]
+        assert events[0]["submission"]["id"] == "f1"
+        assert events[0]["submission"]["guest_name"] == "Ana"
+        assert "photos" not in events[0]["submission"]
+        assert events[2]["id"] == "f1"
+        assert other.get(timeout=0.1) == []
+    finally:
+        subscription.close()
+        other.close()
+
+
+def test_purging_an_empty_room_is_a_no_op(store):
+    store.add(_make_sub("e1", dashboard_id=3))
+    store.delete("e1", dashboard_id=3)
+    version = store.version_for_dashboard(3)
+    subscription = store.subscribe(3)
+    try:
+        assert store.purge_dashboard(3) == []
+        assert store.version_for_dashboard(3) == version
+        assert subscription.get(timeout=0.1) == []
+    finally:
+        subscription.close()
+
+
+def test_local_feed_asks_slow_subscribers_to_resync():
+    from app.storage.change_feed import LocalChangeFeed, RESYNC_EVENT
+
+    feed = LocalChangeFeed(backlog=2)
+    feed.publish(1, {"type": "purged"})  # nobody listening: dropped
+    subscription = feed.subscribe(1)
+    for i in range(3):
+        feed.publish(1, {"type": "removed", "id": str(i)})
+    assert subscription.get(timeout=0) == [RESYNC_EVENT]
+    feed.publish(1, {"type": "removed", "id": "3"})
+    assert subscription.get(timeout=0) == [{"type": "removed", "id": "3"}]
+
+    subscription.close()
+    assert feed._channels == {}
+
+
+def test_sqlite_feed_reaches_other_store_instances(tmp_path):
+    from app.storage.sqlite_store import SQLiteSubmissionStore
+
+    path = str(tmp_path / "submissions.db")
+    watcher = SQLiteSubmissionStore(path)
+    writer = SQLiteSubmissionStore(path)
+    subscription = watcher.subscribe(1)
+    writer.add(_make_sub("x1"))
+    events = _drain(subscription, 1)
+    assert [e["submission"]["id"] for e in events] == ["x1"]
+
+
+# ---------------------------------------------------------------------------
+# List versions and delta sync
+# ---------------------------------------------------------------------------
+
+def test_version_bumps_and_changes_since(store):
+    assert store.version_for_dashboard(1) == 0
+    store.add(_make_sub("v1", guest_name="Ana"))
+    v1 = store.version_for_dashboard(1)
+    assert v1 > 0
+    store.add_if_unique(_make_sub("v2", guest_name="Bia"))
+    store.add_if_unique(_make_sub("v3", guest_name="Ana"))  # duplicate: no bump
+    store.add(_make_sub("v4", guest_name="Caio"))
+    store.delete("v1", dashboard_id=1)
+    store.delete("v4", dashboard_id=1)
+    assert store.version_for_dashboard(1) == v1 + 4
+    assert store.version_for_dashboard(2) == 0
+
+    assert store.changes_since(1, v1) == (v1 + 4, ["v2"], ["v1", "v4"])
+    assert store.changes_since(1, v1 + 4) == (v1 + 4, [], [])
+    assert store.changes_since(1, 0) is None          # predates the log
+    assert store.changes_since(1, v1 + 99) is None    # from another store
+
+    store.purge_dashboard(1)
+    assert store.version_for_dashboard(1) == 0
+    assert store.changes_since(1, v1 + 4) is None     # purge forces a reset
+    store.purge_dashboard(1)                          # nothing left: no bump
+    assert store.version_for_dashboard(1) == 0
+    store.add(_make_sub("v5"))
+    v5 = store.version_for_dashboard(1)
+    assert v5 > 0
+    store.add(_make_sub("v6", guest_name="Davi"))
+    assert store.changes_since(1, v5) == (v5 + 1, ["v6"], [])
+
+
+def test_changes_since_resets_past_the_log_limit():
+    from app.store import _CHANGE_LOG_LIMIT
+
+    store = SubmissionStore()
+    store.add(_make_sub("first"))
+    since = store.version_for_dashboard(1)
+    for i in range(_CHANGE_LOG_LIMIT + 1):
+        store.add(_make_sub(f"n{i}"))
+    assert store.changes_since(1, since) is None
+    assert store.changes_since(1, since + 1)[1] == [f"n{i}" for i in range(1, _CHANGE_LOG_LIMIT + 1)]
+
+
+def test_count_many_counts_each_dashboard(store):
+    store.add(_make_sub("c1", dashboard_id=1))
+    store.add(_make_sub("c2", dashboard_id=1))
+    store.add(_make_sub("c3", dashboard_id=2))
+    assert store.count_many([1, 2, 3]) == {1: 2, 2: 1, 3: 0}
+    assert store.count_many([]) == {}
+
+
+def test_answer_keys_index_in_first_seen_order(store):
+    base = datetime.now(timezone.utc)
+    store.add(_make_sub("k1", dashboard_id=1, received_at=base,
+                        answers={"local": "a", "hora": "b"}))
+    assert store.add_if_unique(_make_sub("k2", dashboard_id=1, guest_name="Outra Pessoa",
+                                         received_at=base + timedelta(seconds=1),
+                                         answers={"hora": "c", "arma": "d"}))
+    store.add(_make_sub("k3", dashboard_id=2, answers={"outro": "x"}))
+
+    assert store.answer_keys_for_dashboard(1) == ["local", "hora", "arma"]
+    assert store.answer_keys_for_dashboard(2) == ["outro"]
+
+    store.purge_dashboard(1)
+    assert store.answer_keys_for_dashboard(1) == []
+
+
+def test_rendered_cache_lives_and_dies_with_the_submission(store):
+    store.add(_make_sub("r1", dashboard_id=1))
+    store.add(_make_sub("r2", dashboard_id=1))
+    rendered = {"key": "1:abc", "text": "Relato", "structured": [["Descrição", "teste"]]}
+
+    assert store.get_rendered("r1") is None
+    assert store.set_rendered("r1", 1, rendered)
+    assert store.set_rendered("r2", 1, rendered)
+    assert store.get_rendered("r1", 1) == rendered
+    assert store.get_rendered_many(["r2", "missing", "r1"], 1) == {"r1": rendered, "r2": rendered}
+    assert store.get_rendered_many(["r2"]) == {"r2": rendered}
+    assert not store.set_rendered("r1", 2, rendered)
+    assert not store.set_rendered("missing", 1, rendered)
+
+    store.delete("r1")
+    assert store.get_rendered("r1") is None
+    store.purge_dashboard(1)
+    assert store.get_rendered("r2", 1) is None
+
+
+def test_thumbnails_live_and_die_with_the_submission(store):
+    store.add(_make_sub("t1", dashboard_id=1, photos=[b"\xff\xd8\xffone"]))
+    store.add(_make_sub("t2", dashboard_id=1, photos=[b"\xff\xd8\xfftwo"]))
+
+    assert store.get_thumbnail("t1", 0, "thumb") is None
+    assert store.set_thumbnail("t1", 1, 0, "thumb", b"small-1")
+    assert store.set_thumbnail("t2", 1, 0, "preview", b"small-2")
+    assert store.get_thumbnail("t1", 0, "thumb", dashboard_id=1) == b"small-1"
+    assert store.get_thumbnail("t2", 0, "preview") == b"small-2"
+    assert store.get_thumbnail("t2", 0, "thumb") is None
+    assert not store.set_thumbnail("t1", 2, 0, "thumb", b"x")
+    assert not store.set_thumbnail("missing", 1, 0, "thumb", b"x")
+
+    store.delete("t1")
+    assert store.get_thumbnail("t1", 0, "thumb", dashboard_id=1) is None
+    store.purge_dashboard(1)
+    assert store.get_thumbnail("t2", 0, "preview", dashboard_id=1) is None
+
+
+def test_rendered_for_renders_once_per_content(store):
+    from unittest.mock import patch
+    from app.renderer import cache
+
+    sub = _make_sub("rf1", dashboard_id=1)
+    store.add(sub)
+    with patch.object(cache, "render_submission", wraps=cache.render_submission) as render:
+        first = cache.rendered_for(sub, store)
+        again = cache.rendered_for(store.get("rf1"), store)
+        assert render.call_count == 1
+        assert again == first
+        assert "teste" in first["text"]
+
+        sub.answers = {"descricao": "corrigido"}
+        assert cache.rendered_for(sub, store)["key"] != first["key"]
+        assert render.call_count == 2